@@ -3,11 +3,20 @@
 # 01_data/ingestion.py
 
 Ingests data from input files and writes to an output file.
-Duplicates are removed.
+Duplicates are removed by 64-bit row digests (data_processing.dedup); the
+digests of the ingested rows are kept in <output>_digests.npz, so with
+--incremental only files not yet in the ingest record are loaded, deduped
+against the history and appended to the output file.
+Source files are validated before they are ingested (column set, dtypes,
+ranges, label domain, null rates); rejected files and rows are moved to the
+quarantine folder (01_data/<quarantine_folder>/<timestamp>) and the step
+fails if a file is rejected as a whole, before any output is written.
 
 Input parameters are provided via command line arguments.
     - config_file: Path to the configuration file containing input and output folder paths.
     - output_filename: Name of the output file where the final data will be saved.
+    - incremental: Only ingest the files not in the ingest record (true/false).
+    - skip_exact_check: Trust the row digests without the collision check (true/false).
 """
 import argparse
 import logging
@@ -17,46 +26,98 @@ import pandas as pd
 import numpy as np
 import os
 import json
+import sys
 from datetime import datetime
 
+from data_processing.schema import concat_datasets
+from data_processing.dataset_store import publish_dataset, publish_csv, source_version
+from data_processing.dedup import DigestIndex, deduplicate
+from data_processing.validation import MAX_REJECTED_RATE, read_validated_csv, quarantine
 from utils.common_utilities import get_project_root, load_config
+from utils.artifact_store import ArtifactStore, artifact_store_path
+from utils.logging_utils import setup_logging
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
+logger = setup_logging()
 
 
 
-def load_csv(folder_path: str) -> pd.DataFrame:
+def str_to_bool(value: str) -> bool:
+    """
+    Boolean command line value (true/false, yes/no, 1/0), as passed by MLflow.
+    """
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise argparse.ArgumentTypeError(f"Expected true or false, got {value}.")
+
+
+def load_csv(folder_path: str, skip_files: list = None, quarantine_dir: str = None,
+             chunksize: int = 100000, max_rejected_rate: float = MAX_REJECTED_RATE) -> tuple:
     """
     Load all CSV files from a folder and merge them into a single DataFrame.
+    Every file is validated while it is read with the dataset schema
+    (data_processing.validation); invalid rows are dropped and files that
+    fail validation are not loaded.
     Inputs:
     - folder_path: Path to the folder containing CSV files
+    - skip_files: Optional names of files that are not loaded (e.g. already ingested)
+    - quarantine_dir: Optional folder the rejected files and rows are moved to
+    - chunksize: Number of rows per validated chunk
+    - max_rejected_rate: Maximum share of rejected rows of a file
     Outputs:
-    - df: Merged DataFrame containing all data from the CSV files
+    - df: Merged DataFrame containing all valid data from the CSV files
+    - all_files: Names of the loaded files
+    - reports: Validation reports of all files
     """
-    all_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
+    all_files = [
+        f for f in os.listdir(folder_path)
+        if f.endswith('.csv') and f not in (skip_files or [])
+    ]
     
     if not all_files:
         logger.error("No CSV files found in the input folder. Exiting.")
-        return pd.DataFrame()
+        return pd.DataFrame(), [], []
     
     df_list = []
+    loaded_files = []
+    reports = []
     for file in all_files:
         file_path = os.path.join(folder_path, file)
-        df = pd.read_csv(file_path)
-        df_list.append(df)
+        df, rejected, report = read_validated_csv(
+            file_path, chunksize=chunksize, max_rejected_rate=max_rejected_rate
+        )
+        reports.append(report)
+        if report["status"] != "valid":
+            logger.warning(
+                f"Validation of {file}: {report['status']}, {report['rejected_rows']} of"
+                f" {report['rows']} rows rejected. {' '.join(report['errors'])}"
+            )
+            if quarantine_dir is not None:
+                quarantine(quarantine_dir, file_path, rejected, report)
+                logger.warning(f"Rejected data of {file} moved to {quarantine_dir}")
+        if df is not None:
+            df_list.append(df)
+            loaded_files.append(file)
+    
+    if not df_list:
+        return pd.DataFrame(), [], reports
     
-    # Concatenate all DataFrames into one
-    df = pd.concat(df_list, ignore_index=True)
+    # Concatenate all DataFrames into one, keeping the schema dtypes
+    df = concat_datasets(df_list)
     
-    return df, all_files
+    return df, loaded_files, reports
 
 
-def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+def remove_duplicates(df: pd.DataFrame, index: DigestIndex = None, exact_check: bool = True) -> pd.DataFrame:
     """
     Remove duplicate rows from a DataFrame.
+    Rows are compared by their 64-bit digests instead of their values.
     Inputs:
     - df: DataFrame from which duplicates need to be removed
+    - index: Optional digest index of the rows ingested before; rows found
+      in it are removed as well and the index is updated
+    - exact_check: Verify digest matches, so a collision never removes a distinct row
     Outputs:
     - df: DataFrame with duplicates removed
     """
@@ -65,9 +126,14 @@ def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
         return df
     
     logger.info(f"DataFrame shape before removing duplicates: {df.shape}")
-    df.drop_duplicates(inplace=True)
-    df.reset_index(drop=True, inplace=True)
+    keep, stats = deduplicate(df, index, exact_check)
+    if not keep.all():
+        df = df[keep].reset_index(drop=True)
     logger.info(f"DataFrame shape after removing duplicates: {df.shape}")
+    logger.info(
+        "Duplicates removed: %s within the data, %s ingested before, %s digest collisions kept",
+        stats["batch_duplicates"], stats["history_duplicates"], stats["collisions"]
+    )
     
     return df
 
@@ -123,38 +189,95 @@ def go(args):
                         )
     logger.info(f"Output folder path: {output_folder_path}")
     
-    # Load all CSV files from the input folder and merge them into a single DataFrame
+    outputfilepath = os.path.join(output_folder_path, args.output_filename)
+    record_file_path = os.path.join(output_folder_path, args.ingest_files_record)
+    index_path = os.path.splitext(outputfilepath)[0] + '_digests.npz'
+
+    # Incremental ingestion needs the output, the record and the digest index
+    # of a previous run; otherwise all files are ingested
+    incremental = args.incremental and all(
+        os.path.exists(path) for path in [outputfilepath, record_file_path, index_path]
+    )
+    ingested_files = []
+    if incremental:
+        with open(record_file_path, 'r') as f:
+            ingested_files = [line.strip() for line in f if line.strip()]
+        logger.info(f"Incremental ingestion: {len(ingested_files)} files ingested before")
+    elif args.incremental:
+        logger.warning("No previous ingestion with a digest index found. Ingesting all files.")
+
+    # Load all (new) CSV files from the input folder and merge them into a single DataFrame
     # Store the filenames in the input folder
     logger.info(f"Loading data from input folder: {input_folder_path}")
-    df, all_files = load_csv(input_folder_path)
+    quarantine_dir = os.path.join(
+                        project_root,
+                        '01_data',
+                        args.quarantine_folder,
+                        datetime.now().strftime('%Y%m%d_%H%M%S')
+                     )
+    df, new_files, reports = load_csv(
+        input_folder_path,
+        skip_files=ingested_files,
+        quarantine_dir=quarantine_dir,
+        chunksize=args.validation_chunksize,
+        max_rejected_rate=args.max_rejected_rate
+    )
+    all_files = ingested_files + new_files
+
+    # Fail fast on rejected files, so no training run is started on partial data
+    rejected_files = [report["file"] for report in reports if report["status"] == "file_rejected"]
+    if rejected_files:
+        logger.error(f"\n***Files rejected by the validation and quarantined in {quarantine_dir}: {rejected_files}\n")
+        if not args.continue_on_rejected_files:
+            sys.exit(1)
 
     # Check if the DataFrame is empty after merging
     if df.empty:
-        logger.error("The merged DataFrame is empty. Exiting.")
+        if incremental:
+            logger.info("No new files to ingest.")
+        else:
+            logger.error("The merged DataFrame is empty. Exiting.")
         return
 
     # Log the shape of the merged DataFrame
     logger.info(f"Merged DataFrame shape after loading: {df.shape}")
 
-    # Remove duplicates
-    df = remove_duplicates(df)
+    # Remove duplicates, also against the rows ingested before
+    digest_index = DigestIndex(index_path, load=incremental)
+    df = remove_duplicates(df, digest_index, exact_check=not args.skip_exact_check)
 
     # Log the shape of the DataFrame after removing duplicates
     logger.info(f"Merged DataFrame shape after removing duplicates: {df.shape}")
     
-    # Save the merged DataFrame to a CSV file
-    outputfilepath = os.path.join(output_folder_path, args.output_filename)
-    logger.info(f"Saving merged DataFrame to {outputfilepath}")
-    df.to_csv(outputfilepath, index=False)
+    # Save the merged DataFrame to a CSV file (append the new rows if incremental)
+    store_dir = os.path.join(project_root, '01_data', 'dataset_store')
+    if incremental:
+        logger.info(f"Appending {len(df)} new rows to {outputfilepath}")
+        df.to_csv(outputfilepath, mode='a', header=False, index=False)
+        version = publish_csv(outputfilepath, store_dir, "ingested")
+    else:
+        logger.info(f"Saving merged DataFrame to {outputfilepath}")
+        df.to_csv(outputfilepath, index=False)
+        version = source_version(outputfilepath)
+        publish_dataset(df, store_dir, "ingested", version, outputfilepath)
+    digest_index.save()
+    logger.info(f"Digest index with {len(digest_index)} rows saved to {index_path}")
+
+    # Publish the new version to the dataset store read by the API
+    logger.info(f"Dataset version {version} published to {store_dir}")
     
 
     # Save a record of the ingested filenames
-    record_file_path = os.path.join(output_folder_path, args.ingest_files_record)
     with open(record_file_path, 'w') as f:
         [f.write(f"{file}\n") for file in all_files]
         
     logger.info(f"Record of ingested files saved to {record_file_path}")
 
+    # Publish the data and the record to the artifact store
+    artifact_store = ArtifactStore(artifact_store_path(project_root))
+    artifact_store.publish(outputfilepath)
+    artifact_store.publish(record_file_path)
+
     logger.info("-----Data ingestion completed successfully.-----")
 
 
@@ -182,6 +305,51 @@ if __name__ == "__main__":
         help="Name of the file which contains the record of the ingested files.",
         required=True
     )
+
+    parser.add_argument(
+        "--incremental",
+        type=str_to_bool,
+        nargs="?",
+        const=True,
+        help="Only ingest files not in the record and dedupe them against the digest index (true/false, the flag alone means true).",
+        default=False
+    )
+
+    parser.add_argument(
+        "--skip_exact_check",
+        type=str_to_bool,
+        nargs="?",
+        const=True,
+        help="Trust the 64-bit row digests without checking for collisions (true/false, the flag alone means true).",
+        default=False
+    )
+
+    parser.add_argument(
+        "--quarantine_folder",
+        type=str,
+        help="Folder in 01_data the rejected files and rows are moved to.",
+        default="quarantine"
+    )
+
+    parser.add_argument(
+        "--validation_chunksize",
+        type=int,
+        help="Number of rows per chunk of the validation.",
+        default=100000
+    )
+
+    parser.add_argument(
+        "--max_rejected_rate",
+        type=float,
+        help="Maximum share of rejected rows before a file is rejected as a whole.",
+        default=MAX_REJECTED_RATE
+    )
+
+    parser.add_argument(
+        "--continue_on_rejected_files",
+        action="store_true",
+        help="Ingest the valid files even if other files were rejected."
+    )
     
     
     args = parser.parse_args()
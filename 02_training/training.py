@@ -5,9 +5,27 @@ This script trains a Logistic Regression model on the data stored in /01_data/in
 It reads the configuration from a JSON file, processes the data, trains the model, and
 saves the trained model to a specified output path.
 
+In incremental training mode the dataset is streamed in chunks and a logistic
+regression model is trained with stochastic gradient descent, so the data does
+not have to fit in memory.
+In warm_start mode the deployed model is retrained, starting from its coefficients,
+on the newly ingested files plus a reservoir sample of the history. The sample is
+saved next to the model file (<model>_reservoir.csv) and referenced by name in
+the training details, so loading the model does not load the sample.
+In search mode cross-validated candidates (C, penalty, solver) are evaluated on a
+process pool and the winning configuration is refitted on the full data.
+
 Input parameters are provided via command line arguments.
     - config_file: Path to the configuration file containing input and output folder paths.
     - output_modelname: Name of the output file where the trained model will be saved.
+    - training_mode: batch (default), incremental, warm_start or search.
+    - chunksize, epochs: Chunk size and number of passes in incremental mode.
+    - parity_check, parity_tolerance: Compare incremental and batch accuracy on the practice data.
+      Developer-only flags (not exposed in MLproject): the accuracies are in-sample,
+      so the check verifies the streaming code path, not generalization.
+    - reservoir_size: Size of the history sample saved with the model for warm-start retraining.
+    - ingest_files_record: Name of the ingest record of the deployed model (warm_start mode).
+    - search_C, search_penalties, search_solvers, cv_folds, n_jobs: Search grid and pool size (search mode).
 """
 import argparse
 import logging
@@ -18,25 +36,50 @@ import numpy as np
 import pickle
 import os
 import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import product
+from multiprocessing import shared_memory
 
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold
 
 from data_processing.model_data_prep import process_data
-from utils.common_utilities import get_project_root, load_config, load_dataset
-
-
-
-
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
-
-def train_model(X: np.ndarray, y: np.ndarray) -> LogisticRegression:
+from data_processing.schema import concat_datasets, read_dataset_csv
+from data_processing.streaming\
+    import iter_csv_chunks,\
+           iter_dataframe_chunks,\
+           discover_vocabulary,\
+           build_encoder,\
+           extend_encoder,\
+           update_reservoir
+from utils.common_utilities\
+    import get_project_root,\
+           load_config,\
+           load_dataset,\
+           load_model_info
+from utils.artifact_store\
+    import ArtifactStore,\
+           artifact_store_path
+from utils.logging_utils\
+    import setup_logging,\
+           LazyPreview
+
+
+
+
+logger = setup_logging()
+
+def train_model(X: np.ndarray, y: np.ndarray, params: dict = None) -> LogisticRegression:
     """
     Train a Logistic Regression model.
     Inputs:
     - X: Features (Numpy array)
     - y: Target variable (Numpy array)
+    - params: Optional parameters overriding the default configuration
     Outputs:
     - model: Trained Logistic Regression model
     """
@@ -59,12 +102,395 @@ def train_model(X: np.ndarray, y: np.ndarray) -> LogisticRegression:
         verbose=0,
         warm_start=False
         )
+    if params:
+        model.set_params(**params)
     
     # Fit the logistic regression to the data
     model.fit(X, y)
     return model
 
 
+def train_model_incremental(
+    chunk_source, label: str, categorical_features: list, epochs: int = 5, alpha: float = 0.0001
+) -> tuple:
+    """
+    Train a logistic regression model with stochastic gradient descent on
+    data that is streamed in chunks, so the dataset never has to fit in memory.
+    - First pass: discover the category vocabulary and the mean and standard
+      deviation of the continuous features.
+    - Following passes (one per epoch): encode each chunk with the fixed encoder,
+      standardize the continuous features and update the model with partial_fit.
+    Finally, the standardization is folded into the coefficients, so that the
+    model works on unscaled features produced by process_data like the batch model.
+    Inputs:
+    - chunk_source: Callable returning a fresh iterator of DataFrame chunks
+    - label: Name of the label column
+    - categorical_features: List of categorical features
+    - epochs: Number of passes over the data
+    - alpha: L2 regularization strength of the SGD learner
+    Outputs:
+    - model: Trained SGDClassifier with logistic loss
+    - encoder: OneHotEncoder built from the discovered vocabulary
+    - vocabulary: Result of the first streaming pass
+    """
+    # First pass: vocabulary and feature statistics
+    logger.info("Discovering category vocabulary and feature statistics (first pass)")
+    vocabulary = discover_vocabulary(chunk_source(), label, categorical_features)
+    if not vocabulary:
+        raise ValueError("No data found for incremental training.")
+    logger.info(f"Rows: {vocabulary['n_rows']}, categories per feature: "
+                f"{ {f: len(c) for f, c in vocabulary['categories'].items()} }")
+    encoder = build_encoder(vocabulary["categories"], categorical_features)
+
+    n_continuous = len(vocabulary["continuous_features"])
+    mean = vocabulary["mean"]
+    std = vocabulary["std"]
+    classes = np.array(vocabulary["classes"])
+
+    model = SGDClassifier(
+        loss="log_loss",
+        penalty="l2",
+        alpha=alpha,
+        fit_intercept=True,
+        learning_rate="optimal",
+        random_state=0
+    )
+
+    # Following passes: minibatch updates per chunk
+    for epoch in range(epochs):
+        logger.info(f"Incremental training epoch {epoch + 1}/{epochs}")
+        for chunk in chunk_source():
+            X, y, _ = process_data(
+                df=chunk,
+                label=label,
+                categorical_features=categorical_features,
+                training=False,
+                encoder=encoder
+            )
+            X[:, :n_continuous] = (X[:, :n_continuous] - mean) / std
+            model.partial_fit(X, y, classes=classes)
+
+    # Fold the standardization into the coefficients: w'x + b on scaled data
+    # equals (w / std)'x + (b - sum(w * mean / std)) on unscaled data
+    coef = model.coef_.copy()
+    model.intercept_ = model.intercept_ - (coef[:, :n_continuous] * mean / std).sum(axis=1)
+    coef[:, :n_continuous] = coef[:, :n_continuous] / std
+    model.coef_ = coef
+
+    return model, encoder, vocabulary
+
+
+def reservoir_filename(model_filename: str) -> str:
+    """
+    Name of the history sample file saved next to a model file.
+    """
+    return os.path.splitext(model_filename)[0] + '_reservoir.csv'
+
+
+def load_reservoir(model_info: dict, model_folder: str) -> pd.DataFrame:
+    """
+    Load the history sample referenced by a model (None if it has none).
+    Inputs:
+    - model_info: Model information dictionary
+    - model_folder: Folder of the model file
+    Outputs:
+    - reservoir: DataFrame with the history sample
+    """
+    reservoir_file = model_info.get("training_details", {}).get("reservoir_file")
+    if reservoir_file is None:
+        return None
+    reservoir_path = os.path.join(model_folder, reservoir_file)
+    if not os.path.exists(reservoir_path):
+        logger.warning(f"History sample {reservoir_path} not found")
+        return None
+    return read_dataset_csv(reservoir_path)
+
+
+def retrain_model_warm_start(
+    model_info: dict, df_delta: pd.DataFrame, reservoir_size: int,
+    reservoir: pd.DataFrame = None, history_source=None, max_iter: int = 100
+) -> tuple:
+    """
+    Retrain the deployed model on newly ingested data only.
+    The model is initialized with the coefficients of the deployed model and
+    fitted on the new rows plus a bounded reservoir sample of the history, so
+    the retraining time depends on the size of the new data, not on the history.
+    Newly seen categories extend the encoder; their coefficients start at zero
+    while the known coefficients are carried over to their new positions.
+    Inputs:
+    - model_info: Model information dictionary of the deployed model
+    - df_delta: DataFrame with the newly ingested rows
+    - reservoir_size: Size of the history sample (0 to train on the new rows only)
+    - reservoir: History sample of the deployed model (see load_reservoir)
+    - history_source: Callable returning an iterator of history chunks, only used
+      to build the reservoir if the deployed model has none
+    - max_iter: Maximum number of iterations of the solver
+    Outputs:
+    - model: Warm-started Logistic Regression model
+    - encoder: Encoder, extended with newly seen categories
+    - details: Dictionary with the updated reservoir and retraining information
+    """
+    label = model_info["label_column"]
+    categorical_features = model_info["categorical_features"]
+    previous_model = model_info["model"]
+    previous_details = model_info.get("training_details", {})
+    rng = np.random.default_rng(0)
+
+    # Reservoir sample of the history
+    n_seen = previous_details.get("reservoir_rows_seen", 0) if reservoir is not None else 0
+    if reservoir_size > 0 and reservoir is None and history_source is not None:
+        logger.info("Deployed model has no history sample. Building the reservoir from the history.")
+        for chunk in history_source():
+            reservoir, n_seen = update_reservoir(reservoir, chunk, n_seen, reservoir_size, rng)
+    if reservoir_size > 0 and reservoir is not None:
+        df_train = concat_datasets([reservoir, df_delta])
+    else:
+        df_train = df_delta
+    logger.info(f"Warm-start training data: {len(df_delta)} new rows,\
+                {len(df_train) - len(df_delta)} history sample rows")
+
+    # Extend the encoder with newly seen categories
+    new_categories = {f: df_delta[f].dropna().unique().tolist() for f in categorical_features}
+    encoder, column_map, added = extend_encoder(
+        model_info["encoder"], new_categories, categorical_features
+    )
+    logger.info(f"Newly seen categories: {added}")
+
+    X, y, _ = process_data(
+        df=df_train,
+        label=label,
+        categorical_features=categorical_features,
+        training=False,
+        encoder=encoder
+    )
+    if len(np.unique(y)) < 2:
+        raise ValueError("Warm-start training data contains a single class. Use batch training instead.")
+
+    # Carry the deployed coefficients over to the extended feature space
+    n_continuous = X.shape[1] - sum(len(c) for c in encoder.categories_)
+    coef = np.zeros((1, X.shape[1]))
+    coef[:, :n_continuous] = previous_model.coef_[:, :n_continuous]
+    coef[:, n_continuous + column_map] = previous_model.coef_[:, n_continuous:]
+
+    model = LogisticRegression(
+        C=getattr(previous_model, "C", 1.0),
+        fit_intercept=True,
+        max_iter=max_iter,
+        penalty='l2',
+        random_state=0,
+        solver='lbfgs',
+        warm_start=True
+    )
+    model.coef_ = coef
+    model.intercept_ = np.array(previous_model.intercept_, dtype=float)
+    model.classes_ = previous_model.classes_
+    model.fit(X, y)
+
+    # Keep the reservoir up to date for the next retraining
+    if reservoir_size > 0:
+        reservoir, n_seen = update_reservoir(reservoir, df_delta, n_seen, reservoir_size, rng)
+
+    details = {
+        "reservoir": reservoir,
+        "reservoir_rows_seen": n_seen,
+        "rows_new": len(df_delta),
+        "rows_history_sample": len(df_train) - len(df_delta),
+        "categories_added": added,
+        "previous_model_created_at": model_info["created_at"]
+    }
+    return model, encoder, details
+
+
+# Shared memory arrays of a search worker process
+_search_data = {}
+
+
+def _attach_shared_arrays(specs: dict):
+    """
+    Initializer of the search worker processes.
+    Attaches to the shared memory blocks holding the encoded data, so that
+    X and y are not pickled and sent with every candidate.
+    Inputs:
+    - specs: Dictionary name -> (shared memory name, shape, dtype)
+    """
+    for key, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _search_data[key + "_shm"] = shm
+        _search_data[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _evaluate_candidate(params: dict, cv_folds: int) -> dict:
+    """
+    Cross-validate one candidate configuration in a search worker.
+    Inputs:
+    - params: Logistic Regression parameters of the candidate
+    - cv_folds: Number of cross-validation folds
+    Outputs:
+    - result: Dictionary with the parameters, fold scores and timings
+    """
+    X = _search_data["X"]
+    y = _search_data["y"]
+    start_time = time.perf_counter()
+    scores = []
+    folds = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=0)
+    for train_idx, test_idx in folds.split(X, y):
+        model = train_model(X[train_idx], y[train_idx], params)
+        scores.append(f1_score(y[test_idx], model.predict(X[test_idx]), zero_division=1))
+    return {
+        "params": params,
+        "f1_scores": scores,
+        "mean_f1": float(np.mean(scores)),
+        "std_f1": float(np.std(scores)),
+        "fit_time_seconds": time.perf_counter() - start_time,
+        "pid": os.getpid()
+    }
+
+
+def search_candidates(C_values: list, penalties: list, solvers: list, max_iter: int = 100) -> list:
+    """
+    Build the grid of candidate configurations.
+    Combinations not supported by a solver are skipped.
+    Inputs:
+    - C_values: Inverse regularization strengths
+    - penalties: Penalties (l1, l2)
+    - solvers: Solvers (liblinear, lbfgs, saga, ...)
+    - max_iter: Maximum number of iterations
+    Outputs:
+    - candidates: List of parameter dictionaries
+    """
+    supported_penalties = {
+        "liblinear": {"l1", "l2"},
+        "saga": {"l1", "l2"},
+        "lbfgs": {"l2"},
+        "newton-cg": {"l2"},
+        "sag": {"l2"}
+    }
+    candidates = []
+    for C, penalty, solver in product(C_values, penalties, solvers):
+        if penalty not in supported_penalties.get(solver, set()):
+            continue
+        candidates.append({"C": C, "penalty": penalty, "solver": solver, "max_iter": max_iter})
+    return candidates
+
+
+def search_model(X: np.ndarray, y: np.ndarray, candidates: list, cv_folds: int = 5, n_jobs: int = 2) -> tuple:
+    """
+    Run a cross-validated search over the candidates on a process pool.
+    The encoded data is copied once into shared memory; the workers attach to
+    it in their initializer and only the candidate parameters are sent per task.
+    Inputs:
+    - X: Encoded features (Numpy array)
+    - y: Target variable (Numpy array)
+    - candidates: List of parameter dictionaries
+    - cv_folds: Number of cross-validation folds
+    - n_jobs: Number of worker processes
+    Outputs:
+    - model: Winning configuration refitted on the full data
+    - results: Per-candidate results sorted by mean F1 (best first)
+    """
+    if not candidates:
+        raise ValueError("No candidates to search.")
+    blocks = []
+    specs = {}
+    try:
+        for key, array in (("X", np.ascontiguousarray(X)), ("y", np.ascontiguousarray(y))):
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            specs[key] = (shm.name, array.shape, array.dtype.str)
+
+        logger.info(f"Evaluating {len(candidates)} candidates with {cv_folds}-fold CV on {n_jobs} workers")
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_attach_shared_arrays,
+            initargs=(specs,)
+        ) as executor:
+            results = list(executor.map(_evaluate_candidate, candidates, [cv_folds] * len(candidates)))
+        logger.info(f"Search completed in {time.perf_counter() - start_time:.2f} seconds")
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    results.sort(key=lambda r: r["mean_f1"], reverse=True)
+    for result in results:
+        logger.info(f"Candidate {result['params']}: mean F1 {result['mean_f1']:.4f}\
+                    (+/- {result['std_f1']:.4f}), {result['fit_time_seconds']:.3f} s")
+
+    # Refit the winning configuration on the full data
+    best_params = results[0]["params"]
+    logger.info(f"Best candidate: {best_params}")
+    model = train_model(X, y, best_params)
+    return model, results
+
+
+def parity_check(
+    practice_data_path: str, label: str, categorical_features: list,
+    chunksize: int, epochs: int, tolerance: float = 0.05
+) -> dict:
+    """
+    Compare the accuracy of the incremental learner with the batch model
+    on the practice data. Both models are trained and evaluated on the same data.
+    Inputs:
+    - practice_data_path: Folder containing the practice CSV files
+    - label: Name of the label column
+    - categorical_features: List of categorical features
+    - chunksize: Number of rows per chunk for the incremental learner
+    - epochs: Number of passes of the incremental learner
+    - tolerance: Maximum accepted accuracy difference
+    Outputs:
+    - parity: Dictionary with the accuracies, their difference and the result
+    """
+    logger.info(f"Running accuracy parity check on practice data: {practice_data_path}")
+    practice_files = sorted(f for f in os.listdir(practice_data_path) if f.endswith('.csv'))
+    df = concat_datasets(
+        [load_dataset(os.path.join(practice_data_path, f), logger) for f in practice_files]
+    )
+
+    # Batch model
+    X, y, encoder = process_data(
+        df=df,
+        label=label,
+        categorical_features=categorical_features,
+        training=True,
+        encoder=None
+    )
+    batch_accuracy = float((train_model(X, y).predict(X) == y).mean())
+
+    # Incremental model on the same data, streamed in chunks
+    incremental_model, incremental_encoder, _ = train_model_incremental(
+        chunk_source=lambda: iter_dataframe_chunks(df, chunksize),
+        label=label,
+        categorical_features=categorical_features,
+        epochs=epochs
+    )
+    X, y, _ = process_data(
+        df=df,
+        label=label,
+        categorical_features=categorical_features,
+        training=False,
+        encoder=incremental_encoder
+    )
+    incremental_accuracy = float((incremental_model.predict(X) == y).mean())
+
+    difference = batch_accuracy - incremental_accuracy
+    passed = difference <= tolerance
+    logger.info(f"Parity check: batch accuracy: {batch_accuracy:.4f},\
+                incremental accuracy: {incremental_accuracy:.4f},\
+                difference: {difference:.4f}, tolerance: {tolerance}")
+    if not passed:
+        logger.warning("*** Incremental model accuracy is outside the tolerance of the batch model.")
+
+    return {
+        "batch_accuracy": batch_accuracy,
+        "incremental_accuracy": incremental_accuracy,
+        "difference": difference,
+        "tolerance": tolerance,
+        "passed": passed
+    }
+
+
 def go(args):
     
     logger.info("Starting model training process")
@@ -105,55 +531,176 @@ def go(args):
         inputfilename
         )       
     
-    logger.info(f"Loading dataset from: {input_file_path}")
-    df = load_dataset(input_file_path, logger)
-    logger.info(f"Dataset loaded with shape: {df.shape}")    
-
-
-    # Store training information
-    # --------------------------------------
-    logger.info("Storing training information")
-    # Log the number of rows and columns in the training data.
-    train_n_rows = df.shape[0]
-    train_n_columns = df.shape[1]    
-    logger.info(f"Training data:\
-                number of rows: {train_n_rows},\
-                number of columns: {train_n_columns}")    
-
-    # Store feature names
-    feature_names = df.drop([label], axis=1)\
-        .columns\
-        .tolist()
-    logging.info(f"Feature names: {feature_names}")
-
-
-    # Process the data
-    # --------------------------------------
-    logger.info("Processing data")    
-    logger.info(f"Splitting dataset into features and target variable: {label}.\
-                One-Hot Encoding categorical features: {categorical_features}")    
-    X,y,encoder = process_data(
-        df=df,
-        label=label,
-        categorical_features=categorical_features,
-        training=True,
-        encoder=None
-    )
+    logger.info(f"Training mode: {args.training_mode}")
+    training_details = {"training_mode": args.training_mode}
+    reservoir = None
+
+    # Check the search grid before any data is loaded
+    if args.training_mode == "search":
+        try:
+            candidates = search_candidates(
+                C_values=[float(c) for c in args.search_C.split(",") if c.strip()],
+                penalties=[penalty.strip() for penalty in args.search_penalties.split(",") if penalty.strip()],
+                solvers=[solver.strip() for solver in args.search_solvers.split(",") if solver.strip()]
+            )
+        except ValueError as e:
+            logger.error(f"*** Invalid search_C {args.search_C}: {e}. Exiting.")
+            sys.exit(1)
+        if not candidates:
+            logger.error(
+                f"*** The search grid is empty: no supported combination of C {args.search_C},"
+                f" penalties {args.search_penalties} and solvers {args.search_solvers}. Exiting."
+            )
+            sys.exit(1)
+        if args.cv_folds < 2:
+            logger.error(f"*** cv_folds must be at least 2, got {args.cv_folds}. Exiting.")
+            sys.exit(1)
+
+    if args.training_mode == "incremental":
+        # Stream the dataset in chunks, the full data is never materialized
+        logger.info(f"Streaming dataset from: {input_file_path} in chunks of {args.chunksize} rows")
+        model, encoder, vocabulary = train_model_incremental(
+            chunk_source=lambda: iter_csv_chunks(input_file_path, args.chunksize),
+            label=label,
+            categorical_features=categorical_features,
+            epochs=args.epochs
+        )
+        train_n_rows = vocabulary["n_rows"]
+        train_n_columns = len(vocabulary["features"]) + 1
+        feature_names = vocabulary["features"]
+        logger.info(f"Training data:\
+                    number of rows: {train_n_rows},\
+                    number of columns: {train_n_columns}")
+        logger.info(f"Feature names: {feature_names}")
+        logger.info("Training completed.")
+
+        # Compare the incremental learner with the batch model on the practice data
+        if args.parity_check:
+            practice_data_path = os.path.join(project_root, '01_data', 'practicedata')
+            training_details["parity_check"] = parity_check(
+                practice_data_path=practice_data_path,
+                label=label,
+                categorical_features=categorical_features,
+                chunksize=args.chunksize,
+                epochs=args.epochs,
+                tolerance=args.parity_tolerance
+            )
+
+    elif args.training_mode == "warm_start":
+        # Retrain the deployed model on the files that are not part of its ingest record
+        prod_deployment_path = os.path.join(
+            project_root,
+            '04_deployment',
+            config['prod_deployment_path']
+        )
+        deployed_model_path = os.path.join(prod_deployment_path, args.output_modelname)
+        deployed_record_path = os.path.join(prod_deployment_path, args.ingest_files_record)
+        source_data_path = os.path.join(project_root, '01_data', config['input_folder_path'])
+        logger.info(f"Loading deployed model from: {deployed_model_path}")
+        deployed_model_info = load_model_info(deployed_model_path, logger)
+        if deployed_model_info is None or not os.path.exists(deployed_record_path):
+            logger.error("*** Deployed model or ingest record not found. Use batch training. Exiting.")
+            sys.exit(1)
+
+        with open(deployed_record_path, 'r') as f:
+            deployed_files = [line.strip() for line in f if line.strip()]
+        source_files = sorted(f for f in os.listdir(source_data_path) if f.endswith('.csv'))
+        new_files = [f for f in source_files if f not in deployed_files]
+        history_files = [f for f in source_files if f in deployed_files]
+        logger.info(f"New files: {new_files}")
+        if not new_files:
+            logger.info("No new files since the deployed model. Nothing to retrain.")
+            return
+
+        df_delta = concat_datasets(
+            [load_dataset(os.path.join(source_data_path, f), logger) for f in new_files]
+        ).drop_duplicates()
+
+        def history_source():
+            for f in history_files:
+                yield from iter_csv_chunks(os.path.join(source_data_path, f), args.chunksize)
+
+        model, encoder, retrain_details = retrain_model_warm_start(
+            model_info=deployed_model_info,
+            df_delta=df_delta,
+            reservoir_size=args.reservoir_size,
+            reservoir=load_reservoir(deployed_model_info, prod_deployment_path),
+            history_source=history_source
+        )
+        reservoir = retrain_details.pop("reservoir")
+        training_details.update(retrain_details)
+        feature_names = deployed_model_info["features"]
+        train_n_rows = retrain_details["rows_new"] + retrain_details["rows_history_sample"]
+        train_n_columns = df_delta.shape[1]
+        logger.info("Training completed.")
+
+    else:
+        logger.info(f"Loading dataset from: {input_file_path}")
+        df = load_dataset(input_file_path, logger)
+        logger.info(f"Dataset loaded with shape: {df.shape}")    
+
+
+        # Store training information
+        # --------------------------------------
+        logger.info("Storing training information")
+        # Log the number of rows and columns in the training data.
+        train_n_rows = df.shape[0]
+        train_n_columns = df.shape[1]    
+        logger.info(f"Training data:\
+                    number of rows: {train_n_rows},\
+                    number of columns: {train_n_columns}")    
+
+        # Store feature names
+        feature_names = [column for column in df.columns if column != label]
+        logging.info(f"Feature names: {feature_names}")
+
+
+        # Process the data
+        # --------------------------------------
+        logger.info("Processing data")    
+        logger.info(f"Splitting dataset into features and target variable: {label}.\
+                    One-Hot Encoding categorical features: {categorical_features}")    
+        X,y,encoder = process_data(
+            df=df,
+            label=label,
+            categorical_features=categorical_features,
+            training=True,
+            encoder=None
+        )
 
-    logger.info(f"Processed data shapes: X: {X.shape}, y: {y.shape}")  
-    logger.info(f"X preview: {X[:5]}")
-    logger.info(f"y preview: {y[:5]}")
+        logger.info(f"Processed data shapes: X: {X.shape}, y: {y.shape}")  
+        logger.debug("X preview: %s", LazyPreview(X))
+        logger.debug("y preview: %s", LazyPreview(y))
     
-    # Train the model
-    # --------------------------------------
-    logger.info("Training the Logistic Regression model")
-    model = train_model(X, y)
-    logger.info("Training completed.")  
+        # Train the model
+        # --------------------------------------
+        if args.training_mode == "search":
+            # Parallel cross-validated search, the winner is refitted on all data
+            logger.info("Searching Logistic Regression configurations")
+            model, search_results = search_model(
+                X, y, candidates, cv_folds=args.cv_folds, n_jobs=args.n_jobs or os.cpu_count()
+            )
+            training_details["search_results"] = search_results
+        else:
+            logger.info("Training the Logistic Regression model")
+            model = train_model(X, y)
+        logger.info("Training completed.")  
+
+        # Keep a sample of the training data for later warm-start retraining
+        if args.reservoir_size > 0:
+            reservoir, n_seen = update_reservoir(
+                None, df, 0, args.reservoir_size, np.random.default_rng(0)
+            )
+            training_details["reservoir_rows_seen"] = n_seen
    
 
     # Save the trained model
     # --------------------------------------
     logger.info("Saving model to file")
+
+    # The history sample is saved next to the model, only its name is stored in the model
+    if reservoir is not None:
+        training_details["reservoir_file"] = reservoir_filename(args.output_modelname)
     
     # Get the current date and time    
     current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -170,9 +717,16 @@ def go(args):
         "label_column": label,
         "rows_train": train_n_rows,
         "columns_train": train_n_columns,
-        "encoder": encoder   
+        "encoder": encoder,
+        "training_details": training_details
     }
-    logging.info(f"Saving model with model info: {model_info}")
+    # Only a summary is logged at INFO: the model info holds the model and the
+    # encoder, which are expensive to render
+    logger.info(
+        "Saving model %s created at %s (training mode: %s, rows: %s)",
+        model_info["name"], model_info["created_at"], args.training_mode, train_n_rows
+    )
+    logger.debug("Model parameters: %s", model_info["params"])
 
     # Construct the model file path
     model_file_path = os.path.join(
@@ -185,6 +739,24 @@ def go(args):
     with open(model_file_path, "wb") as filehandler:
         pickle.dump(model_info, filehandler)
     logger.info(f"Model trained and saved to {model_file_path}.")
+
+    # Publish the model to the artifact store (ref latest)
+    artifact_store = ArtifactStore(artifact_store_path(project_root))
+    artifact_store.publish(model_file_path)
+
+    # Save and publish the history sample
+    if reservoir is not None:
+        reservoir_path = os.path.join(os.path.dirname(model_file_path), training_details["reservoir_file"])
+        reservoir.to_csv(reservoir_path, index=False)
+        artifact_store.publish(reservoir_path)
+        logger.info(f"History sample of {len(reservoir)} rows saved to {reservoir_path}.")
+
+    # Save the per-candidate results and timings of the search
+    if "search_results" in training_details:
+        search_results_path = os.path.splitext(model_file_path)[0] + '_search.json'
+        with open(search_results_path, "w") as f:
+            json.dump(training_details["search_results"], f, indent=2)
+        logger.info(f"Search results saved to {search_results_path}.")
     
     logger.info("-----Model training completed successfully.-----")
 
@@ -206,6 +778,92 @@ if __name__ == "__main__":
         help="Name of the output file where the final data will be saved.",
         required=True
     )
+
+    parser.add_argument(
+        "--training_mode", 
+        type=str,
+        choices=["batch", "incremental", "warm_start", "search"],
+        help="Training mode: batch (full dataset in memory), incremental (streamed in chunks),\
+              warm_start (deployed model retrained on the new files only)\
+              or search (parallel cross-validated hyperparameter search).",
+        default="batch"
+    )
+
+    parser.add_argument(
+        "--chunksize", 
+        type=int,
+        help="Number of rows per chunk in incremental training mode.",
+        default=100000
+    )
+
+    parser.add_argument(
+        "--epochs", 
+        type=int,
+        help="Number of passes over the data in incremental training mode.",
+        default=5
+    )
+
+    parser.add_argument(
+        "--parity_check", 
+        action="store_true",
+        help="Compare the incremental learner with the batch model on the practice data."
+    )
+
+    parser.add_argument(
+        "--parity_tolerance", 
+        type=float,
+        help="Maximum accepted accuracy difference in the parity check.",
+        default=0.05
+    )
+
+    parser.add_argument(
+        "--reservoir_size", 
+        type=int,
+        help="Size of the history sample kept with the model for warm-start retraining (0 to disable).",
+        default=10000
+    )
+
+    parser.add_argument(
+        "--ingest_files_record", 
+        type=str,
+        help="Name of the file which contains the record of the ingested files.",
+        default="ingested_files.txt"
+    )
+
+    parser.add_argument(
+        "--search_C", 
+        type=str,
+        help="Comma-separated grid of C values (search mode).",
+        default="0.01,0.1,1.0,10.0,100.0"
+    )
+
+    parser.add_argument(
+        "--search_penalties", 
+        type=str,
+        help="Comma-separated list of penalties (search mode).",
+        default="l1,l2"
+    )
+
+    parser.add_argument(
+        "--search_solvers", 
+        type=str,
+        help="Comma-separated list of solvers (search mode).",
+        default="liblinear,lbfgs,saga"
+    )
+
+    parser.add_argument(
+        "--cv_folds", 
+        type=int,
+        help="Number of cross-validation folds (search mode).",
+        default=5
+    )
+
+    parser.add_argument(
+        "--n_jobs", 
+        type=int,
+        help="Number of worker processes (search mode), 0 for one per CPU.",
+        default=0
+    )
     
     args = parser.parse_args()
 
@@ -5,7 +5,16 @@ This script:
 - loads test data from the path specified in the config.json file,
 - reads a trained model from a pickle file
 - calculates the F1 score of the model on the test data
+- computes ROC AUC, PR AUC and precision/recall/F1 over a sweep of thresholds
+  from the predicted probabilities (scored once)
+- computes precision/recall/F1 per corporation and per activity bucket
+  (diagnostics.segments) and ranks the worst segments
 - writes the F1 score to a file named latestscore.txt in the output folder path specified in config.json.
+- writes all metrics including the threshold sweep, the confusion counts and
+  the segment metrics to latestscore.json next to it (the reporting step
+  renders from them).
+- appends all metrics to the score history (score_history.db) next to it.
+- publishes both score files to the artifact store (ref latest).
 
 Input parameters:
     - config_file: Path to the config.json file containing paths for dataset and model.
@@ -13,6 +22,7 @@ Input parameters:
 
 Output:
     - latestscore.txt: A file containing the F1 score of the model on the test
+    - latestscore.json: A file containing all metrics, the threshold sweep and the confusion counts
 """
 
 import argparse
@@ -31,17 +41,39 @@ from utils.common_utilities\
            load_dataset,\
            load_model
 
-from diagnostics.diagnostics import compute_model_metrics
+from diagnostics.diagnostics\
+    import compute_model_metrics,\
+           confusion_counts,\
+           threshold_sweep
+from diagnostics.segments import segmented_evaluation
+from utils.artifact_store\
+    import ArtifactStore,\
+           artifact_store_path
+from utils.score_history\
+    import ScoreHistory,\
+           model_version,\
+           score_history_path
+from utils.logging_utils\
+    import setup_logging,\
+           LazyPreview
 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
+logger = setup_logging()
 
 
 
 
 
 
+def format_metric(value) -> str:
+    """
+    Metric with 4 decimals for the log, n/a if it is undefined (None or NaN).
+    """
+    if value is None or np.isnan(value):
+        return "n/a"
+    return f"{value:.4f}"
+
+
 def save_metrics(metrics_dict: dict, output_score_filename: str):
     """
     Save the model metrics to a file.
@@ -56,6 +88,29 @@ def save_metrics(metrics_dict: dict, output_score_filename: str):
             f.write(f"{key}: {value}\n")
 
 
+def save_metrics_json(metrics_dict: dict, sweep: dict, output_json_filename: str, confusion: dict = None,
+                      segments: dict = None):
+    """
+    Save the model metrics together with the threshold sweep to a JSON file,
+    so thresholds can be tuned later without re-scoring the data.
+    Inputs:
+    - metrics_dict: Dictionary containing model metrics.
+    - sweep: Dictionary returned by threshold_sweep.
+    - output_json_filename: Path to the output JSON file.
+    - confusion: Optional dictionary returned by confusion_counts.
+    - segments: Optional dictionary returned by segmented_evaluation.
+    Ouputs:
+    - JSON file containing the model metrics, the threshold sweep, the confusion counts and the segment metrics.
+    """
+    with open(output_json_filename, 'w') as f:
+        json.dump({
+            "metrics": metrics_dict,
+            "threshold_sweep": sweep,
+            "confusion_matrix": confusion,
+            "segments": segments
+        }, f, indent=2)
+
+
 def go(args):
     
     logger.info("Starting model scoring process")
@@ -75,7 +130,7 @@ def go(args):
         return
     logger.info(f"Loading configuration from: {config_filepath}")    
     config = load_config(config_filepath, logger)
-    logger.info(f"Configuration loaded: {config}")
+    logger.debug("Configuration loaded: %s", config)
 
 
     # Load the dataset        
@@ -109,14 +164,14 @@ def go(args):
     encoder,\
     label,\
     categorical_features = load_model(model_file_path, logger)
-    logger.info(f"Model load complete: {model_name} created at: {model_created_at} ")
+    logger.info("Model load complete: %s created at: %s", model_name, model_created_at)
     
 
     # Process the data
     # --------------------------------------
     logger.info("Processing data")    
-    logger.info(f"Splitting dataset into features and target variable: {label}.\
-                One-Hot Encoding categorical features: {categorical_features}")    
+    logger.debug("Splitting dataset into features and target variable: %s.\
+                One-Hot Encoding categorical features: %s", label, categorical_features)    
     X_test,y_test,_ = process_data(
         df=df,
         label=label,
@@ -125,18 +180,20 @@ def go(args):
         encoder=encoder
     )
 
-    logger.info(f"Processed data shapes: X: {X_test.shape}, y: {y_test.shape}")  
-    logger.info(f"X preview: {X_test[:5]}")
-    logger.info(f"y preview: {y_test[:5]}")
+    logger.info("Processed data shapes: X: %s, y: %s", X_test.shape, y_test.shape)  
+    logger.debug("X preview: %s", LazyPreview(X_test))
+    logger.debug("y preview: %s", LazyPreview(y_test))
 
 
     # Score the data with the loaded model
     # --------------------------------------
     logger.info("Scoring the model on the test data")
     
-    # Prediction using the model    
-    y_pred = model.predict(X_test)
-    logger.info(f"Predictions made on the test data: {y_pred[:5]}")
+    # Probabilities are computed once; class labels and all threshold
+    # dependent metrics are derived from them
+    y_score = model.predict_proba(X_test)[:, 1]
+    y_pred = model.classes_[(y_score > 0.5).astype(int)]
+    logger.debug("Predictions made on the test data: %s", LazyPreview(y_pred))
 
 
     # Compute model metrics
@@ -145,13 +202,31 @@ def go(args):
     precision,\
     recall,\
     fbeta,\
-    roc_auc = compute_model_metrics(y_test, y_pred)
+    roc_auc = compute_model_metrics(y_test, y_pred, y_score)
+
+    # Threshold sweep from a single sort of the scores
+    sweep = threshold_sweep(y_test, y_score, n_thresholds=args.n_thresholds or None)
+
+    # Confusion counts at the prediction threshold, for the reports
+    confusion = confusion_counts(y_test, y_pred, labels=model.classes_)
+
+    # Metrics per corporation and activity bucket, in one pass per segmentation
+    segments = segmented_evaluation(df, y_test, y_pred, top_k=args.segment_top_k)
+    for segmentation, result in segments.items():
+        if result["worst"]:
+            worst = result["worst"][0]
+            logger.info(
+                "Worst of %s %s segments: %s (F1: %.4f, %s rows)",
+                result["n_segments"], segmentation, worst["segment"], worst["f1_score"], worst["rows"]
+            )
 
     logger.info(f"Model metrics:\
                 Precision: {precision:.4f},\
                 Recall: {recall:.4f},\
                 F-beta: {fbeta:.4f},\
-                ROC AUC: {roc_auc:.4f}")
+                ROC AUC: {format_metric(roc_auc)},\
+                PR AUC: {format_metric(sweep['pr_auc'])},\
+                Best threshold: {format_metric(sweep['best_threshold'])} (F1: {format_metric(sweep['best_f1'])})")
 
 
     # Save the model metrics to a file
@@ -172,11 +247,34 @@ def go(args):
         "fbeta": fbeta,
         "precision": precision,
         "recall": recall,
-        "roc_auc": roc_auc
+        "roc_auc": roc_auc,
+        "pr_auc": sweep["pr_auc"],
+        "best_threshold": sweep["best_threshold"],
+        "best_f1": sweep["best_f1"]
     }
     save_metrics(metrics_dict, output_score_filename)
     logger.info(f"Model metrics saved to {output_score_filename}")
 
+    # Save the metrics and the threshold sweep as JSON
+    output_json_filename = os.path.splitext(output_score_filename)[0] + '.json'
+    save_metrics_json(metrics_dict, sweep, output_json_filename, confusion, segments)
+    logger.info(f"Model metrics and threshold sweep saved to {output_json_filename}")
+
+    # Publish the score files to the artifact store (ref latest)
+    artifact_store = ArtifactStore(artifact_store_path(project_root))
+    artifact_store.publish(output_score_filename)
+    artifact_store.publish(output_json_filename)
+
+    # Append the metrics to the score history
+    history_path = score_history_path(project_root, config)
+    ScoreHistory(history_path).append(
+        "score",
+        metrics_dict,
+        model_version=model_version(model_name, model_created_at),
+        source=args.input_data
+    )
+    logger.info(f"Model metrics appended to the score history {history_path}")
+
 
     logger.info("-----Model scoring completed successfully.-----")
 
@@ -213,6 +311,20 @@ if __name__ == "__main__":
         help="Name of the output file where the F1 score will be written.",
         default="latestscore.txt"
     )
+
+    parser.add_argument(
+        "--n_thresholds", 
+        type=int,
+        help="Number of evenly spaced thresholds for the threshold sweep. If 0, every distinct score is used.",
+        default=101
+    )
+
+    parser.add_argument(
+        "--segment_top_k",
+        type=int,
+        help="Number of worst segments per segmentation listed in latestscore.json.",
+        default=10
+    )
    
     args = parser.parse_args()
 
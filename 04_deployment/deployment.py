@@ -1,11 +1,15 @@
 """
 # 04_deployment/deployment.py
 
-This script is responsible for deploying the trained model by copying:
+This script is responsible for deploying the trained model:
 - the record of the ingest files
-- the latest model file
-- the latest score file
-into the production deployment directory.
+- the latest model file and its history sample for warm-start retraining
+- the latest score file (and its JSON counterpart with the threshold sweep)
+are published from the step outputs to the artifact store (content already
+stored is not copied again), the refs latest and production are pointed at
+them and they are checked out (hardlinked) into the production deployment
+directory. The other steps read the deployed files from that directory.
+Afterwards unreferenced objects are removed from the store.
 """
 
 import logging
@@ -16,25 +20,34 @@ import argparse
 from utils.common_utilities\
     import get_project_root,\
            load_config
+from utils.artifact_store\
+    import ArtifactStore,\
+           artifact_store_path
+from utils.logging_utils import setup_logging
            
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
+logger = setup_logging()
 
 
-def copy_file(src: str, dest: str):
+def deploy_file(artifact_store: ArtifactStore, src: str, dest: str):
     """
-    Copy a file from source to destination.
+    Deploy a step output through the artifact store.
+    The file is published (stored once per content hash) and the refs latest
+    and production of its artifact are pointed at exactly this content, so
+    the deployed version is always the one at src, whichever output folder
+    it comes from.
     Inputs:
-    - src: Source file path
-    - dest: Destination file path
+    - artifact_store: Artifact store
+    - src: Path of the step output
+    - dest: Destination directory
     """
-    if os.path.exists(src):
-        logger.info(f"Copying {src} to {dest}")
-        os.system(f"cp {src} {dest}")
-        logger.info(f"Copied {src} to {dest}")
-    else:
-        logger.error(f"*** Source file {src} does not exist. Skipping copy.")
+    if not os.path.exists(src):
+        logger.error(f"*** Source file {src} does not exist. Skipping deployment.")
+        return
+    artifact = os.path.basename(src)
+    digest = artifact_store.publish(src, refs=("latest", "production"))
+    dest_path = artifact_store.checkout(artifact, "production", dest)
+    logger.info(f"Deployed {src} as {artifact} ({digest[:12]}) to {dest_path}")
 
 
 def go(args):
@@ -95,19 +108,36 @@ def go(args):
 
     
 
-    # Copy files to production deployment path
+    # Deploy files to production deployment path
     # --------------------------------------    
-    # Copy latest model file   
-    logger.info(f"Copying latest model file: {latest_model_file}")
-    copy_file(latest_model_file, prod_deployment_path) 
+    artifact_store = ArtifactStore(artifact_store_path(project_root))
+    logger.info(f"Artifact store: {artifact_store.root}")
+
+    # Deploy latest model file   
+    logger.info(f"Deploying latest model file: {latest_model_file}")
+    deploy_file(artifact_store, latest_model_file, prod_deployment_path) 
+
+    # Deploy the history sample of the model (written by training unless reservoir_size is 0)
+    latest_reservoir_file = os.path.splitext(latest_model_file)[0] + '_reservoir.csv'
+    if os.path.exists(latest_reservoir_file):
+        logger.info(f"Deploying latest history sample: {latest_reservoir_file}")
+        deploy_file(artifact_store, latest_reservoir_file, prod_deployment_path)
     
-    # Copy latest score file    
-    logger.info(f"Copying latest score file: {latest_score_file}")
-    copy_file(latest_score_file, prod_deployment_path) 
+    # Deploy latest score file    
+    logger.info(f"Deploying latest score file: {latest_score_file}")
+    deploy_file(artifact_store, latest_score_file, prod_deployment_path) 
+
+    # Deploy latest score JSON file (metrics and threshold sweep)
+    latest_score_json_file = os.path.splitext(latest_score_file)[0] + '.json'
+    logger.info(f"Deploying latest score JSON file: {latest_score_json_file}")
+    deploy_file(artifact_store, latest_score_json_file, prod_deployment_path) 
     
-    # Copy ingest files record    
-    logger.info(f"Copying latest ingest record: {ingest_files_record}")
-    copy_file(ingest_files_record, prod_deployment_path) 
+    # Deploy ingest files record    
+    logger.info(f"Deploying latest ingest record: {ingest_files_record}")
+    deploy_file(artifact_store, ingest_files_record, prod_deployment_path) 
+
+    # Remove objects that are no longer referenced
+    artifact_store.gc(keep_history=args.gc_keep_history, min_age_seconds=args.gc_min_age_seconds)
 
 
     # Log completion
@@ -145,6 +175,20 @@ if __name__ == "__main__":
         required=True
     )
 
+    parser.add_argument(
+        "--gc_keep_history",
+        type=int,
+        help="Number of previous versions of every artifact ref kept in the artifact store.",
+        default=5
+    )
+
+    parser.add_argument(
+        "--gc_min_age_seconds",
+        type=float,
+        help="Unreferenced artifacts younger than this are not removed.",
+        default=3600.0
+    )
+
        
     args = parser.parse_args()
     
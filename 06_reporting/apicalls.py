@@ -1,56 +1,330 @@
+"""
+# 06_reporting/apicalls.py
+
+Smoke and load client of the API.
+- Requests are taken from a request mix file (JSON lines with name, method,
+  path, optional json body and weight), by default request_mix.jsonl.
+- All requests share one pooled HTTP session (keep-alive connections).
+- Requests are sent by a pool of threads (--concurrency).
+- Without --n_requests every entry of the mix is called once (smoke check of
+  a deployment); with --n_requests the entries are drawn by weight (load test).
+- Latency percentiles, throughput and error rates are reported per request
+  name and overall, and optionally written to a JSON report.
+- The first successful response of every request name is written to
+  apireturns.txt in the model output folder, as before.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 
 from utils.common_utilities\
     import get_project_root,\
            load_config
+from utils.logging_utils import setup_logging
 
-import logging
-import os
 
+logger = setup_logging()
+
+
+def load_request_mix(request_mix_file: str) -> list:
+    """
+    Load the request mix.
+    Inputs:
+    - request_mix_file: Path of the JSON lines file
+    Outputs:
+    - request_mix: List of request dictionaries (name, method, path, json, weight)
+    """
+    request_mix = []
+    with open(request_mix_file, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            entry.setdefault("name", entry["path"])
+            entry.setdefault("method", "GET")
+            entry.setdefault("weight", 1)
+            request_mix.append(entry)
+    return request_mix
+
+
+def build_session(pool_size: int) -> requests.Session:
+    """
+    HTTP session with a connection pool shared by all threads.
+    Inputs:
+    - pool_size: Maximum number of pooled connections per host
+    Outputs:
+    - session: requests Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def plan_requests(request_mix: list, n_requests: int, seed: int = 0) -> list:
+    """
+    Requests to send.
+    Inputs:
+    - request_mix: List of request dictionaries
+    - n_requests: Number of requests drawn by weight (0: every entry once)
+    - seed: Random seed of the draw
+    Outputs:
+    - plan: List of request dictionaries
+    """
+    if n_requests <= 0:
+        return list(request_mix)
+    rng = random.Random(seed)
+    return rng.choices(request_mix, weights=[entry["weight"] for entry in request_mix], k=n_requests)
+
+
+def send_request(session: requests.Session, url: str, entry: dict, timeout: float) -> dict:
+    """
+    Send one request and measure its latency.
+    Outputs:
+    - result: Dictionary with name, status, latency (seconds), content and error
+    """
+    start_time = time.perf_counter()
+    try:
+        response = session.request(
+            entry["method"], url + entry["path"], json=entry.get("json"), timeout=timeout
+        )
+        content = response.content
+        error = None if response.ok else f"HTTP {response.status_code}"
+        status = response.status_code
+    except requests.RequestException as e:
+        content = b""
+        error = repr(e)
+        status = None
+    return {
+        "name": entry["name"],
+        "status": status,
+        "latency": time.perf_counter() - start_time,
+        "content": content,
+        "error": error
+    }
+
+
+def run_requests(url: str, plan: list, concurrency: int, timeout: float) -> tuple:
+    """
+    Send the planned requests with a pool of threads.
+    Outputs:
+    - results: List of result dictionaries
+    - elapsed: Wall-clock time in seconds
+    """
+    session = build_session(concurrency)
+    results = []
+    lock = threading.Lock()
+
+    def _send(entry):
+        result = send_request(session, url, entry, timeout)
+        with lock:
+            results.append(result)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_send, plan))
+    elapsed = time.perf_counter() - start_time
+    session.close()
+    return results, elapsed
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    """
+    Latency percentiles, throughput and error rate per request name and overall.
+    Inputs:
+    - results: List of result dictionaries
+    - elapsed: Wall-clock time of the run in seconds
+    Outputs:
+    - summary: Dictionary of name (and "overall") to statistics
+    """
+    groups = {"overall": results}
+    for result in results:
+        groups.setdefault(result["name"], []).append(result)
+
+    summary = {}
+    for name, group in groups.items():
+        latencies_ms = np.array([result["latency"] for result in group]) * 1000
+        n_errors = sum(result["error"] is not None for result in group)
+        p50, p90, p95, p99 = np.percentile(latencies_ms, [50, 90, 95, 99])
+        summary[name] = {
+            "requests": len(group),
+            "errors": n_errors,
+            "error_rate": n_errors / len(group),
+            "throughput_rps": len(group) / elapsed if elapsed > 0 else None,
+            "latency_ms_mean": float(latencies_ms.mean()),
+            "latency_ms_p50": float(p50),
+            "latency_ms_p90": float(p90),
+            "latency_ms_p95": float(p95),
+            "latency_ms_p99": float(p99),
+            "latency_ms_max": float(latencies_ms.max())
+        }
+    return summary
+
+
+def write_api_returns(results: list, output_path: str) -> None:
+    """
+    Write the first successful response of every request name (or the first
+    response if all failed) to the combined responses file.
+    """
+    responses = {}
+    for result in results:
+        if result["name"] not in responses or (
+            responses[result["name"]]["error"] is not None and result["error"] is None
+        ):
+            responses[result["name"]] = result
+    with open(output_path, 'w') as f:
+        for key, value in responses.items():
+            f.write(f"{key}:\n{value['content'].decode('utf-8', errors='replace')}\n\n")
+
+
+def go(args):
+
+    # Define paths
+    # --------------------------------------
+    project_root = get_project_root(logger)
+    logger.info(f"Project root directory: {project_root}")
+
+    config_filepath = os.path.join(project_root, args.config_file)
+    config = load_config(config_filepath, logger)
+    logger.debug("Configuration loaded: %s", config)
+
+    request_mix_file = args.request_mix or os.path.join(project_root, '06_reporting', 'request_mix.jsonl')
+    request_mix = load_request_mix(request_mix_file)
+    logger.info(f"Request mix loaded from {request_mix_file}: {[entry['name'] for entry in request_mix]}")
+
+
+    # Call the API endpoints
+    # --------------------------------------
+    plan = plan_requests(request_mix, args.n_requests, args.seed)
+    logger.info(f"Sending {len(plan)} requests to {args.url} with concurrency {args.concurrency}")
+    results, elapsed = run_requests(args.url, plan, args.concurrency, args.timeout)
+    summary = summarize(results, elapsed)
+
+    for name, stats in summary.items():
+        logger.info(
+            f"{name}: {stats['requests']} requests, {stats['throughput_rps']:.1f} req/s,"
+            f" error rate {stats['error_rate']:.1%},"
+            f" latency p50 {stats['latency_ms_p50']:.1f} ms, p95 {stats['latency_ms_p95']:.1f} ms,"
+            f" p99 {stats['latency_ms_p99']:.1f} ms"
+        )
+
+
+    # Write the responses and the report
+    # --------------------------------------
+    output_path = os.path.join(
+                    project_root,
+                    '02_training',
+                    config["output_model_path"],
+                    args.output_filename
+    )
+    write_api_returns(results, output_path)
+    logger.info(f"Responses written to {output_path}")
+
+    if args.report_file:
+        with open(args.report_file, 'w') as f:
+            json.dump({
+                "url": args.url,
+                "concurrency": args.concurrency,
+                "elapsed_seconds": elapsed,
+                "summary": summary
+            }, f, indent=2)
+        logger.info(f"Load report written to {args.report_file}")
+
+    if summary["overall"]["error_rate"] > args.max_error_rate:
+        logger.error(
+            f"*** Error rate {summary['overall']['error_rate']:.1%}"
+            f" exceeds the maximum of {args.max_error_rate:.1%}."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Smoke and load client of the API.")
+
+    parser.add_argument(
+        "--url",
+        type=str,
+        help="Base URL of the API.",
+        default="http://127.0.0.1:8000"
+    )
+
+    parser.add_argument(
+        "--config_file",
+        type=str,
+        help="Name of the json configuration file containing file settings.",
+        default="config.json"
+    )
+
+    parser.add_argument(
+        "--request_mix",
+        type=str,
+        help="Path of the request mix (JSON lines). Default: 06_reporting/request_mix.jsonl.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--n_requests",
+        type=int,
+        help="Number of requests drawn from the mix by weight (0: every entry once).",
+        default=0
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Number of concurrent request threads.",
+        default=1
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Request timeout in seconds.",
+        default=60.0
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed of the request draw.",
+        default=0
+    )
+
+    parser.add_argument(
+        "--output_filename",
+        type=str,
+        help="Name of the combined responses file in the model output folder.",
+        default="apireturns.txt"
+    )
+
+    parser.add_argument(
+        "--report_file",
+        type=str,
+        help="Path of the JSON load report (optional).",
+        default=None
+    )
+
+    parser.add_argument(
+        "--max_error_rate",
+        type=float,
+        help="Exit with an error if the overall error rate is higher.",
+        default=0.0
+    )
+
+    args = parser.parse_args()
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
-
-#Specify a URL that resolves to your workspace
-URL = "http://127.0.0.1:8000"
-
-#Call each API endpoint and store the responses
-logger.info("Calling API endpoints")
-response1 = requests.post(URL+'/prediction', json={'filepath': '/testdata/testdata.csv'}).content
-logger.info({"response1": response1})
-logger.info("response1 completed")
-response2 = requests.get(URL + '/scoring').content
-logger.info("response2 completed")
-response3 = requests.get(URL +'/summarystats').content
-logger.info("response3 completed")
-response4 = requests.get(URL + "/diagnostics").content
-logger.info("response4 completed")
-
-
-#combine all API responses
-responses = {
-    "prediction": response1,
-    "scoring": response2,
-    "summarystats": response3,
-    "diagnostics": response4
-}
-
-#write the responses to your workspace
-project_root = get_project_root(logger)
-logger.info(f"Project root directory: {project_root}")
-
-config_filepath = os.path.join(project_root, 'config.json')
-config = load_config(config_filepath, logger)
-logger.info(f"Configuration loaded: {config}")
-
-output_path = os.path.join(
-                project_root,
-                '02_training',
-                config["output_model_path"],                
-                'apireturns.txt'
-)        
-with open(output_path, 'w') as f:
-    for key, value in responses.items():
-        f.write(f"{key}:\n{value.decode('utf-8')}\n\n")
-logger.info(f"Responses written to {output_path}")
\ No newline at end of file
+    go(args)
@@ -1,4 +1,4 @@
-from flask import Flask, session, jsonify, request
+from flask import Flask, session, jsonify, request, g, Response
 import pandas as pd
 import numpy as np
 #import pickle
@@ -7,31 +7,103 @@ import numpy as np
 #import predict_exited_from_saved_model
 #import json
 import os
+import random
+import threading
+import time
+from datetime import datetime
 
 #import requests
 import logging
 
 from utils.common_utilities\
     import get_project_root,\
-           load_config,\
-           load_dataset
-
+           load_config
+
+from data_processing.schema import read_dataset_csv
+from data_processing.dataset_store import DatasetStore
+from serving.metrics\
+    import REGISTRY,\
+           REQUESTS,\
+           REQUEST_LATENCY,\
+           ROWS_SCORED
+from serving.encoding\
+    import negotiate_mimetype,\
+           build_response,\
+           build_stream_response,\
+           available_mimetypes,\
+           encode_json,\
+           STREAM_MIMETYPES
+from serving.model_cache import ModelCache
+from serving.batch_jobs import BatchScorer
+from serving.prediction_cache import PredictionCache
+from serving.shadow import ShadowScorer
+from serving.explanations import explain_predictions
+from data_processing.streaming import iter_csv_chunks
+from serving.profiling\
+    import PROFILE_HEADER,\
+           profiling_requested,\
+           start_profile,\
+           finish_profile,\
+           span
+from utils.score_history\
+    import ScoreHistory,\
+           score_history_path
+from diagnostics.segments import segmented_evaluation
 from diagnostics.diagnostics\
     import model_predictions,\
+           iter_model_predictions,\
            dataframe_summary,\
            execution_time,\
            check_outdated_packages,\
            missing_values_percent,\
-           compute_model_metrics
+           compute_model_metrics,\
+           threshold_sweep
+from utils.logging_utils\
+    import setup_logging,\
+           log_event
 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
+logger = setup_logging()
 
 ######################Set up variables for use in our script
 app = Flask(__name__)
 app.secret_key = '1652d576-484a-49fd-913a-6879acfa6ba4'
 
+# Request profiling: switched on for all requests with API_PROFILING=1 or per
+# request with the X-Profile header. A sample of the profiled requests
+# (API_PROFILE_SAMPLE_RATE) is run under cProfile and dumped to PROFILE_DIR.
+app.config["PROFILING"] = os.environ.get("API_PROFILING", "0").lower() in ("1", "true", "yes")
+app.config["PROFILE_SAMPLE_RATE"] = float(os.environ.get("API_PROFILE_SAMPLE_RATE", "0"))
+app.config["PROFILE_DIR"] = os.environ.get("API_PROFILE_DIR")
+
+# Rows per chunk of the streaming prediction endpoint
+app.config["STREAM_CHUNKSIZE"] = int(os.environ.get("API_STREAM_CHUNKSIZE", "10000"))
+
+# Prediction cache: switched off with API_PREDICTION_CACHE=0; size limits of
+# the file level (files, bytes) and of the row level (rows, 0: row level off;
+# for the linear model hashing a row costs more than scoring it)
+app.config["PREDICTION_CACHE"] = os.environ.get("API_PREDICTION_CACHE", "1").lower() in ("1", "true", "yes")
+app.config["PREDICTION_CACHE_FILES"] = int(os.environ.get("API_PREDICTION_CACHE_FILES", "32"))
+app.config["PREDICTION_CACHE_BYTES"] = int(os.environ.get("API_PREDICTION_CACHE_BYTES", str(256 * 1024 ** 2)))
+app.config["PREDICTION_CACHE_ROWS"] = int(os.environ.get("API_PREDICTION_CACHE_ROWS", "0"))
+
+# Batch-scoring jobs: number of worker processes and job database
+app.config["BATCH_WORKERS"] = int(os.environ.get("API_BATCH_WORKERS", "2"))
+app.config["BATCH_DB"] = os.environ.get("API_BATCH_DB")
+
+# Model cache of the routed models: maximum number and total file size of
+# the models kept in memory
+app.config["MODEL_CACHE_SIZE"] = int(os.environ.get("API_MODEL_CACHE_SIZE", "4"))
+app.config["MODEL_CACHE_BYTES"] = int(os.environ.get("API_MODEL_CACHE_BYTES", str(512 * 1024 ** 2)))
+
+# Shadow scoring: switched on with API_SHADOW=1; the candidate model (default:
+# the trained model in the model output folder) is scored on a background
+# pool of API_SHADOW_WORKERS threads with at most API_SHADOW_MAX_PENDING queued tasks
+app.config["SHADOW"] = os.environ.get("API_SHADOW", "0").lower() in ("1", "true", "yes")
+app.config["SHADOW_MODEL"] = os.environ.get("API_SHADOW_MODEL")
+app.config["SHADOW_WORKERS"] = int(os.environ.get("API_SHADOW_WORKERS", "1"))
+app.config["SHADOW_MAX_PENDING"] = int(os.environ.get("API_SHADOW_MAX_PENDING", "8"))
+
 
 # Define variables
 # --------------------------------------
@@ -51,7 +123,7 @@ logger.info(f"Project root directory: {project_root}")
 # Load configuration
 config_filepath = os.path.join(project_root, config_file)
 config = load_config(config_filepath, logger)
-logger.info(f"Configuration loaded: {config}")
+logger.debug("Configuration loaded: %s", config)
 
 # Set the dataset path
 dataset_csv_path = os.path.join(
@@ -70,8 +142,6 @@ if not os.path.exists(ingested_data_file_path):
     logger.error(f"Ingested data file {ingested_data_file_path} does not exist. Exiting.")
     raise FileNotFoundError(f"Ingested data file {ingested_data_file_path} does not exist.")
     exit(1)
-df_ingested = load_dataset(ingested_data_file_path, logger)
-logger.info(f"Ingested data loaded from {ingested_data_file_path} with shape {df_ingested.shape}")
 
 # Set filepath of test data and load data
 logger.info("Loading test data")
@@ -84,8 +154,17 @@ if not os.path.exists(test_data_file_path):
     logger.error(f"Test data file {test_data_file_path} does not exist. Exiting.")
     raise FileNotFoundError(f"Test data file {test_data_file_path} does not exist.")
     exit(1)
-df_test = load_dataset(test_data_file_path, logger)
-logger.info(f"Test data loaded from {test_data_file_path} with shape {df_test.shape}")
+
+# Ingested and test data are served from the dataset store: memory-mapped
+# columns shared by all workers, republished when the source files change
+dataset_store = DatasetStore(
+    os.environ.get("API_DATASET_STORE") or os.path.join(dataset_csv_path, 'dataset_store')
+)
+dataset_store.register("ingested", ingested_data_file_path)
+dataset_store.register("test", test_data_file_path)
+for dataset_name in ["ingested", "test"]:
+    dataset_version, df_dataset = dataset_store.get(dataset_name)
+    logger.info(f"Dataset {dataset_name} version {dataset_version} with shape {df_dataset.shape}")
 
 
 # Set the model path
@@ -96,15 +175,196 @@ prod_deployment_path = os.path.join(
         config['prod_deployment_path']        
 )
 model_filepath = os.path.join(prod_deployment_path, model_file)
+if app.config["PROFILE_DIR"] is None:
+    app.config["PROFILE_DIR"] = os.path.join(project_root, '06_reporting', 'profiles')
 logger.info(f"Model file path: {model_filepath}")
 if not os.path.exists(model_filepath):
     logger.error(f"Model file {model_filepath} does not exist. Exiting.")
     raise FileNotFoundError(f"Model file {model_filepath} does not exist.")
     exit(1)
 
+# Models that can be requested by name: the deployed model (production) and
+# the models of every model folder of the training step, loaded lazily into
+# a bounded LRU cache
+training_path = os.path.join(project_root, '02_training')
+model_sources = {"production": prod_deployment_path}
+for folder in sorted(os.listdir(training_path)):
+    if os.path.isdir(os.path.join(training_path, folder)) and not folder.startswith(("_", ".")):
+        model_sources[folder] = os.path.join(training_path, folder)
+model_cache = ModelCache(
+    model_sources,
+    default_file=model_file,
+    max_models=app.config["MODEL_CACHE_SIZE"],
+    max_bytes=app.config["MODEL_CACHE_BYTES"]
+)
+DEFAULT_MODEL = model_cache.resolve("production")[0]
+
+# Prediction cache of the deployed model, cleared when the model is redeployed
+prediction_cache = PredictionCache(
+    model_filepath,
+    max_files=app.config["PREDICTION_CACHE_FILES"],
+    max_file_bytes=app.config["PREDICTION_CACHE_BYTES"],
+    max_rows=app.config["PREDICTION_CACHE_ROWS"]
+) if app.config["PREDICTION_CACHE"] else None
+
+
+def cached_model_predictions(data_file_path: str, df: pd.DataFrame = None) -> tuple:
+    """
+    Predictions, true labels and scores of a file with the deployed model.
+    A file scored before with the same model version is served from the
+    file-level cache; otherwise only the rows missing from the row-level
+    cache are scored, with the deployed model held in the model cache.
+    Inputs:
+    - data_file_path: Path of the file (cache key)
+    - df: Data of the file if already loaded (read from the file otherwise)
+    Outputs:
+    - y_pred, y_true, y_score: numpy arrays
+    - cache_hit: True if the result came from the file-level cache
+    """
+    if prediction_cache is not None:
+        cached = prediction_cache.get_file(data_file_path)
+        if cached is not None:
+            return (*cached, True)
+
+    if df is None:
+        logger.debug("Loading dataset from: %s", data_file_path)
+        with span("csv_read"):
+            df = read_dataset_csv(data_file_path)
+        logger.info("Dataset loaded from %s with shape %s", data_file_path, df.shape)
+
+    with span("model_load"):
+        _, model_info = model_cache.get(DEFAULT_MODEL)
+    result = model_predictions(
+        df, model_filepath, return_scores=True, return_arrays=True, row_cache=prediction_cache,
+        model_info=model_info
+    )
+    if prediction_cache is not None:
+        prediction_cache.put_file(data_file_path, result)
+    return (*result, False)
+
+
+def routed_model_predictions(model_name: str, data_file_path: str, df: pd.DataFrame = None) -> tuple:
+    """
+    Predictions, true labels and scores of a file with a model chosen by name.
+    All models are taken from the model cache; the deployed model (no name
+    or "production") also goes through the prediction cache.
+    Inputs:
+    - model_name: Model name (see serving.model_cache) or None
+    - data_file_path: Path of the file
+    - df: Data of the file if already loaded (read from the file otherwise)
+    Outputs:
+    - y_pred, y_true, y_score: numpy arrays
+    - cache_hit: True if the result came from the file-level cache
+    - model_name: Canonical name of the model
+    Raises KeyError if the model does not exist.
+    """
+    if model_name is None or model_cache.resolve(model_name)[0] == DEFAULT_MODEL:
+        return (*cached_model_predictions(data_file_path, df), DEFAULT_MODEL)
+
+    model_name, model_info = model_cache.get(model_name)
+    if df is None:
+        with span("csv_read"):
+            df = read_dataset_csv(data_file_path)
+    with span("predict"):
+        ((y_pred, y_true, y_score),) = iter_model_predictions([df], model_info)
+    return y_pred, y_true, y_score, False, model_name
+
+
+# Batch scoring with a pool of worker processes, created on the first /jobs
+# request (not on import, so e.g. the reloader parent and processes that never
+# serve /jobs do not open the job database or take over jobs)
+batch_scorer = None
+batch_scorer_lock = threading.Lock()
+
+
+def get_batch_scorer() -> BatchScorer:
+    """
+    Batch scorer of this process, created and started on first use; jobs of
+    dead owners (e.g. interrupted by a restart) are resumed when it starts.
+    """
+    global batch_scorer
+    with batch_scorer_lock:
+        if batch_scorer is None:
+            batch_scorer = BatchScorer(
+                db_path=app.config["BATCH_DB"] or os.path.join(project_root, '06_reporting', 'batch_jobs.db'),
+                model_file_path=model_filepath,
+                n_workers=app.config["BATCH_WORKERS"]
+            )
+            batch_scorer.start()
+        return batch_scorer
+
+# Shadow scoring of the candidate model, off the response path
+shadow_scorer = ShadowScorer(
+    app.config["SHADOW_MODEL"] or os.path.join(project_root, '02_training', config['output_model_path'], model_file),
+    n_workers=app.config["SHADOW_WORKERS"],
+    max_pending=app.config["SHADOW_MAX_PENDING"]
+) if app.config["SHADOW"] else None
+
+# Score history of the monitoring records (the tables are created once here)
+score_history = ScoreHistory(score_history_path(project_root, config))
+
 
 
 
+#######################Request metrics
+@app.before_request
+def start_request_timer():
+    """
+    Store the start time of the request for the latency histogram.
+    """
+    g.request_start_time = time.perf_counter()
+
+
+@app.before_request
+def start_request_profile():
+    """
+    Start the per-phase profile of the request if profiling is requested.
+    """
+    if profiling_requested(request.headers.get(PROFILE_HEADER), app.config["PROFILING"]):
+        g.profile = start_profile(
+            request.path,
+            cprofile=random.random() < app.config["PROFILE_SAMPLE_RATE"]
+        )
+
+
+@app.after_request
+def finish_request_profile(response):
+    """
+    Return the timing breakdown of a profiled request in the Server-Timing header.
+    """
+    profile = g.get("profile")
+    if profile is not None:
+        dump_path = finish_profile(profile, app.config["PROFILE_DIR"])
+        response.headers["Server-Timing"] = profile.server_timing()
+        log_event(
+            logger, logging.INFO, "Request profile",
+            endpoint=request.path, timings_ms=profile.timings_ms(), cprofile_dump=dump_path
+        )
+    return response
+
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Record the request count and latency per endpoint.
+    """
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    start_time = g.get("request_start_time")
+    if start_time is not None:
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time, endpoint=endpoint)
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+#######################Metrics Endpoint
+@app.route("/metrics", methods=['GET'])
+def metrics():
+    """
+    Expose the in-process metrics in the Prometheus text exposition format.
+    """
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
 #######################Welcome Endpoint
 @app.route("/", methods=['GET','OPTIONS'])
 def welcome():
@@ -114,62 +374,357 @@ def welcome():
     return jsonify({"message": "Welcome to the ML Model API!"})
 
 
+def data_file_of(filename) -> str:
+    """
+    Path of a requested file (relative to the data folder), resolved with
+    realpath so that ../ segments and links cannot leave the data folder.
+    Returns None if the file is outside the data folder.
+    """
+    data_folder = os.path.realpath(dataset_csv_path)
+    data_file_path = os.path.realpath(dataset_csv_path+str(filename))
+    if os.path.commonpath([data_file_path, data_folder]) != data_folder:
+        return None
+    return data_file_path
+
+
 #######################Prediction Endpoint
 @app.route("/prediction", methods=['POST','OPTIONS'])
 def predict():
     """
     Predict the target variable using the deployed model and data from
-    a location provided by the user.
+    a location provided by the user. Another model can be requested by name
+    with the JSON field model (e.g. models/trainedmodel); the name of the
+    model used is returned in the X-Model header.
+    The response format is chosen by the Accept header: JSON (default),
+    CSV (streamed in chunks), raw little-endian arrays or Arrow IPC.
+    With the JSON field explain=true the predictions are returned as JSON with
+    the top_k (default 3) contributing features of every row (see explained_predictions).
     """
     # Construct filename from request
     #default_route = f"/{config['output_folder_path']}/{ingested_data}"
     #filename = request.args.get('filepath')
-    filename = request.get_json().get('filepath')
-    logger.info(f"Received request to predict with file: {filename}")
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    filename = payload.get('filepath')
+    logger.info("Received request to predict with file: %s", filename)
     #data_file_path = os.path.join(dataset_csv_path, filename)
-    data_file_path = dataset_csv_path+str(filename)
-    logger.info(f"Data file path: {data_file_path}")
+    data_file_path = data_file_of(filename)
+    logger.debug("Data file path: %s", data_file_path)
+    if data_file_path is None:
+        return jsonify({"error": "File must be in the data folder"}), 400
     if not os.path.exists(data_file_path):
         return jsonify({"error": "File not found"}), 404
-    
-    # Load the dataset
-    logging.info(f"Loading dataset from: {data_file_path}")
-    df = pd.read_csv(data_file_path)
-    logger.info(f"Dataset loaded from {data_file_path} with shape {df.shape}")
 
-    # Make predictions
+    if payload.get('explain'):
+        top_k = payload.get('top_k', 3)
+        try:
+            # Booleans and fractions are not silently truncated to integers
+            if isinstance(top_k, bool) or (isinstance(top_k, float) and not top_k.is_integer()):
+                raise TypeError(top_k)
+            top_k = int(top_k)
+        except (TypeError, ValueError):
+            return jsonify({"error": "top_k must be a positive integer"}), 400
+        return explained_predictions(payload.get('model'), data_file_path, top_k)
+
+    mimetype = negotiate_mimetype(request.accept_mimetypes)
+    if mimetype is None:
+        return jsonify({"error": "Not acceptable", "supported": available_mimetypes()}), 406
+    
+    # Make predictions (served from the prediction cache if possible)
     logger.info("Making predictions on the input data and extracting the true labels")
-    y_pred, y_true = model_predictions(df, model_filepath)
+    try:
+        y_pred, y_true, y_score, cache_hit, model_name = routed_model_predictions(
+            payload.get('model'), data_file_path
+        )
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+    ROWS_SCORED.inc(len(y_pred), endpoint="/prediction")
+    if shadow_scorer is not None and model_name == DEFAULT_MODEL:
+        shadow_scorer.submit(y_pred, y_score, y_true, data_file_path=data_file_path)
     
-    return jsonify({"predictions": y_pred, "true_labels": y_true})
+    # Arrays are serialized directly in the negotiated format
+    with span("serialize"):
+        response = build_response({"predictions": y_pred, "true_labels": y_true}, mimetype)
+    response.headers["X-Cache"] = "hit" if cache_hit else "miss"
+    response.headers["X-Model"] = model_name
+    return response
+
+
+def explained_predictions(model_name: str, data_file_path: str, top_k: int):
+    """
+    Predictions of a file with the contributions of the features to every
+    prediction (coef_ * x of the linear model, to the log-odds of exited=1).
+    One-hot encoded columns are mapped back to their feature (corporation)
+    and category. Explanations are computed for the whole file at once and
+    are not cached.
+    Outputs:
+    - response: JSON with the predictions, scores and true labels and the
+      explanation arrays of serving.explanations.explain_predictions (top
+      features per row as positions in features, their values and
+      contributions, the corporation of every row, the intercept and the
+      feature importance)
+    """
+    if top_k <= 0:
+        return jsonify({"error": "top_k must be positive"}), 400
+    try:
+        model_name, model_info = model_cache.get(model_name or DEFAULT_MODEL)
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+
+    with span("csv_read"):
+        df = read_dataset_csv(data_file_path)
+    try:
+        with span("explain"):
+            explanation = explain_predictions(df, model_info, top_k)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    ROWS_SCORED.inc(len(explanation["y_pred"]), endpoint="/prediction")
+
+    with span("serialize"):
+        response = Response(encode_json({
+            "predictions": explanation["y_pred"],
+            "scores": explanation["y_score"],
+            "true_labels": explanation["y_true"],
+            **{name: explanation[name] for name in [
+                "features", "top_features", "top_values", "top_contributions",
+                "categories", "intercept", "feature_importance"
+            ]}
+        }), mimetype="application/json")
+    response.headers["X-Model"] = model_name
+    return response
+
+
+#######################Streaming Prediction Endpoint
+@app.route("/prediction/stream", methods=['POST','OPTIONS'])
+def predict_stream():
+    """
+    Predict the target variable for a large file, chunk by chunk.
+    The file is read in chunks (JSON field chunksize, default STREAM_CHUNKSIZE),
+    every chunk is encoded and scored with the requested model (JSON field
+    model, default: the deployed model) and its results are streamed back as
+    soon as they are produced, as NDJSON (default) or CSV depending on the
+    Accept header. Memory use is bounded by the chunk size.
+    """
+    payload = request.get_json()
+    filename = payload.get('filepath')
+    chunksize = int(payload.get('chunksize', app.config["STREAM_CHUNKSIZE"]))
+    logger.info("Received request to stream predictions for file: %s", filename)
+    data_file_path = data_file_of(filename)
+    if data_file_path is None:
+        return jsonify({"error": "File must be in the data folder"}), 400
+    if not os.path.exists(data_file_path):
+        return jsonify({"error": "File not found"}), 404
+    if chunksize <= 0:
+        return jsonify({"error": "chunksize must be positive"}), 400
+
+    mimetype = negotiate_mimetype(request.accept_mimetypes, STREAM_MIMETYPES)
+    if mimetype is None:
+        return jsonify({"error": "Not acceptable", "supported": STREAM_MIMETYPES}), 406
+
+    try:
+        model_name, model_info = model_cache.get(payload.get('model') or DEFAULT_MODEL)
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+
+    def column_chunks():
+        chunks = iter_csv_chunks(data_file_path, chunksize)
+        for y_pred, y_true, y_score in iter_model_predictions(chunks, model_info):
+            ROWS_SCORED.inc(len(y_pred), endpoint="/prediction/stream")
+            yield {"prediction": y_pred, "score": y_score, "true_label": y_true}
+
+    response = build_stream_response(column_chunks(), mimetype)
+    response.headers["X-Model"] = model_name
+    return response
+
+
+
+#######################Batch Scoring Endpoints
+@app.route("/jobs", methods=['POST'])
+def submit_job():
+    """
+    Submit a dataset in the data folder for asynchronous batch scoring.
+    Request body: filepath (relative to the data folder), format (csv or
+    parquet, default csv) and optional chunksize (positive integer). Returns the job id.
+    """
+    payload = request.get_json()
+    filename = payload.get('filepath')
+    data_file_path = data_file_of(filename)
+    if data_file_path is None:
+        return jsonify({"error": "File must be in the data folder"}), 400
+    if not os.path.exists(data_file_path):
+        return jsonify({"error": "File not found"}), 404
+
+    try:
+        job_id = get_batch_scorer().submit(
+            data_file_path,
+            output_format=payload.get('format', 'csv'),
+            chunksize=payload.get('chunksize')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    logger.info("Batch-scoring job %s submitted for file: %s", job_id, data_file_path)
+    return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
+
 
+@app.route("/jobs/<job_id>", methods=['GET'])
+def job_status(job_id):
+    """
+    Status, progress and throughput of a batch-scoring job.
+    """
+    job = get_batch_scorer().store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/jobs", methods=['GET'])
+def list_jobs():
+    """
+    Most recent batch-scoring jobs, optionally filtered by ?status=.
+    """
+    return jsonify(get_batch_scorer().store.list(status=request.args.get('status')))
 
 
 #######################Scoring Endpoint
 @app.route("/scoring", methods=['GET','OPTIONS'])
 def scoring():        
     """
-    Check the f1 score of the deployed model on the test dataset.
+    Check the f1 score of the deployed model (or of the model given with the
+    query parameter model) on the test dataset.
+    ROC AUC and PR AUC are computed from the predicted probabilities.
+    With the query parameter thresholds=true the full threshold sweep
+    (precision, recall and F1 per threshold) is returned as well.
+    With segments=true the top_k (default 10) worst segments per corporation
+    and activity bucket with at least min_rows (default 5) rows are returned;
+    segments=all returns the metrics of all segments as well.
     """
     
     # Make prediction with deployed model on test data
     logger.info("Scoring the deployed model on the test data")
-    y_pred, y_true = model_predictions(df_test, model_filepath)
-    
-    # Convert to numpy arrays for metric calculation
-    logger.info("Converting predictions and true labels to numpy arrays")
-    y_true_np= np.array(y_true)
-    y_pred_np= np.array(y_pred)
+    test_version, df_test = dataset_store.get("test")
+    try:
+        y_pred_np, y_true_np, y_score_np, _, model_name = routed_model_predictions(
+            request.args.get('model'), test_data_file_path, df_test
+        )
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+    ROWS_SCORED.inc(len(y_pred_np), endpoint="/scoring")
+    if shadow_scorer is not None and model_name == DEFAULT_MODEL:
+        shadow_scorer.submit(y_pred_np, y_score_np, y_true_np, df=df_test)
 
     # Compute model metrics
     # ---------------------------------------   
     logger.info("Computing model metrics")
-    _,\
-    _,\
-    fbeta,\
-    _ = compute_model_metrics(y_true_np, y_pred_np)
+    with span("metrics"):
+        _,\
+        _,\
+        fbeta,\
+        roc_auc = compute_model_metrics(y_true_np, y_pred_np, y_score_np)
+
+        # Threshold sweep from a single sort of the scores
+        n_thresholds = request.args.get('n_thresholds', default=101, type=int)
+        sweep = threshold_sweep(y_true_np, y_score_np, n_thresholds=n_thresholds or None)
+
+    result = {
+        "f1_score": fbeta,
+        "roc_auc": roc_auc,
+        "pr_auc": sweep["pr_auc"],
+        "best_threshold": sweep["best_threshold"],
+        "best_f1": sweep["best_f1"],
+        "dataset_version": test_version,
+        "model": model_name
+    }
+    if request.args.get('thresholds', default='false').lower() == 'true':
+        result["threshold_sweep"] = {
+            key: sweep[key] for key in ["thresholds", "precision", "recall", "f1"]
+        }
+    segments = request.args.get('segments', default='false').lower()
+    if segments in ('true', 'all'):
+        with span("segments"):
+            result["segments"] = segmented_evaluation(
+                df_test,
+                y_true_np,
+                y_pred_np,
+                top_k=request.args.get('top_k', default=10, type=int),
+                min_rows=request.args.get('min_rows', default=5, type=int),
+                include_all=segments == 'all'
+            )
+
+    with span("json"):
+        response = jsonify(result)
+    response.headers["X-Dataset-Version"] = test_version
+    return response
+
+
+#######################Score History Endpoint
+def _time_arg(name: str) -> float:
+    """
+    Time query parameter as Unix time; accepts Unix seconds or an ISO date.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+@app.route("/scoring/history", methods=['GET','OPTIONS'])
+def scoring_history():
+    """
+    Trend of the recorded metrics from the score history, without re-scoring.
+    Query parameters (all optional):
+    - metric, kind (score, drift, timing), model_version: Filters
+    - start, end: Time range as Unix seconds or ISO date
+    - limit: Maximum number of (most recent) records, not negative
+    - aggregate=true: Count, min, max and mean per model version, or per
+      time bucket with bucket_seconds (requires metric)
+    """
+    filters = {
+        "metric": request.args.get('metric'),
+        "kind": request.args.get('kind'),
+        "model_version": request.args.get('model_version')
+    }
+    try:
+        start = _time_arg('start')
+        end = _time_arg('end')
+    except ValueError:
+        return jsonify({"error": "start and end must be Unix seconds or ISO dates"}), 400
+
+    if request.args.get('aggregate', default='false').lower() == 'true':
+        if filters["metric"] is None:
+            return jsonify({"error": "aggregate requires a metric"}), 400
+        return jsonify(score_history.aggregate(
+            start=start, end=end, bucket_seconds=request.args.get('bucket_seconds', type=float), **filters
+        ))
+    limit = request.args.get('limit', default=1000, type=int)
+    if limit < 0:
+        return jsonify({"error": "limit must not be negative"}), 400
+    return jsonify(score_history.query(start=start, end=end, limit=limit, **filters))
+
+
+#######################Models Endpoint
+@app.route("/models", methods=['GET','OPTIONS'])
+def models():
+    """
+    Models that can be requested by name, the models currently loaded in
+    the model cache and the usage statistics per model.
+    """
+    return jsonify(dict(model_cache.stats(), available=model_cache.available(), default=DEFAULT_MODEL))
+
 
-    return jsonify({"f1_score": fbeta})#add return value (a single F1 score number)
+#######################Shadow Scoring Endpoint
+@app.route("/shadow", methods=['GET','OPTIONS'])
+def shadow():
+    """
+    Comparison of the candidate model with the deployed model on the requests
+    scored so far: agreement rate, score differences and metric deltas.
+    """
+    if shadow_scorer is None:
+        return jsonify({"error": "Shadow scoring is not enabled (API_SHADOW=1)"}), 404
+    return jsonify(shadow_scorer.stats())
 
 
 #######################Summary Statistics Endpoint
@@ -177,14 +732,18 @@ def scoring():
 def stats():        
     """
     Check means, medians, and modes for each column in the ingested data.
+    The version of the ingested data is returned in the X-Dataset-Version header.
     """   
 
     # Compute summary statistics
     logger.info("Calculating summary statistics for the ingested data")
+    ingested_version, df_ingested = dataset_store.get("ingested")
     summary_stats = dataframe_summary(df_ingested)
     
-    logger.info(f"Summary statistics calculated: {summary_stats}")
-    return jsonify(summary_stats)  
+    logger.debug("Summary statistics calculated: %s", summary_stats)
+    response = jsonify(summary_stats)
+    response.headers["X-Dataset-Version"] = ingested_version
+    return response
     
 
 #######################Diagnostics Endpoint
@@ -204,6 +763,7 @@ def diagnostics():
 
     # Check missing values percent
     logger.info("Checking missing values percent in the ingested data")
+    _, df_ingested = dataset_store.get("ingested")
     missing_values_result = missing_values_percent(df_ingested)
 
     return jsonify({
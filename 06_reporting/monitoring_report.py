@@ -0,0 +1,278 @@
+"""
+# 06_reporting/monitoring_report.py
+
+This script assembles the monitoring report (HTML) from the results the
+pipeline steps already persisted, without calling the API or scoring data:
+- model metrics, confusion counts and the worst segments from the score file
+  of the scoring step (latestscore.json)
+- the score trend from the score history (score_history.db)
+- summary statistics, missing values, timings and dependency status from
+  the diagnostics results (diagnostics.json)
+
+Every section is rendered into its own HTML fragment, cached in
+<model folder>/monitoring_report/ together with a fingerprint (SHA-256) of
+its inputs. Only the sections whose inputs changed since the last report
+are rendered again; the report is assembled from the cached fragments.
+
+Input parameters:
+    - config_file: Path to the config.json file containing the folder paths.
+    - input_score: Name of the score JSON file of the scoring step.
+    - force: Render all sections again.
+
+Output:
+    - monitoring_report.html in the model output folder
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+
+
+from utils.common_utilities\
+    import get_project_root,\
+           load_config
+from utils.artifact_store\
+    import ArtifactStore,\
+           artifact_store_path
+from utils.score_history\
+    import ScoreHistory,\
+           score_history_path
+from utils.logging_utils import setup_logging
+from renderers\
+    import confusion_matrix_svg,\
+           html_page,\
+           html_table,\
+           line_chart_svg
+
+
+logger = setup_logging()
+
+# Name of the diagnostics results file (written by diagnostics.py)
+DIAGNOSTICS_FILE = "diagnostics.json"
+
+# Number of scoring runs shown in the score trend
+TREND_RUNS = 50
+
+
+
+def load_json(filepath: str) -> dict:
+    """
+    Load a JSON file (None if it does not exist).
+    """
+    if not os.path.exists(filepath):
+        logger.warning(f"{filepath} does not exist, its report sections are left empty")
+        return None
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
+def fingerprint(payload) -> str:
+    """
+    SHA-256 fingerprint of the inputs of a section.
+    """
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+##################Section renderers
+def render_model_metrics(metrics: dict) -> str:
+    rows = [{"metric": name, "value": value} for name, value in metrics.items()]
+    return html_table(rows, ["metric", "value"])
+
+
+def render_confusion_matrix(confusion: dict) -> str:
+    return confusion_matrix_svg(confusion["counts"], confusion["labels"])
+
+
+def render_score_trend(records: list) -> str:
+    return line_chart_svg(
+        [record["value"] for record in records],
+        labels=[records[0]["recorded_at_iso"], records[-1]["recorded_at_iso"]],
+        title=f"F-beta of the last {len(records)} scoring runs"
+    ) + html_table(records[::-1][:10], ["recorded_at_iso", "model_version", "value", "source"])
+
+
+def render_worst_segments(worst_segments: dict) -> str:
+    parts = []
+    for segmentation, segments in worst_segments.items():
+        parts.append(f"<h3>{html.escape(segmentation)}</h3>")
+        parts.append(html_table(segments, ["segment", "rows", "f1_score", "precision", "recall", "tp", "fp", "fn", "tn"]))
+    return "\n".join(parts)
+
+
+def render_summary_statistics(summary_statistics: list) -> str:
+    return html_table(summary_statistics, ["column", "mean", "median", "std_dev"])
+
+
+def render_missing_values(missing_values_percent: dict) -> str:
+    rows = [{"column": column, "missing_percent": percent} for column, percent in missing_values_percent.items()]
+    return html_table(rows, ["column", "missing_percent"], float_format="{:.2f}")
+
+
+def render_timings(timings: dict) -> str:
+    rows = [{"step": step, "value": seconds} for step, seconds in timings.items()]
+    return html_table(rows, ["step", "value"], float_format="{:.2f}")
+
+
+def render_dependencies(packages: list) -> str:
+    outdated = [package for package in packages if package["current_version"] != package["latest_version"]]
+    return (
+        f"<p>{len(outdated)} of {len(packages)} packages are not at their latest version.</p>"
+        + html_table(outdated, ["name", "current_version", "latest_version"])
+    )
+
+
+# Report sections in order: name, title and renderer of the section inputs
+SECTIONS = [
+    ("model_metrics", "Model metrics", render_model_metrics),
+    ("confusion_matrix", "Confusion matrix", render_confusion_matrix),
+    ("score_trend", "Score trend", render_score_trend),
+    ("worst_segments", "Worst segments", render_worst_segments),
+    ("summary_statistics", "Summary statistics", render_summary_statistics),
+    ("missing_values", "Missing values (%)", render_missing_values),
+    ("timings", "Execution times (seconds)", render_timings),
+    ("dependencies", "Dependencies", render_dependencies)
+]
+
+
+def section_inputs(score: dict, diagnostics: dict, score_records: list) -> dict:
+    """
+    Inputs of every section from the persisted results (None if missing).
+    Inputs:
+    - score: Content of the score JSON file of the scoring step
+    - diagnostics: Content of the diagnostics results file
+    - score_records: Score history records of the fbeta metric
+    Outputs:
+    - inputs: Dictionary of section name to its inputs
+    """
+    score = score or {}
+    diagnostics = diagnostics or {}
+    return {
+        "model_metrics": score.get("metrics"),
+        "confusion_matrix": score.get("confusion_matrix"),
+        "score_trend": score_records or None,
+        "worst_segments": {
+            segmentation: result["worst"] for segmentation, result in score["segments"].items()
+        } if score.get("segments") else None,
+        "summary_statistics": diagnostics.get("summary_statistics"),
+        "missing_values": diagnostics.get("missing_values_percent"),
+        "timings": diagnostics.get("timings"),
+        "dependencies": diagnostics.get("outdated_packages")
+    }
+
+
+def render_sections(inputs: dict, cache_dir: str, force: bool = False) -> tuple:
+    """
+    Render the sections whose inputs changed since the last report.
+    Inputs:
+    - inputs: Dictionary of section name to its inputs
+    - cache_dir: Folder of the cached fragments and their fingerprints
+    - force: Render all sections
+    Outputs:
+    - fragments: HTML fragments of all sections in report order
+    - rendered: Names of the sections rendered again
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    state_filepath = os.path.join(cache_dir, 'state.json')
+    state = {}
+    if not force and os.path.exists(state_filepath):
+        state = load_json(state_filepath)
+
+    fragments = []
+    rendered = []
+    for name, title, renderer in SECTIONS:
+        payload = inputs.get(name)
+        section_fingerprint = fingerprint(payload)
+        fragment_filepath = os.path.join(cache_dir, f"{name}.html")
+        if state.get(name) == section_fingerprint and os.path.exists(fragment_filepath):
+            with open(fragment_filepath, 'r') as f:
+                fragments.append(f.read())
+            continue
+
+        body = renderer(payload) if payload is not None else "<p>No data available.</p>"
+        fragment = f"<section id=\"{name}\"><h2>{html.escape(title)}</h2>\n{body}\n</section>"
+        with open(fragment_filepath, 'w') as f:
+            f.write(fragment)
+        state[name] = section_fingerprint
+        fragments.append(fragment)
+        rendered.append(name)
+
+    with open(state_filepath, 'w') as f:
+        json.dump(state, f, indent=2)
+    return fragments, rendered
+
+
+def go(args):
+
+    logger.info("Starting monitoring report")
+
+    # Get the project root and the configuration
+    # --------------------------------------
+    project_root = get_project_root(logger)
+    logger.info(f"Project root directory: {project_root}")
+
+    config_filepath = os.path.join(project_root, args.config_file)
+    config = load_config(config_filepath, logger)
+    logger.debug("Configuration loaded: %s", config)
+
+    output_folder = os.path.join(
+        project_root,
+        '02_training',
+        config['output_model_path']
+    )
+
+    # Load the persisted results
+    # --------------------------------------
+    score = load_json(os.path.join(output_folder, args.input_score))
+    diagnostics = load_json(os.path.join(output_folder, DIAGNOSTICS_FILE))
+    score_records = ScoreHistory(score_history_path(project_root, config)).query(
+        metric="fbeta", kind="score", limit=TREND_RUNS
+    )
+    inputs = section_inputs(score, diagnostics, score_records)
+
+    # Render the changed sections and assemble the report
+    # --------------------------------------
+    cache_dir = os.path.join(output_folder, 'monitoring_report')
+    fragments, rendered = render_sections(inputs, cache_dir, force=args.force)
+    logger.info(f"Sections rendered: {rendered or 'none'} ({len(SECTIONS) - len(rendered)} unchanged)")
+
+    report_filepath = os.path.join(output_folder, 'monitoring_report.html')
+    if not rendered and os.path.exists(report_filepath):
+        logger.info(f"No inputs changed, {report_filepath} is up to date")
+        return
+
+    with open(report_filepath, 'w') as f:
+        f.write(html_page("Model monitoring report", fragments))
+    ArtifactStore(artifact_store_path(project_root)).publish(report_filepath)
+    logger.info(f"-----Monitoring report saved to {report_filepath}-----")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Assemble the monitoring report from the persisted results.")
+
+    parser.add_argument(
+        "--config_file",
+        type=str,
+        help="Path to the configuration file containing input and output folder paths.",
+        required=True
+    )
+
+    parser.add_argument(
+        "--input_score",
+        type=str,
+        help="Name of the score JSON file written by the scoring step.",
+        default="latestscore.json"
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render all sections, also those whose inputs did not change."
+    )
+
+    args = parser.parse_args()
+
+    go(args)
@@ -0,0 +1,206 @@
+"""
+# 06_reporting/renderers.py
+
+Lightweight renderers of the reports.
+- SVG and HTML are written directly as text, without any plotting library.
+- PNG is rendered with matplotlib, imported lazily on the first PNG with the
+  headless Agg backend (no seaborn, no GUI backend).
+The format of a confusion matrix follows the extension of its output file.
+"""
+
+import html
+import os
+
+
+# Colors of the confusion matrix cells (lowest to highest count, as RGB)
+CELL_COLOR_LOW = (239, 243, 255)
+CELL_COLOR_HIGH = (8, 81, 156)
+
+_pyplot = None
+
+
+def _get_pyplot():
+    """
+    matplotlib.pyplot with the Agg backend, imported on first use.
+    """
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        _pyplot = plt
+    return _pyplot
+
+
+def _cell_color(share: float) -> str:
+    rgb = [round(low + (high - low) * share) for low, high in zip(CELL_COLOR_LOW, CELL_COLOR_HIGH)]
+    return f"rgb({rgb[0]},{rgb[1]},{rgb[2]})"
+
+
+def confusion_matrix_svg(counts: list, labels: list, title: str = "Confusion Matrix", cell_size: int = 80) -> str:
+    """
+    Confusion matrix as an SVG heatmap.
+    Inputs:
+    - counts: Counts per actual (rows) and predicted (columns) label
+    - labels: Class labels
+    - title: Title above the matrix
+    - cell_size: Size of a cell in pixels
+    Outputs:
+    - svg: SVG document as a string
+    """
+    n_labels = len(labels)
+    max_count = max((max(row) for row in counts), default=0) or 1
+    left, top = 90, 50
+    width = left + n_labels * cell_size + 20
+    height = top + n_labels * cell_size + 50
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="14">',
+        f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="16">{html.escape(title)}</text>',
+        f'<text x="{left + n_labels * cell_size / 2}" y="{height - 10}" text-anchor="middle">Predicted</text>',
+        f'<text x="20" y="{top + n_labels * cell_size / 2}" text-anchor="middle"'
+        f' transform="rotate(-90 20 {top + n_labels * cell_size / 2})">Actual</text>'
+    ]
+    for i, label in enumerate(labels):
+        parts.append(
+            f'<text x="{left + (i + 0.5) * cell_size}" y="{top + n_labels * cell_size + 20}"'
+            f' text-anchor="middle">{html.escape(str(label))}</text>'
+        )
+        parts.append(
+            f'<text x="{left - 10}" y="{top + (i + 0.5) * cell_size}" text-anchor="end"'
+            f' dominant-baseline="middle">{html.escape(str(label))}</text>'
+        )
+    for i, row in enumerate(counts):
+        for j, count in enumerate(row):
+            share = count / max_count
+            x, y = left + j * cell_size, top + i * cell_size
+            parts.append(
+                f'<rect x="{x}" y="{y}" width="{cell_size}" height="{cell_size}"'
+                f' fill="{_cell_color(share)}" stroke="white"/>'
+            )
+            parts.append(
+                f'<text x="{x + cell_size / 2}" y="{y + cell_size / 2}" text-anchor="middle"'
+                f' dominant-baseline="middle" fill="{"white" if share > 0.5 else "black"}">{count}</text>'
+            )
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+
+def save_confusion_matrix_png(counts: list, labels: list, output_path: str, title: str = "Confusion Matrix") -> None:
+    """
+    Render a confusion matrix to a PNG file with matplotlib (Agg backend).
+    """
+    plt = _get_pyplot()
+    n_labels = len(labels)
+    max_count = max((max(row) for row in counts), default=0) or 1
+    fig, ax = plt.subplots(figsize=(1.2 * n_labels + 2, 1.2 * n_labels + 1.5))
+    try:
+        ax.imshow(counts, cmap="Blues", vmin=0, vmax=max_count)
+        for i, row in enumerate(counts):
+            for j, count in enumerate(row):
+                ax.text(j, i, str(count), ha="center", va="center",
+                        color="white" if count / max_count > 0.5 else "black")
+        ax.set_xticks(range(n_labels))
+        ax.set_xticklabels(labels)
+        ax.set_yticks(range(n_labels))
+        ax.set_yticklabels(labels)
+        ax.set_xlabel("Predicted")
+        ax.set_ylabel("Actual")
+        ax.set_title(title)
+        fig.tight_layout()
+        fig.savefig(output_path)
+    finally:
+        plt.close(fig)
+
+
+def save_confusion_matrix(counts: list, labels: list, output_path: str, title: str = "Confusion Matrix") -> None:
+    """
+    Render a confusion matrix to a file; the format follows the extension
+    (.svg, .html or .png).
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == ".png":
+        save_confusion_matrix_png(counts, labels, output_path, title)
+        return
+    svg = confusion_matrix_svg(counts, labels, title)
+    if extension == ".html":
+        svg = html_page(title, [svg])
+    elif extension != ".svg":
+        raise ValueError(f"Unsupported report format {extension}, expected .svg, .html or .png.")
+    with open(output_path, "w") as f:
+        f.write(svg)
+
+
+def line_chart_svg(values: list, labels: list = None, title: str = "", width: int = 480, height: int = 160) -> str:
+    """
+    Line chart of a series of values as an SVG document.
+    Inputs:
+    - values: Values in order
+    - labels: Optional labels of the first and last value (e.g. times)
+    - title: Title above the chart
+    - width, height: Size in pixels
+    Outputs:
+    - svg: SVG document as a string
+    """
+    left, right, top, bottom = 50, 10, 30, 30
+    plot_width, plot_height = width - left - right, height - top - bottom
+    low, high = (min(values), max(values)) if values else (0.0, 1.0)
+    if high == low:
+        low, high = low - 0.5, high + 0.5
+    step = plot_width / (len(values) - 1) if len(values) > 1 else 0
+    points = " ".join(
+        f"{left + i * step:.1f},{top + (high - value) / (high - low) * plot_height:.1f}"
+        for i, value in enumerate(values)
+    )
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">',
+        f'<text x="{width / 2}" y="16" text-anchor="middle" font-size="14">{html.escape(title)}</text>',
+        f'<rect x="{left}" y="{top}" width="{plot_width}" height="{plot_height}" fill="none" stroke="#ccc"/>',
+        f'<text x="{left - 5}" y="{top + 4}" text-anchor="end">{high:.3g}</text>',
+        f'<text x="{left - 5}" y="{top + plot_height}" text-anchor="end">{low:.3g}</text>',
+        f'<polyline points="{points}" fill="none" stroke="{_cell_color(1.0)}" stroke-width="2"/>'
+    ]
+    if labels:
+        parts.append(f'<text x="{left}" y="{height - 8}">{html.escape(str(labels[0]))}</text>')
+        parts.append(f'<text x="{width - right}" y="{height - 8}" text-anchor="end">{html.escape(str(labels[-1]))}</text>')
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+
+def html_table(rows: list, columns: list, float_format: str = "{:.4f}") -> str:
+    """
+    HTML table of a list of dictionaries; missing values are left empty.
+    """
+    def cell(value):
+        if value is None:
+            return ""
+        if isinstance(value, float):
+            return float_format.format(value)
+        return html.escape(str(value))
+
+    header = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell(row.get(column))}</td>" for column in columns) + "</tr>"
+        for row in rows
+    )
+    return f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def html_page(title: str, sections: list) -> str:
+    """
+    Standalone HTML page of rendered sections (HTML or inline SVG).
+    """
+    return "\n".join([
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\">",
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}"
+        "table{border-collapse:collapse;margin:1em 0}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:right}"
+        "th:first-child,td:first-child{text-align:left}"
+        ".figures{display:flex;flex-wrap:wrap;gap:1em}</style>",
+        "</head><body>",
+        f"<h1>{html.escape(title)}</h1>",
+        *sections,
+        "</body></html>"
+    ])
@@ -1,84 +1,179 @@
 """
 # 06_reporting/reporting.py
-This script generates a confusion matrix using the test data and the deployed model.
+This script generates a confusion matrix of the deployed model.
+By default it is rendered from the confusion counts the scoring step wrote
+to latestscore.json, without re-scoring the test data (the test data is
+only scored if the counts are missing or with --mode rescore).
+The matrix is written as SVG or HTML directly, or as PNG with matplotlib
+(imported lazily, Agg backend). With --compare, an HTML report compares all
+models (production and the model folders of 02_training) and all model
+versions of the score history.
 """
 
-import pickle
-#from sklearn.model_selection import train_test_split
 import pandas as pd
 import numpy as np
-from sklearn.metrics import confusion_matrix as sk_confusion_matrix
-import matplotlib.pyplot as plt
-import seaborn as sns
 import json
 import os
 import argparse
 import logging
 
 
-from data_processing.model_data_prep import process_data
+from data_processing.schema import read_dataset_csv
 from utils.common_utilities\
     import get_project_root,\
-           load_config,\
-           load_dataset
-from diagnostics.diagnostics import model_predictions
+           load_config
+from utils.artifact_store\
+    import ArtifactStore,\
+           artifact_store_path
+from utils.score_history\
+    import ScoreHistory,\
+           score_history_path
+from utils.logging_utils import setup_logging
+from renderers\
+    import save_confusion_matrix,\
+           confusion_matrix_svg,\
+           html_page,\
+           html_table
            
 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
+logger = setup_logging()
 
+# Metrics shown in the comparison report
+COMPARISON_METRICS = ["fbeta", "precision", "recall", "accuracy", "roc_auc", "pr_auc", "best_threshold", "best_f1"]
 
 
-def confusion_matrix(df:pd.DataFrame, trained_model_filepath:str, config:dict, project_root:str) -> None:
+
+def load_score_summary(score_filepath: str) -> dict:
+    """
+    Load the metrics and confusion counts written by the scoring step.
+    Inputs:
+    - score_filepath: Path to the score JSON file (latestscore.json)
+    Outputs:
+    - summary: Dictionary with metrics and confusion_matrix (None if the
+      file does not exist or has no confusion counts)
+    """
+    if not os.path.exists(score_filepath):
+        return None
+    with open(score_filepath, 'r') as f:
+        summary = json.load(f)
+    if not summary.get("confusion_matrix"):
+        return None
+    return summary
+
+
+def confusion_matrix(df:pd.DataFrame, trained_model_filepath:str) -> dict:
     """
-    Generate a confusion matrix using the test data and the deployed model.
+    Re-score the test data with a model and count the confusion matrix
+    (used if the scoring step did not write confusion counts).
     
     Inputs:
     - df: DataFrame containing the test data
     - trained_model_filepath: Path to the trained model file
-    - project_root: Project root directory (required for constructing output file paths)
-    - config: Configuration dictionary (required for locating output model path)
     
     Outputs:
-    - None, but saves a confusion matrix plot to the output folder specified by project_root and config
+    - confusion: Dictionary with labels and counts (rows: actual, columns: predicted)
     """
 
+    # The scoring code (scikit-learn) is only imported if the data is re-scored
+    from diagnostics.diagnostics\
+        import model_predictions,\
+               confusion_counts
+
     # Make predictions
     # --------------------------------------
     logger.info("Making predictions on the test data and extracting the true labels")
-    y_pred, y_true = model_predictions(df, trained_model_filepath)
+    y_pred, y_true = model_predictions(df, trained_model_filepath, return_arrays=True)
     logger.info(f"Predictions made: {y_pred[:5]}")  # Log first 5 predictions
     logger.info(f"True labels: {y_true[:5]}")  # Log first 5 true labels
 
+    return confusion_counts(y_true, y_pred)
 
-    # Confusion Matrix
-    # --------------------------------------
 
-    # Create confusion matrix using sklearn
-    cm = sk_confusion_matrix(y_true, y_pred)
-    
-    # Plot confusion matrix
-    plt.figure(figsize=(10, 7))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', xticklabels=np.unique(y_true), yticklabels=np.unique(y_true))
-    plt.xlabel('Predicted')
-    plt.ylabel('Actual')
-    plt.title('Confusion Matrix')
-    
-    # Save the plot
-    output_plot_filepath = os.path.join(
-        project_root,
-        '02_training',
-        config['output_model_path'],
-        'confusion_matrix.png'
-    )
-    logger.info(f"Saving confusion matrix plot to {output_plot_filepath}")    
-    plt.savefig(output_plot_filepath)
+def accuracy(confusion: dict) -> float:
+    """
+    Accuracy from confusion counts.
+    """
+    counts = np.asarray(confusion["counts"])
+    total = counts.sum()
+    return float(np.trace(counts) / total) if total else None
+
+
+def score_sources(project_root: str, config: dict, score_filename: str) -> dict:
+    """
+    Score files of all models: the production deployment and every model
+    folder of the training step.
+    Outputs:
+    - sources: Dictionary of source name to score file path
+    """
+    sources = {
+        "production": os.path.join(project_root, '04_deployment', config['prod_deployment_path'], score_filename)
+    }
+    training_dir = os.path.join(project_root, '02_training')
+    for folder in sorted(os.listdir(training_dir)):
+        if os.path.isdir(os.path.join(training_dir, folder)) and not folder.startswith(('_', '.')):
+            sources[folder] = os.path.join(training_dir, folder, score_filename)
+    return sources
+
+
+def comparison_report(sources: dict, history: ScoreHistory, output_filepath: str) -> None:
+    """
+    Write one HTML report comparing all models and model versions, in one
+    pass over the score files and one query of the score history.
+    Inputs:
+    - sources: Dictionary of source name to score file path
+    - history: Score history with the metrics of all scoring runs
+    - output_filepath: Path of the HTML report
+    Outputs:
+    - None, but writes the report
+    """
+    model_rows = []
+    figures = []
+    for source, score_filepath in sources.items():
+        summary = load_score_summary(score_filepath)
+        if summary is None:
+            logger.info(f"No confusion counts for {source} in {score_filepath}, skipped")
+            continue
+        metrics = summary["metrics"]
+        model_rows.append(dict(
+            metrics,
+            model=source,
+            accuracy=accuracy(summary["confusion_matrix"])
+        ))
+        figures.append(confusion_matrix_svg(
+            summary["confusion_matrix"]["counts"],
+            summary["confusion_matrix"]["labels"],
+            title=source,
+            cell_size=60
+        ))
+
+    # Latest value of every metric per model version
+    versions = {}
+    for record in history.query(kind="score"):
+        if record["model_version"] is None:
+            continue
+        row = versions.setdefault(record["model_version"], {"model_version": record["model_version"], "runs": set()})
+        row[record["metric"]] = record["value"]
+        row["runs"].add(record["run_id"])
+        row["last_scored"] = record["recorded_at_iso"]
+    version_rows = [dict(row, runs=len(row["runs"])) for row in versions.values()]
+
+    sections = [
+        "<h2>Models</h2>",
+        html_table(model_rows, ["model", "model_name", "created_at"] + COMPARISON_METRICS),
+        "<div class=\"figures\">", *figures, "</div>",
+        "<h2>Model versions</h2>",
+        html_table(version_rows, ["model_version", "runs", "last_scored"]
+                   + [metric for metric in COMPARISON_METRICS if metric != "accuracy"])
+    ]
+    with open(output_filepath, 'w') as f:
+        f.write(html_page("Model comparison", sections))
+    logger.info(f"Comparison of {len(model_rows)} models and {len(version_rows)} model versions saved to {output_filepath}")
 
 
 def go(args):
     """
-    Main function to generate the confusion matrix.
+    Main function to generate the confusion matrix and the comparison report.
     """
    # Define paths of source and destination
     # --------------------------------------    
@@ -91,29 +186,62 @@ def go(args):
     config = load_config(config_filepath, logger)
     logger.info(f"Configuration loaded: {config}")
 
-    # Load the dataset
-    dataset_csv_path = os.path.join(
-        project_root,'01_data',
-        config['test_data_path'],
-        args.input_data
-        )           
-    df = pd.read_csv(dataset_csv_path)
-    logger.info(f"Dataset loaded from {dataset_csv_path} with shape {df.shape}")
-    
-    # Get the trained model path
-    # --------------------------------------
-    trained_model_filepath = os.path.join(
+    output_folder = os.path.join(
         project_root,
         '02_training',
-        config['output_model_path'],
-        args.input_modelinfo
+        config['output_model_path']
     )
-    
-    # Generate confusion matrix
+
+    # Confusion counts of the scoring step, or re-score the test data
+    # --------------------------------------
+    summary = None
+    if args.mode == "precomputed":
+        score_filepath = os.path.join(output_folder, args.input_score)
+        summary = load_score_summary(score_filepath)
+        if summary is None:
+            logger.warning(f"No confusion counts in {score_filepath}. Re-scoring the test data.")
+        else:
+            logger.info(f"Confusion counts loaded from {score_filepath}")
+
+    if summary is not None:
+        confusion = summary["confusion_matrix"]
+    else:
+        # Load the dataset
+        dataset_csv_path = os.path.join(
+            project_root,'01_data',
+            config['test_data_path'],
+            args.input_data
+            )           
+        df = read_dataset_csv(dataset_csv_path)
+        logger.info(f"Dataset loaded from {dataset_csv_path} with shape {df.shape}")
+
+        # Get the trained model path
+        trained_model_filepath = os.path.join(output_folder, args.input_modelinfo)
+        confusion = confusion_matrix(df, trained_model_filepath)
+    logger.info(f"Confusion counts: {confusion['counts']} (labels {confusion['labels']})")
+
+    # Render the confusion matrix
     # --------------------------------------
-    confusion_matrix(df, trained_model_filepath, config, project_root)
+    output_plot_filepath = os.path.join(output_folder, f"confusion_matrix.{args.output_format}")
+    logger.info(f"Saving confusion matrix to {output_plot_filepath}")
+    save_confusion_matrix(confusion["counts"], confusion["labels"], output_plot_filepath)
+
+    # Publish the plot to the artifact store (ref latest)
+    artifact_store = ArtifactStore(artifact_store_path(project_root))
+    artifact_store.publish(output_plot_filepath)
     logger.info("-----Confusion matrix generated and saved successfully.-----") 
 
+    # Compare all models and model versions
+    # --------------------------------------
+    if args.compare:
+        comparison_filepath = os.path.join(output_folder, 'model_comparison.html')
+        comparison_report(
+            score_sources(project_root, config, args.input_score),
+            ScoreHistory(score_history_path(project_root, config)),
+            comparison_filepath
+        )
+        artifact_store.publish(comparison_filepath)
+
 
 
 
@@ -141,5 +269,34 @@ if __name__ == "__main__":
         required=True
     )
 
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["precomputed", "rescore"],
+        help="precomputed: render from the confusion counts of the scoring step, rescore: score the test data.",
+        default="precomputed"
+    )
+
+    parser.add_argument(
+        "--input_score",
+        type=str,
+        help="Name of the score JSON file written by the scoring step.",
+        default="latestscore.json"
+    )
+
+    parser.add_argument(
+        "--output_format",
+        type=str,
+        choices=["svg", "html", "png"],
+        help="Format of the confusion matrix.",
+        default="svg"
+    )
+
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also write a comparison report of all models and model versions."
+    )
+
     args = parser.parse_args()    
     go(args)
@@ -0,0 +1,222 @@
+"""
+# benchmarks/dedup_benchmark.py
+
+Benchmark of the duplicate removal of the ingestion:
+- previous approach: DataFrame.drop_duplicates on the full frame,
+- row digests (data_processing.dedup) with and without the exact check,
+- incremental: one ingestion run with a new batch. The digest index of the
+  history is loaded, the batch is deduped against it and the updated index
+  is saved, compared with reloading the history from CSV and running
+  drop_duplicates on history and batch together (which the previous approach
+  needs to dedupe against the history). The index load, update and save are
+  also timed on their own; they grow with the history, not with the batch.
+Time (median of the repeats) and peak allocated memory are reported.
+
+Run from the project root:
+    python benchmarks/dedup_benchmark.py --n_rows 1000000 --n_corporations 1000 --duplicate_fraction 0.1
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.memory_footprint import peak_memory
+from benchmarks.synthetic_data import write_dataset_csv
+from data_processing.dedup import CHECK_HASH_KEY, DigestIndex, deduplicate, row_digests
+from data_processing.schema import concat_datasets, read_dataset_csv
+from utils.logging_utils import setup_logging
+
+
+logger = setup_logging()
+
+
+def drop_duplicates_previous(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Previous implementation of remove_duplicates, kept here as the baseline
+    (without inplace, so the input can be reused).
+    """
+    return df.drop_duplicates().reset_index(drop=True)
+
+
+def drop_duplicates_digests(df: pd.DataFrame, index: DigestIndex = None, exact_check: bool = True) -> pd.DataFrame:
+    """
+    Duplicate removal by row digests, as in remove_duplicates of the ingestion.
+    """
+    keep, _ = deduplicate(df, index, exact_check)
+    return df[keep].reset_index(drop=True)
+
+
+def drop_duplicates_with_history(history_path: str, batch: pd.DataFrame) -> pd.DataFrame:
+    """
+    Previous approach for a new batch: reload the history and dedupe everything.
+    """
+    return drop_duplicates_previous(concat_datasets([read_dataset_csv(history_path), batch]))
+
+
+def drop_duplicates_with_index(index_path: str, batch: pd.DataFrame, updated_path: str) -> pd.DataFrame:
+    """
+    Incremental ingestion run: load the digest index, dedupe the batch against
+    it and save the updated index (to updated_path, so the repeats start from
+    the same history).
+    """
+    index = DigestIndex(index_path)
+    result = drop_duplicates_digests(batch, index)
+    index.save(updated_path)
+    return result
+
+
+def updated_index(index: DigestIndex, digests: np.ndarray, check_digests: np.ndarray, path: str) -> DigestIndex:
+    """
+    Copy of an index with the digests merged in (the index itself is unchanged).
+    """
+    updated = DigestIndex(path, load=False)
+    updated.digests, updated.check_digests = index.digests, index.check_digests
+    updated.add(digests, check_digests)
+    return updated
+
+
+def saved_index(index: DigestIndex, path: str) -> DigestIndex:
+    """
+    Save an index to path.
+    """
+    index.save(path)
+    return index
+
+
+def measure(func, repeats: int) -> dict:
+    """
+    Median time over the repeats and peak memory of one run.
+    Outputs:
+    - result: Dictionary with median_seconds, peak_bytes and rows (of the result: kept rows or index size)
+    """
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    result, peak = peak_memory(func)
+    return {"median_seconds": statistics.median(timings), "peak_bytes": peak, "rows": len(result)}
+
+
+def run_dedup_benchmark(df: pd.DataFrame, history_fraction: float, repeats: int, index_dir: str) -> dict:
+    """
+    Run all variants on one dataset.
+    Inputs:
+    - df: Dataset read with the dataset schema (with duplicates)
+    - history_fraction: Share of the rows treated as history in the incremental variant
+    - repeats: Number of timed runs per variant
+    - index_dir: Directory for the digest index
+    Outputs:
+    - results: Dictionary variant -> measurement
+    """
+    results = {
+        "drop_duplicates": measure(lambda: drop_duplicates_previous(df), repeats),
+        "digests_exact": measure(lambda: drop_duplicates_digests(df), repeats),
+        "digests": measure(lambda: drop_duplicates_digests(df, exact_check=False), repeats)
+    }
+
+    # Incremental: the history is indexed once, the new batch is deduped against it
+    n_history = int(len(df) * history_fraction)
+    history = df.iloc[:n_history].reset_index(drop=True)
+    batch = df.iloc[n_history:].reset_index(drop=True)
+    index_path = os.path.join(index_dir, "digests.npz")
+    index = DigestIndex(index_path, load=False)
+    deduplicate(history, index)
+    index.save()
+
+    history_path = os.path.join(index_dir, "history.csv")
+    history.to_csv(history_path, index=False)
+    updated_path = os.path.join(index_dir, "digests_updated.npz")
+
+    results["incremental_drop_duplicates"] = measure(
+        lambda: drop_duplicates_with_history(history_path, batch), repeats
+    )
+    results["incremental_digest_index"] = measure(
+        lambda: drop_duplicates_with_index(index_path, batch, updated_path), repeats
+    )
+
+    # Parts of the incremental run that grow with the history
+    loaded = DigestIndex(index_path)
+    new_digests = row_digests(batch)
+    new_check_digests = row_digests(batch, CHECK_HASH_KEY)
+    results["index_load"] = measure(lambda: DigestIndex(index_path), repeats)
+    results["index_lookup"] = measure(lambda: loaded.lookup(new_digests), repeats)
+    results["index_update"] = measure(
+        lambda: updated_index(loaded, new_digests, new_check_digests, updated_path), repeats
+    )
+    results["index_save"] = measure(lambda: saved_index(loaded, updated_path), repeats)
+    return results
+
+
+def go(args):
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "synthetic.csv")
+        logger.info(f"Writing {args.n_rows} synthetic rows with {args.n_corporations} corporations")
+        write_dataset_csv(file_path, args.n_rows, args.n_corporations)
+        df = read_dataset_csv(file_path)
+
+        # Add duplicates of random rows, shuffled into the data
+        rng = np.random.default_rng(0)
+        n_duplicates = int(len(df) * args.duplicate_fraction)
+        df = pd.concat([df, df.iloc[rng.integers(0, len(df), n_duplicates)]], ignore_index=True)
+        df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+        logger.info(f"Dataset with {len(df)} rows, {n_duplicates} added duplicates")
+
+        results = run_dedup_benchmark(df, args.history_fraction, args.repeats, tmp_dir)
+
+    for variant, result in results.items():
+        logger.info(
+            f"{variant:>28} | median {result['median_seconds']:.4f} s"
+            f" | peak {result['peak_bytes'] / 1e6:.1f} MB | {result['rows']} rows out"
+        )
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark of the duplicate removal.")
+
+    parser.add_argument(
+        "--n_rows",
+        type=int,
+        help="Number of synthetic rows before adding duplicates.",
+        default=1000000
+    )
+
+    parser.add_argument(
+        "--n_corporations",
+        type=int,
+        help="Number of distinct corporation values.",
+        default=1000
+    )
+
+    parser.add_argument(
+        "--duplicate_fraction",
+        type=float,
+        help="Number of added duplicate rows as a fraction of n_rows.",
+        default=0.1
+    )
+
+    parser.add_argument(
+        "--history_fraction",
+        type=float,
+        help="Share of the rows treated as already ingested in the incremental variant.",
+        default=0.9
+    )
+
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        help="Number of timed runs per variant.",
+        default=3
+    )
+
+    args = parser.parse_args()
+
+    go(args)
@@ -0,0 +1,134 @@
+"""
+# benchmarks/memory_footprint.py
+
+Memory benchmark of the data loading and processing:
+- per-row footprint of a dataset read with plain pd.read_csv (before) and
+  with the dataset schema (after),
+- peak memory of the previous process_data implementation (drop/values and
+  concatenate) and of the current one.
+
+Run from the project root:
+    python benchmarks/memory_footprint.py --n_rows 1000000 --n_corporations 1000
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
+
+from data_processing.model_data_prep import process_data
+from data_processing.schema import read_dataset_csv
+from benchmarks.synthetic_data import write_dataset_csv
+from utils.logging_utils import setup_logging
+
+
+logger = setup_logging()
+
+
+def process_data_previous(df, label, categorical_features, encoder):
+    """
+    Previous implementation of process_data (inference mode), kept here as
+    the baseline of the benchmark.
+    """
+    y = df[label]
+    X = df.drop([label], axis=1)
+    X_categorical = X[categorical_features].values
+    X_continuous = X.drop(*[categorical_features], axis=1).values
+    X_categorical = encoder.transform(X_categorical)
+    y = y.values
+    X = np.concatenate([X_continuous, X_categorical], axis=1)
+    return X, y, encoder
+
+
+def peak_memory(func, *args, **kwargs) -> tuple:
+    """
+    Measure the peak of the memory allocated while running a function.
+    Inputs:
+    - func: Function to run
+    - args, kwargs: Arguments of the function
+    Outputs:
+    - result: Return value of the function
+    - peak: Peak allocated memory in bytes
+    """
+    tracemalloc.start()
+    result = func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def run_memory_benchmark(file_path: str) -> dict:
+    """
+    Compare the memory footprint before and after the dataset schema.
+    Inputs:
+    - file_path: Path of the CSV file
+    Outputs:
+    - results: Dictionary with the per-row footprints and peak memories in bytes
+    """
+    label = "exited"
+    categorical_features = ["corporation"]
+
+    df_plain = pd.read_csv(file_path)
+    df_schema = read_dataset_csv(file_path)
+    n_rows = len(df_plain)
+
+    encoder = OneHotEncoder(sparse=False, handle_unknown="ignore")
+    encoder.fit(df_plain[categorical_features].to_numpy())
+
+    _, peak_previous = peak_memory(
+        process_data_previous, df_plain, label, categorical_features, encoder
+    )
+    _, peak_current = peak_memory(
+        process_data, df_schema, label, categorical_features, training=False, encoder=encoder
+    )
+
+    return {
+        "n_rows": n_rows,
+        "bytes_per_row_before": df_plain.memory_usage(deep=True).sum() / n_rows,
+        "bytes_per_row_after": df_schema.memory_usage(deep=True).sum() / n_rows,
+        "process_data_peak_bytes_before": peak_previous,
+        "process_data_peak_bytes_after": peak_current
+    }
+
+
+def go(args):
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "synthetic.csv")
+        logger.info(f"Writing {args.n_rows} synthetic rows with {args.n_corporations} corporations")
+        write_dataset_csv(file_path, args.n_rows, args.n_corporations)
+        results = run_memory_benchmark(file_path)
+
+    logger.info(f"Rows: {results['n_rows']}")
+    logger.info(f"Per-row footprint: before {results['bytes_per_row_before']:.1f} bytes,\
+                after {results['bytes_per_row_after']:.1f} bytes")
+    logger.info(f"process_data peak: before {results['process_data_peak_bytes_before'] / 1e6:.1f} MB,\
+                after {results['process_data_peak_bytes_after'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Memory benchmark of data loading and processing.")
+
+    parser.add_argument(
+        "--n_rows",
+        type=int,
+        help="Number of synthetic rows.",
+        default=100000
+    )
+
+    parser.add_argument(
+        "--n_corporations",
+        type=int,
+        help="Number of distinct corporation values.",
+        default=100
+    )
+
+    args = parser.parse_args()
+
+    go(args)
@@ -0,0 +1,414 @@
+"""
+# benchmarks/run_benchmarks.py
+
+Benchmark suite covering every pipeline stage and the API:
+- ingestion (load all CSV files and remove duplicates)
+- encoding (process_data in training mode)
+- training (train_model)
+- scoring (predict_proba, and through the warm row-level prediction cache)
+- metrics (compute_model_metrics and threshold_sweep)
+- summary statistics (dataframe_summary and missing_values_percent)
+- API request handling (/prediction, /scoring, /summarystats through the Flask test client;
+  /prediction also with the prediction cache on, i.e. file-level cache hits)
+
+Each stage runs on synthetic data at every configured scale and cardinality.
+The results are written as JSON and can be compared against a stored baseline;
+stages whose median time grew by more than the tolerance are reported as regressions.
+
+Run from the project root:
+    python benchmarks/run_benchmarks.py --scales 1e3,1e4,1e5 --cardinalities 10,1000
+    python benchmarks/run_benchmarks.py --baseline_file benchmarks/baseline.json --save_baseline
+    python benchmarks/run_benchmarks.py --baseline_file benchmarks/baseline.json --fail_on_regression
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import pickle
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.synthetic_data import write_dataset_csv
+from data_processing.model_data_prep import process_data
+from data_processing.schema import read_dataset_csv
+from serving.prediction_cache import PredictionCache
+from diagnostics.diagnostics\
+    import compute_model_metrics,\
+           threshold_sweep,\
+           dataframe_summary,\
+           missing_values_percent
+from utils.logging_utils import setup_logging
+
+
+logger = setup_logging()
+
+# Project root of this checkout (the benchmarks folder is one level below)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = [
+    "ingestion",
+    "encoding",
+    "training",
+    "scoring",
+    "scoring_row_cache",
+    "metrics",
+    "summary_stats",
+    "api_prediction",
+    "api_prediction_cached",
+    "api_scoring",
+    "api_summarystats"
+]
+
+LABEL = "exited"
+CATEGORICAL_FEATURES = ["corporation"]
+
+
+def load_script(relative_path: str, module_name: str):
+    """
+    Import a pipeline script (e.g. 01_data/ingestion.py) as a module.
+    The step folders are not Python packages, so they are loaded by path.
+    Inputs:
+    - relative_path: Path of the script relative to the project root
+    - module_name: Name under which the module is registered
+    Outputs:
+    - module: Imported module
+    """
+    spec = importlib.util.spec_from_file_location(
+        module_name, os.path.join(PROJECT_ROOT, relative_path)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_call(func, repeats: int) -> list:
+    """
+    Time a function over several repeats.
+    Inputs:
+    - func: Function without arguments
+    - repeats: Number of runs
+    Outputs:
+    - timings: List of durations in seconds
+    """
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return timings
+
+
+def build_benchmark_project(base_dir: str, n_rows: int, n_corporations: int, n_files: int) -> str:
+    """
+    Create a project tree with synthetic data and a trained model, laid out
+    like the real project, so that the API can be started against it.
+    Inputs:
+    - base_dir: Directory in which the project tree is created
+    - n_rows: Total number of rows of the source data
+    - n_corporations: Number of distinct corporation values
+    - n_files: Number of source CSV files
+    Outputs:
+    - project_dir: Path of the project tree
+    """
+    project_dir = os.path.join(base_dir, "ml-scoring-monitoring")
+    for folder in [
+        "01_data/sourcedata", "01_data/ingesteddata", "01_data/testdata",
+        "02_training/models", "04_deployment/production_deployment"
+    ]:
+        os.makedirs(os.path.join(project_dir, folder), exist_ok=True)
+
+    with open(os.path.join(PROJECT_ROOT, "config.json"), "r") as f:
+        config = json.load(f)
+    with open(os.path.join(project_dir, "config.json"), "w") as f:
+        json.dump(config, f)
+
+    # Source files, ingested data and test data
+    rows_per_file = max(n_rows // n_files, 1)
+    for i in range(n_files):
+        write_dataset_csv(
+            os.path.join(project_dir, "01_data/sourcedata", f"dataset{i}.csv"),
+            rows_per_file, n_corporations, seed=i
+        )
+    write_dataset_csv(
+        os.path.join(project_dir, "01_data/ingesteddata/finaldata.csv"),
+        n_rows, n_corporations, seed=0
+    )
+    write_dataset_csv(
+        os.path.join(project_dir, "01_data/testdata/testdata.csv"),
+        n_rows, n_corporations, seed=n_files + 1
+    )
+
+    return project_dir
+
+
+def run_scale(n_rows: int, n_corporations: int, stages: list, repeats: int, n_files: int) -> dict:
+    """
+    Run the benchmark stages at one scale.
+    Inputs:
+    - n_rows: Number of rows
+    - n_corporations: Number of distinct corporation values
+    - stages: Stages to run
+    - repeats: Number of runs per stage
+    - n_files: Number of source files for the ingestion stage
+    Outputs:
+    - results: Dictionary stage -> timing summary
+    """
+    ingestion = load_script("01_data/ingestion.py", "benchmark_ingestion")
+    training = load_script("02_training/training.py", "benchmark_training")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logger.info(f"Generating data: {n_rows} rows, {n_corporations} corporations")
+        project_dir = build_benchmark_project(tmp_dir, n_rows, n_corporations, n_files)
+        df = read_dataset_csv(os.path.join(project_dir, "01_data/ingesteddata/finaldata.csv"))
+        X, y, encoder = process_data(df, LABEL, CATEGORICAL_FEATURES, training=True)
+        model = training.train_model(X, y)
+        y_score = model.predict_proba(X)[:, 1]
+        y_pred = (y_score > 0.5).astype(int)
+
+        # Deploy the model for the API stages
+        model_file_path = os.path.join(project_dir, "04_deployment/production_deployment/trainedmodel.pkl")
+        with open(model_file_path, "wb") as f:
+            pickle.dump({
+                "name": "benchmark_model",
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "model": model,
+                "encoder": encoder,
+                "label_column": LABEL,
+                "features": [c for c in df.columns if c != LABEL],
+                "categorical_features": CATEGORICAL_FEATURES
+            }, f)
+
+        stage_functions = {
+            "ingestion": lambda: ingestion.remove_duplicates(
+                ingestion.load_csv(os.path.join(project_dir, "01_data/sourcedata"))[0]
+            ),
+            "encoding": lambda: process_data(df, LABEL, CATEGORICAL_FEATURES, training=True),
+            "training": lambda: training.train_model(X, y),
+            "scoring": lambda: model.predict_proba(X),
+            "scoring_row_cache": lambda: row_cache.score_rows(X, lambda X: model.predict_proba(X)[:, 1]),
+            "metrics": lambda: (compute_model_metrics(y, y_pred, y_score), threshold_sweep(y, y_score, 101)),
+            "summary_stats": lambda: (dataframe_summary(df), missing_values_percent(df))
+        }
+
+        # Row-level cache holding every row, warmed up once: all later lookups are hits
+        if "scoring_row_cache" in stages:
+            row_cache = PredictionCache(model_file_path, max_rows=n_rows)
+            row_cache.score_rows(X, lambda X: model.predict_proba(X)[:, 1])
+
+        api_stages = [stage for stage in stages if stage.startswith("api_")]
+        if api_stages:
+            # The API resolves the project root from the working directory.
+            # The prediction cache is switched off so repeated calls measure
+            # the scoring path instead of cache hits; api_prediction_cached
+            # runs against a second app with the cache on.
+            cwd = os.getcwd()
+            os.chdir(project_dir)
+            try:
+                clients = {}
+                for cache in ["0", "1"]:
+                    os.environ["API_PREDICTION_CACHE"] = cache
+                    app_module = load_script(
+                        "06_reporting/app.py", f"benchmark_app_{n_rows}_{n_corporations}_{cache}"
+                    )
+                    clients[cache] = app_module.app.test_client()
+                stage_functions.update({
+                    "api_prediction": lambda: clients["0"].post(
+                        "/prediction", json={"filepath": "/testdata/testdata.csv"}
+                    ).get_data(),
+                    "api_prediction_cached": lambda: clients["1"].post(
+                        "/prediction", json={"filepath": "/testdata/testdata.csv"}
+                    ).get_data(),
+                    "api_scoring": lambda: clients["0"].get("/scoring").get_data(),
+                    "api_summarystats": lambda: clients["0"].get("/summarystats").get_data()
+                })
+                for stage in api_stages:
+                    results[stage] = time_call(stage_functions[stage], repeats)
+            finally:
+                os.chdir(cwd)
+                os.environ.pop("API_PREDICTION_CACHE", None)
+
+        for stage in stages:
+            if stage not in api_stages:
+                results[stage] = time_call(stage_functions[stage], repeats)
+
+    summary = {}
+    for stage in stages:
+        timings = results[stage]
+        median = statistics.median(timings)
+        summary[stage] = {
+            "n_rows": n_rows,
+            "n_corporations": n_corporations,
+            "repeats": repeats,
+            "min_seconds": min(timings),
+            "median_seconds": median,
+            "rows_per_second": n_rows / median if median > 0 else None
+        }
+        logger.info(f"{stage:>21} | {n_rows:>10} rows | {n_corporations:>6} corporations | median {median:.4f} s")
+    return summary
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare benchmark results against a stored baseline.
+    Inputs:
+    - results: Results dictionary (key -> timing summary)
+    - baseline: Baseline results dictionary in the same format
+    - tolerance: Accepted relative slowdown of the median time (e.g. 0.2 = 20%)
+    Outputs:
+    - regressions: List of dictionaries for the keys slower than the tolerance
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        baseline_median = baseline[key]["median_seconds"]
+        ratio = result["median_seconds"] / baseline_median if baseline_median > 0 else float("inf")
+        logger.info(f"{key:>40}: {ratio:.2f}x baseline")
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "key": key,
+                "baseline_median_seconds": baseline_median,
+                "median_seconds": result["median_seconds"],
+                "ratio": ratio
+            })
+    return regressions
+
+
+def go(args):
+
+    logger.info("Starting benchmarks")
+    stages = args.stages.split(",") if args.stages != "all" else STAGES
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        logger.error(f"*** Unknown stages: {unknown}. Available stages: {STAGES}")
+        return 1
+
+    results = {}
+    for scale in args.scales.split(","):
+        for cardinality in args.cardinalities.split(","):
+            n_rows = int(float(scale))
+            n_corporations = int(cardinality)
+            summary = run_scale(n_rows, n_corporations, stages, args.repeats, args.n_files)
+            for stage, stage_result in summary.items():
+                results[f"{stage}@{n_rows}x{n_corporations}"] = stage_result
+
+    output = {
+        "meta": {
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__
+        },
+        "results": results
+    }
+
+    # Regression comparison against the stored baseline
+    regressions = []
+    if args.baseline_file and os.path.exists(args.baseline_file) and not args.save_baseline:
+        with open(args.baseline_file, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        output["baseline_file"] = args.baseline_file
+        output["regressions"] = regressions
+        if regressions:
+            logger.warning(f"*** {len(regressions)} regression(s) against the baseline: "
+                           f"{[r['key'] for r in regressions]}")
+        else:
+            logger.info("No regressions against the baseline.")
+
+    with open(args.output_file, "w") as f:
+        json.dump(output, f, indent=2)
+    logger.info(f"Benchmark results written to {args.output_file}")
+
+    if args.save_baseline and args.baseline_file:
+        with open(args.baseline_file, "w") as f:
+            json.dump(output, f, indent=2)
+        logger.info(f"Baseline saved to {args.baseline_file}")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages and the API.")
+
+    parser.add_argument(
+        "--scales",
+        type=str,
+        help="Comma-separated numbers of rows, e.g. 1e3,1e5,1e6.",
+        default="1e3,1e4,1e5"
+    )
+
+    parser.add_argument(
+        "--cardinalities",
+        type=str,
+        help="Comma-separated numbers of distinct corporation values.",
+        default="10,1000"
+    )
+
+    parser.add_argument(
+        "--stages",
+        type=str,
+        help=f"Comma-separated stages to run, or all. Available: {','.join(STAGES)}.",
+        default="all"
+    )
+
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        help="Number of runs per stage.",
+        default=3
+    )
+
+    parser.add_argument(
+        "--n_files",
+        type=int,
+        help="Number of source files for the ingestion stage.",
+        default=2
+    )
+
+    parser.add_argument(
+        "--output_file",
+        type=str,
+        help="Path of the JSON results file.",
+        default="benchmark_results.json"
+    )
+
+    parser.add_argument(
+        "--baseline_file",
+        type=str,
+        help="Path of the JSON baseline file to compare against (or to save with --save_baseline).",
+        default=None
+    )
+
+    parser.add_argument(
+        "--save_baseline",
+        action="store_true",
+        help="Store the results as the new baseline."
+    )
+
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        help="Accepted relative slowdown against the baseline.",
+        default=0.2
+    )
+
+    parser.add_argument(
+        "--fail_on_regression",
+        action="store_true",
+        help="Exit with a non-zero status if a regression is found."
+    )
+
+    args = parser.parse_args()
+
+    sys.exit(go(args))
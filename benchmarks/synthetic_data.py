@@ -0,0 +1,150 @@
+"""
+# benchmarks/synthetic_data.py
+
+Synthetic data generator matching the schema of the project data:
+    corporation,lastmonth_activity,lastyear_activity,number_of_employees,exited
+
+The number of rows and the cardinality of corporation are configurable.
+Large datasets (up to 1e8 rows) are written to CSV in chunks, so the
+generator never holds more than one chunk in memory.
+The label depends on the features through a logistic model, so trained
+models and metrics behave like on real data.
+
+Run from the project root:
+    python benchmarks/synthetic_data.py --output_file /tmp/synthetic.csv --n_rows 1000000 --n_corporations 1000
+"""
+
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
+logger = logging.getLogger()
+
+
+def corporation_names(n_corporations: int) -> np.ndarray:
+    """
+    Build the corporation vocabulary.
+    Inputs:
+    - n_corporations: Number of distinct corporation values
+    Outputs:
+    - names: numpy array of corporation names
+    """
+    return np.array([f"c{i:07d}" for i in range(n_corporations)], dtype=object)
+
+
+def generate_dataset(n_rows: int, n_corporations: int = 100, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic dataset in memory.
+    Inputs:
+    - n_rows: Number of rows
+    - n_corporations: Number of distinct corporation values
+    - seed: Random seed
+    Outputs:
+    - df: DataFrame with the project schema
+    """
+    rng = np.random.default_rng(seed)
+    names = corporation_names(n_corporations)
+    # Per-corporation effect on the churn probability
+    corporation_effect = np.random.default_rng(12345).normal(0, 1, n_corporations)
+
+    corporation_idx = rng.integers(0, n_corporations, n_rows)
+    lastmonth_activity = rng.gamma(1.5, 80, n_rows).astype(np.int64)
+    lastyear_activity = (lastmonth_activity * 10 + rng.gamma(2.0, 300, n_rows)).astype(np.int64)
+    number_of_employees = rng.lognormal(3, 1.2, n_rows).astype(np.int64) + 1
+
+    logit = (
+        0.5
+        - 0.004 * lastmonth_activity
+        - 0.0002 * lastyear_activity
+        + 0.002 * number_of_employees
+        + corporation_effect[corporation_idx]
+    )
+    exited = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(np.int64)
+
+    return pd.DataFrame({
+        "corporation": names[corporation_idx],
+        "lastmonth_activity": lastmonth_activity,
+        "lastyear_activity": lastyear_activity,
+        "number_of_employees": number_of_employees,
+        "exited": exited
+    })
+
+
+def write_dataset_csv(
+    output_file: str, n_rows: int, n_corporations: int = 100, seed: int = 0, chunksize: int = 1000000
+) -> None:
+    """
+    Write a synthetic dataset to a CSV file in chunks.
+    Inputs:
+    - output_file: Path of the CSV file
+    - n_rows: Number of rows
+    - n_corporations: Number of distinct corporation values
+    - seed: Random seed (each chunk uses its own derived seed)
+    - chunksize: Number of rows generated and written at a time
+    Outputs:
+    - None, but writes the CSV file
+    """
+    written = 0
+    chunk_id = 0
+    while written < n_rows:
+        n_chunk = min(chunksize, n_rows - written)
+        df = generate_dataset(n_chunk, n_corporations, seed=seed * 100003 + chunk_id)
+        df.to_csv(output_file, mode="w" if chunk_id == 0 else "a", header=chunk_id == 0, index=False)
+        written += n_chunk
+        chunk_id += 1
+
+
+def go(args):
+
+    n_rows = int(float(args.n_rows))
+    logger.info(f"Writing {n_rows} rows with {args.n_corporations} corporations to {args.output_file}")
+    write_dataset_csv(args.output_file, n_rows, args.n_corporations, args.seed, args.chunksize)
+    logger.info("-----Synthetic data written.-----")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generate synthetic data with the project schema.")
+
+    parser.add_argument(
+        "--output_file",
+        type=str,
+        help="Path of the CSV file to write.",
+        required=True
+    )
+
+    parser.add_argument(
+        "--n_rows",
+        type=str,
+        help="Number of rows, e.g. 1e6.",
+        default="1e5"
+    )
+
+    parser.add_argument(
+        "--n_corporations",
+        type=int,
+        help="Number of distinct corporation values.",
+        default=100
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed.",
+        default=0
+    )
+
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        help="Number of rows generated and written at a time.",
+        default=1000000
+    )
+
+    args = parser.parse_args()
+
+    go(args)
@@ -0,0 +1,196 @@
+"""
+# data_processing/dataset_store.py
+
+Versioned store of datasets as memory-mapped columnar files.
+Every published version of a dataset is a directory with one .npy file per
+column (categorical columns as integer codes, their categories in the
+metadata) and a meta.json file:
+
+    <store_dir>/<name>/<version>/<column>.npy
+    <store_dir>/<name>/<version>/meta.json
+    <store_dir>/<name>/CURRENT              (name of the current version)
+
+Readers open the columns with np.load(mmap_mode="r"), so all processes that
+read the same version share the pages of the operating system page cache
+instead of holding their own copy. A version is published by writing it to a
+temporary directory, renaming the directory and then atomically replacing
+CURRENT; readers pick up the new version on their next access.
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from data_processing.schema import read_dataset_csv
+
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+
+
+def source_version(source_path: str) -> str:
+    """
+    Version of a source file, derived from its modification time and size.
+    """
+    stat = os.stat(source_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _read_current(dataset_dir: str) -> str:
+    try:
+        with open(os.path.join(dataset_dir, CURRENT_FILE), "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish_dataset(df: pd.DataFrame, store_dir: str, name: str, version: str,
+                    source_path: str = None, keep_versions: int = 2) -> str:
+    """
+    Write a version of a dataset and make it the current version.
+    Inputs:
+    - df: DataFrame to publish
+    - store_dir: Root directory of the store
+    - name: Name of the dataset (e.g. ingested, test)
+    - version: Version id (e.g. source_version of the source file)
+    - source_path: Path of the source file (recorded in the metadata)
+    - keep_versions: Number of most recent versions kept on disk
+    Outputs:
+    - version_dir: Directory of the published version
+    """
+    dataset_dir = os.path.join(store_dir, name)
+    version_dir = os.path.join(dataset_dir, version)
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    if not os.path.isdir(version_dir):
+        tmp_dir = os.path.join(dataset_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        columns = []
+        for i, column in enumerate(df.columns):
+            values = df[column]
+            # Non-numeric columns are stored as category codes
+            if not pd.api.types.is_numeric_dtype(values.dtype) or isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype("category")
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), values.cat.codes.to_numpy())
+                columns.append({"name": column, "file": f"{i}.npy",
+                                "categories": values.cat.categories.tolist()})
+            else:
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), values.to_numpy())
+                columns.append({"name": column, "file": f"{i}.npy"})
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump({
+                "name": name,
+                "version": version,
+                "source_path": source_path,
+                "n_rows": len(df),
+                "columns": columns
+            }, f)
+        try:
+            os.rename(tmp_dir, version_dir)
+        except OSError:
+            # Published concurrently by another process
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Atomically switch the current version
+    tmp_current = os.path.join(dataset_dir, f".{CURRENT_FILE}-{uuid.uuid4().hex}")
+    with open(tmp_current, "w") as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(dataset_dir, CURRENT_FILE))
+
+    # Remove old versions (readers keep their open memory maps)
+    versions = sorted(
+        (entry for entry in os.scandir(dataset_dir) if entry.is_dir() and not entry.name.startswith(".")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in versions[:-keep_versions]:
+        if entry.name != version:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    return version_dir
+
+
+def publish_csv(source_path: str, store_dir: str, name: str) -> str:
+    """
+    Publish a CSV file (read with the dataset schema) as the current version
+    of a dataset, unless that version is already current.
+    Inputs:
+    - source_path: Path of the CSV file
+    - store_dir: Root directory of the store
+    - name: Name of the dataset
+    Outputs:
+    - version: Published version id
+    """
+    version = source_version(source_path)
+    if _read_current(os.path.join(store_dir, name)) != version:
+        publish_dataset(read_dataset_csv(source_path), store_dir, name, version, source_path)
+    return version
+
+
+def open_version(store_dir: str, name: str, version: str) -> pd.DataFrame:
+    """
+    Open a version of a dataset as a DataFrame backed by memory-mapped columns.
+    """
+    version_dir = os.path.join(store_dir, name, version)
+    with open(os.path.join(version_dir, META_FILE), "r") as f:
+        meta = json.load(f)
+    data = {}
+    for column in meta["columns"]:
+        values = np.load(os.path.join(version_dir, column["file"]), mmap_mode="r")
+        if "categories" in column:
+            values = pd.Categorical.from_codes(values, categories=column["categories"])
+        data[column["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+class DatasetStore:
+    """
+    Read access to the current versions of the datasets of a store.
+    A dataset is registered with its source CSV file; if the source changes
+    (e.g. after a new ingestion), a new version is published on the next
+    access and the memory-mapped DataFrame is swapped atomically.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self._sources = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source_path: str) -> None:
+        """
+        Register a dataset with its source CSV file.
+        """
+        self._sources[name] = source_path
+
+    def get(self, name: str) -> tuple:
+        """
+        Current version of a dataset.
+        Inputs:
+        - name: Name of the dataset
+        Outputs:
+        - version: Version id
+        - df: DataFrame backed by memory-mapped columns (read-only)
+        """
+        source_path = self._sources.get(name)
+        dataset_dir = os.path.join(self.store_dir, name)
+        current = _read_current(dataset_dir)
+        if source_path is not None and os.path.exists(source_path):
+            version = source_version(source_path)
+            if version != current:
+                with self._lock:
+                    current = publish_csv(source_path, self.store_dir, name)
+        if current is None:
+            raise FileNotFoundError(f"Dataset {name} has no published version in {self.store_dir}.")
+
+        loaded = self._loaded.get(name)
+        if loaded is None or loaded[0] != current:
+            with self._lock:
+                loaded = self._loaded.get(name)
+                if loaded is None or loaded[0] != current:
+                    loaded = (current, open_version(self.store_dir, name, current))
+                    self._loaded[name] = loaded
+        return loaded
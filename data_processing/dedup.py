@@ -0,0 +1,187 @@
+"""
+# data_processing/dedup.py
+
+Deduplication of dataset rows by 64-bit row digests.
+- Every row is hashed to a 64-bit digest with pd.util.hash_pandas_object
+  (vectorized per column, categorical columns hash like their values).
+- Duplicates are found on the digest array with a hash table instead of
+  comparing the wide mixed-type rows themselves.
+- With the exact check, rows flagged as duplicates within a batch are
+  compared with their first occurrence column by column, so a digest
+  collision can never drop a distinct row. Rows of earlier runs are not
+  available for comparison; for them a second, independent 64-bit digest
+  is compared instead (128 bits in total).
+- The digests of all ingested rows are persisted in a DigestIndex, so later
+  runs can dedupe new data against the history without reloading it.
+
+Digests depend on the column dtypes, so data is expected to be read with the
+dataset schema (data_processing.schema).
+"""
+
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+
+# Hash key of the second, independent digest of the exact check
+CHECK_HASH_KEY = "dedup-check-key"
+
+
+def row_digests(df: pd.DataFrame, hash_key: str = None) -> np.ndarray:
+    """
+    64-bit digest of every row.
+    Inputs:
+    - df: DataFrame
+    - hash_key: Optional 16-character hash key (default: pandas default key)
+    Outputs:
+    - digests: numpy array of uint64
+    """
+    if hash_key is None:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return pd.util.hash_pandas_object(df, index=False, hash_key=hash_key.ljust(16)[:16]).to_numpy()
+
+
+def _rows_equal(df: pd.DataFrame, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Element-wise comparison of the rows at positions left and right.
+    Missing values compare equal to missing values.
+    """
+    equal = np.ones(len(left), dtype=bool)
+    for column in df.columns:
+        values = df[column]
+        # Categorical columns are compared by their codes (-1 for missing)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            equal &= codes[left] == codes[right]
+            continue
+        values = values.to_numpy()
+        a = values[left]
+        b = values[right]
+        same = a == b
+        if not isinstance(same, np.ndarray):
+            same = np.asarray(same, dtype=bool)
+        equal &= same | (pd.isna(a) & pd.isna(b))
+    return equal
+
+
+class DigestIndex:
+    """
+    Persisted, sorted index of the digests of all rows seen so far.
+    Stored as one .npz file with the sorted digests and the aligned check
+    digests; updates are written atomically.
+    """
+
+    def __init__(self, path: str, load: bool = True):
+        """
+        Inputs:
+        - path: Path of the .npz file
+        - load: Load the stored digests (False: start an empty index at path)
+        """
+        self.path = path
+        if load and os.path.exists(path):
+            with np.load(path) as data:
+                self.digests = data["digests"]
+                self.check_digests = data["check_digests"]
+        else:
+            self.digests = np.empty(0, dtype=np.uint64)
+            self.check_digests = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def lookup(self, digests: np.ndarray) -> np.ndarray:
+        """
+        Positions of digests in the index (-1 if not present), by binary search.
+        The digests are searched in sorted order, so consecutive searches touch
+        neighbouring parts of the index.
+        """
+        order = np.argsort(digests)
+        positions = np.empty(len(digests), dtype=np.intp)
+        positions[order] = np.searchsorted(self.digests, digests[order])
+        found = positions < len(self.digests)
+        found[found] = self.digests[positions[found]] == digests[found]
+        return np.where(found, positions, -1)
+
+    def add(self, digests: np.ndarray, check_digests: np.ndarray) -> None:
+        """
+        Add digests (not yet in the index) and keep the index sorted.
+        The new digests are sorted and merged in, without re-sorting the index.
+        """
+        order = np.argsort(digests)
+        digests = digests[order]
+        positions = np.searchsorted(self.digests, digests)
+        self.digests = np.insert(self.digests, positions, digests)
+        self.check_digests = np.insert(self.check_digests, positions, check_digests[order])
+
+    def save(self, path: str = None) -> None:
+        """
+        Write the index atomically (to path, default: the path it was created with).
+        """
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(tmp_path, digests=self.digests, check_digests=self.check_digests)
+        os.replace(tmp_path, path)
+
+
+def deduplicate(df: pd.DataFrame, index: DigestIndex = None, exact_check: bool = True) -> tuple:
+    """
+    Find the rows to keep: the first occurrence of every row that is not in
+    the index. The digests of the kept rows are added to the index (the index
+    is not saved).
+    Inputs:
+    - df: DataFrame
+    - index: Optional DigestIndex of the rows of earlier runs
+    - exact_check: Verify digest matches (full row comparison within the
+      batch, second digest against the index)
+    Outputs:
+    - keep: Boolean numpy array, True for the rows to keep
+    - stats: Dictionary with the number of rows, duplicates within the batch,
+      duplicates of earlier runs and digest collisions
+    """
+    digests = row_digests(df)
+    check_digests = row_digests(df, CHECK_HASH_KEY) if index is not None else None
+
+    # Duplicates within the batch (hash table on the digests)
+    digest_series = pd.Series(digests)
+    duplicate = digest_series.duplicated().to_numpy()
+
+    collisions = 0
+    if exact_check and duplicate.any():
+        # First occurrences of the duplicated digests, to compare the rows with
+        first_positions = np.flatnonzero(digest_series.duplicated(keep=False).to_numpy() & ~duplicate)
+        positions = np.flatnonzero(duplicate)
+        first = first_positions[pd.Index(digests[first_positions]).get_indexer(digests[positions])]
+        same = _rows_equal(df, positions, first)
+        collisions += int(np.count_nonzero(~same))
+        duplicate[positions[~same]] = False
+    n_batch_duplicates = int(np.count_nonzero(duplicate))
+
+    # Duplicates of earlier runs
+    n_history_duplicates = 0
+    if index is not None and len(index):
+        candidates = np.flatnonzero(~duplicate)
+        positions = index.lookup(digests[candidates])
+        seen = positions >= 0
+        if exact_check:
+            same = index.check_digests[positions[seen]] == check_digests[candidates[seen]]
+            collisions += int(np.count_nonzero(~same))
+            seen[np.flatnonzero(seen)[~same]] = False
+        duplicate[candidates[seen]] = True
+        n_history_duplicates = int(np.count_nonzero(seen))
+
+    keep = ~duplicate
+    if index is not None:
+        # Distinct rows with colliding digests are kept but indexed only once
+        new_digests, new_positions = np.unique(digests[keep], return_index=True)
+        new_positions = new_positions[index.lookup(new_digests) < 0]
+        index.add(digests[keep][new_positions], check_digests[keep][new_positions])
+
+    return keep, {
+        "rows": len(df),
+        "batch_duplicates": n_batch_duplicates,
+        "history_duplicates": n_history_duplicates,
+        "collisions": collisions
+    }
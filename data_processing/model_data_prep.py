@@ -39,33 +39,35 @@ def process_data(
         in.    
     """
 
-    # Remove target column from features
-    y = df[label]
-    X = df.drop([label], axis=1)
-    
+    # Separate the label, the continuous and the categorical features by
+    # column name instead of dropping columns, so no intermediate frames are
+    # copied and mixed-type frames are never converted to object arrays
+    if label is not None:
+        y = df[label].to_numpy()
+    else:
+        y = np.array([])
+    continuous_features = [
+        column for column in df.columns
+        if column != label and column not in categorical_features
+    ]
 
     # Process the features
     # --------------------
-    # Separate categorical and continuous features
-    X_categorical = X[categorical_features].values
-    X_continuous = X.drop(*[categorical_features], axis=1).values
-
     # Encode categorical features
     # If training, fit the encoder; otherwise, transform using the existing encoder
+    X_categorical = df[categorical_features].to_numpy()
     if training is True:        
         encoder = OneHotEncoder(sparse=False, handle_unknown="ignore")        
         X_categorical = encoder.fit_transform(X_categorical)        
     else:
         X_categorical = encoder.transform(X_categorical)
-    
-
-    # Process the label
-    # --------------------
 
-    # Convert continuous features to NumPy array
-    y = y.values
-        
-    # Concatenate continuous and categorical features    
-    X = np.concatenate([X_continuous, X_categorical], axis=1)
+    # Write continuous and encoded categorical features into one
+    # preallocated array (continuous features first)
+    n_continuous = len(continuous_features)
+    X = np.empty((len(df), n_continuous + X_categorical.shape[1]), dtype=np.float64)
+    for i, column in enumerate(continuous_features):
+        X[:, i] = df[column].to_numpy()
+    X[:, n_continuous:] = X_categorical
 
     return X, y, encoder
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+# data_processing/schema.py
+
+Explicit schema of the dataset used wherever data is loaded.
+- integer columns are downcast (int32 counts, int8 label) instead of int64,
+  after they are parsed and only if all values fit,
+- the categorical feature is read as pandas category instead of Python strings,
+so a row takes a fraction of the memory of a plain pd.read_csv.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+# Column name -> pandas dtype
+DATASET_SCHEMA = {
+    "corporation": "category",
+    "lastmonth_activity": "int32",
+    "lastyear_activity": "int32",
+    "number_of_employees": "int32",
+    "exited": "int8"
+}
+
+
+def _cast_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast the integer columns of a chunk (or of a whole DataFrame) to the
+    dataset schema. Columns that do not fit their schema dtype (missing
+    values, values out of range) keep the dtype pandas parsed.
+    """
+    for column, dtype in DATASET_SCHEMA.items():
+        if column not in chunk.columns or dtype == "category":
+            continue
+        values = chunk[column]
+        limits = np.iinfo(dtype)
+        if pd.api.types.is_integer_dtype(values) and (
+            values.empty or (limits.min <= values.min() and values.max() <= limits.max)
+        ):
+            chunk[column] = values.astype(dtype)
+    return chunk
+
+
+def _categorical_dtypes() -> dict:
+    """
+    Dtypes the parser is given: the categorical columns of the schema only.
+    """
+    return {column: dtype for column, dtype in DATASET_SCHEMA.items() if dtype == "category"}
+
+
+def _iter_chunks(input_file_path: str, **kwargs):
+    """
+    Read a CSV file in chunks with the dataset schema, chunk by chunk.
+    """
+    with pd.read_csv(input_file_path, dtype=_categorical_dtypes(), **kwargs) as reader:
+        for chunk in reader:
+            yield _cast_chunk(chunk)
+
+
+def read_dataset_csv(input_file_path: str, **kwargs):
+    """
+    Read a dataset CSV file with the dataset schema.
+    Columns that are not part of the schema are parsed as usual.
+    The categorical columns are read as category. The integer columns are
+    parsed with the inferred (64-bit) dtypes and cast to their narrower
+    schema dtypes only if all values fit: the parser would wrap values that
+    do not fit around instead of failing. Columns that do not match the
+    schema (values out of range, missing values, text) keep the parsed
+    dtype, so that the caller can handle them.
+    Inputs:
+    - input_file_path: Path to the CSV file
+    - kwargs: Further arguments passed to pd.read_csv (e.g. chunksize)
+    Outputs:
+    - df: DataFrame (or a generator of chunks if chunksize is given, every
+      chunk is cast on its own)
+    """
+    if kwargs.get("chunksize") is not None:
+        return _iter_chunks(input_file_path, **kwargs)
+    return _cast_chunk(pd.read_csv(input_file_path, dtype=_categorical_dtypes(), **kwargs))
+
+
+def concat_datasets(df_list: list) -> pd.DataFrame:
+    """
+    Concatenate DataFrames read with the dataset schema.
+    pd.concat turns category columns with different categories into object
+    columns; the categories are unified first so the result stays categorical.
+    Inputs:
+    - df_list: List of DataFrames
+    Outputs:
+    - df: Concatenated DataFrame
+    """
+    if not df_list:
+        return pd.DataFrame()
+
+    categorical_columns = [
+        column for column in df_list[0].columns
+        if all(
+            column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype)
+            for df in df_list
+        )
+    ]
+    for column in categorical_columns:
+        categories = union_categoricals([df[column] for df in df_list]).categories
+        df_list = [
+            df.assign(**{column: df[column].cat.set_categories(categories)})
+            for df in df_list
+        ]
+
+    return pd.concat(df_list, ignore_index=True)
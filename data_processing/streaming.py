@@ -0,0 +1,237 @@
+"""
+# data_processing/streaming.py
+
+Helpers to process datasets that do not fit into memory.
+The data is consumed in chunks of a CSV file:
+- a first streaming pass discovers the category vocabulary of the categorical
+  features and the running mean and variance of the continuous features,
+- a one-hot encoder is built from the discovered vocabulary, so that every
+  chunk is encoded into the same feature space by process_data,
+- a fitted encoder can be extended with newly seen categories,
+- a bounded reservoir sample of the history can be kept up to date chunk by chunk.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
+
+from data_processing.schema import read_dataset_csv, concat_datasets
+
+
+def iter_csv_chunks(input_file_path: str, chunksize: int):
+    """
+    Iterate over a CSV file in chunks read with the dataset schema.
+    Inputs:
+    - input_file_path: Path to the input CSV file
+    - chunksize: Number of rows per chunk
+    Outputs:
+    - Generator of DataFrames with at most chunksize rows
+    """
+    yield from read_dataset_csv(input_file_path, chunksize=chunksize)
+
+
+def iter_dataframe_chunks(df: pd.DataFrame, chunksize: int):
+    """
+    Iterate over an in-memory DataFrame in chunks.
+    Used to run the streaming code path on data that is already loaded.
+    Inputs:
+    - df: DataFrame to iterate over
+    - chunksize: Number of rows per chunk
+    Outputs:
+    - Generator of DataFrames with at most chunksize rows
+    """
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def discover_vocabulary(chunks, label: str, categorical_features: list) -> dict:
+    """
+    First streaming pass over the data.
+    Collects the category vocabulary of every categorical feature, the label
+    classes and the running mean and variance of the continuous features
+    (chunk-wise merge of count, mean and sum of squared deviations).
+    Inputs:
+    - chunks: Iterable of DataFrames
+    - label: Name of the label column
+    - categorical_features: List of categorical feature names
+    Outputs:
+    - vocabulary: Dictionary with keys
+        features: feature names in file order,
+        continuous_features: continuous feature names in file order,
+        categories: dict of sorted category lists per categorical feature,
+        classes: sorted label classes,
+        n_rows: number of rows,
+        mean, std: numpy arrays for the continuous features
+    """
+    categories = {feature: set() for feature in categorical_features}
+    classes = set()
+    features = None
+    continuous_features = None
+    n_rows = 0
+    mean = None
+    m2 = None
+
+    for chunk in chunks:
+        if features is None:
+            features = [column for column in chunk.columns if column != label]
+            continuous_features = [f for f in features if f not in categorical_features]
+            mean = np.zeros(len(continuous_features))
+            m2 = np.zeros(len(continuous_features))
+
+        for feature in categorical_features:
+            categories[feature].update(chunk[feature].dropna().unique().tolist())
+        classes.update(chunk[label].unique().tolist())
+
+        # Merge the chunk statistics into the running statistics
+        values = chunk[continuous_features].to_numpy(dtype=np.float64)
+        n_chunk = values.shape[0]
+        if n_chunk == 0:
+            continue
+        chunk_mean = values.mean(axis=0)
+        chunk_m2 = ((values - chunk_mean) ** 2).sum(axis=0)
+        n_total = n_rows + n_chunk
+        delta = chunk_mean - mean
+        mean = mean + delta * n_chunk / n_total
+        m2 = m2 + chunk_m2 + delta ** 2 * n_rows * n_chunk / n_total
+        n_rows = n_total
+
+    if features is None:
+        return {}
+
+    std = np.sqrt(m2 / n_rows) if n_rows > 0 else np.ones_like(mean)
+    # Constant columns must not be scaled by zero
+    std[std == 0] = 1.0
+
+    return {
+        "features": features,
+        "continuous_features": continuous_features,
+        "categories": {f: sorted(c) for f, c in categories.items()},
+        "classes": sorted(classes),
+        "n_rows": n_rows,
+        "mean": mean,
+        "std": std
+    }
+
+
+def build_encoder(categories: dict, categorical_features: list) -> OneHotEncoder:
+    """
+    Build a fitted OneHotEncoder from a known category vocabulary.
+    The encoder behaves like the one fitted by process_data in training mode,
+    but its vocabulary does not require the full dataset in memory.
+    Inputs:
+    - categories: Dictionary with a list of categories per categorical feature
+    - categorical_features: List of categorical feature names (column order)
+    Outputs:
+    - encoder: Fitted OneHotEncoder
+    Raises ValueError if a categorical feature has no categories (e.g. all of its values are null).
+    """
+    empty = [f for f in categorical_features if len(categories.get(f, [])) == 0]
+    if empty:
+        raise ValueError(f"No categories found for the categorical features {empty}; cannot build the encoder.")
+    category_lists = [np.array(categories[f], dtype=object) for f in categorical_features]
+    encoder = OneHotEncoder(
+        categories=category_lists,
+        sparse=False,
+        handle_unknown="ignore"
+    )
+
+    # Fit on a minimal array containing every category once
+    n_fit = max(len(c) for c in category_lists)
+    fit_values = np.empty((n_fit, len(category_lists)), dtype=object)
+    for i, cats in enumerate(category_lists):
+        fit_values[:, i] = [cats[j] if j < len(cats) else cats[0] for j in range(n_fit)]
+    encoder.fit(fit_values)
+
+    return encoder
+
+
+def extend_encoder(encoder: OneHotEncoder, new_categories: dict, categorical_features: list) -> tuple:
+    """
+    Extend a fitted OneHotEncoder with newly seen categories.
+    The categories of the extended encoder are the sorted union of the known
+    and the new categories. The returned column map gives, for every one-hot
+    column of the old encoder, its position in the extended encoder, so that
+    coefficients learned with the old encoder can be carried over.
+    Inputs:
+    - encoder: Fitted OneHotEncoder
+    - new_categories: Dictionary with a list of categories per categorical feature
+    - categorical_features: List of categorical feature names (column order)
+    Outputs:
+    - encoder: Extended OneHotEncoder (the input encoder if nothing is new)
+    - column_map: numpy array mapping old one-hot columns to new columns
+    - added: Dictionary with the list of added categories per feature
+    """
+    categories = {}
+    added = {}
+    for feature, known in zip(categorical_features, encoder.categories_):
+        known = list(known)
+        new = sorted(set(new_categories.get(feature, [])) - set(known))
+        added[feature] = new
+        categories[feature] = sorted(known + new)
+
+    if not any(added.values()):
+        n_columns = sum(len(c) for c in encoder.categories_)
+        return encoder, np.arange(n_columns), added
+
+    extended = build_encoder(categories, categorical_features)
+
+    column_map = []
+    offset = 0
+    for feature, known in zip(categorical_features, encoder.categories_):
+        position = {category: i for i, category in enumerate(categories[feature])}
+        column_map.extend(offset + position[category] for category in known)
+        offset += len(categories[feature])
+
+    return extended, np.array(column_map, dtype=int), added
+
+
+def update_reservoir(reservoir: pd.DataFrame, chunk: pd.DataFrame, n_seen: int, size: int, rng) -> tuple:
+    """
+    Update a uniform reservoir sample (Algorithm R) with the rows of a chunk.
+    The replacement decisions for the whole chunk are drawn in one vectorized
+    step; when several rows of the chunk hit the same slot the last one wins,
+    which is what the sequential algorithm does. Replaced rows are removed and
+    the replacing rows appended, so the categorical dtypes are preserved.
+    Inputs:
+    - reservoir: Current sample (None or empty to start a new one)
+    - chunk: New rows
+    - n_seen: Number of rows seen before this chunk
+    - size: Maximum size of the reservoir
+    - rng: numpy random Generator
+    Outputs:
+    - reservoir: Updated sample
+    - n_seen: Number of rows seen including this chunk
+    """
+    chunk = chunk.reset_index(drop=True)
+    if reservoir is None or len(reservoir) == 0:
+        reservoir = chunk.iloc[:0].copy()
+    elif len(reservoir) > size:
+        # The reservoir size was reduced: keep a uniform subsample
+        keep = np.sort(rng.choice(len(reservoir), size=size, replace=False))
+        reservoir = reservoir.iloc[keep].reset_index(drop=True)
+
+    # Fill phase: take rows until the reservoir is full
+    n_fill = min(max(size - len(reservoir), 0), len(chunk))
+    if n_fill > 0:
+        reservoir = concat_datasets([reservoir, chunk.iloc[:n_fill]])
+    rest = chunk.iloc[n_fill:]
+    n_seen += n_fill
+
+    if len(rest) > 0 and size > 0:
+        # Row t (0-based, global) replaces slot j ~ U{0..t} if j < size
+        t = n_seen + np.arange(len(rest))
+        slots = (rng.random(len(rest)) * (t + 1)).astype(np.int64)
+        accepted = np.flatnonzero(slots < size)
+        if accepted.size > 0:
+            last_hit = pd.Series(accepted, index=slots[accepted]).groupby(level=0).last()
+            # The order of a reservoir sample is irrelevant: drop the replaced
+            # slots and append the replacing rows
+            kept = np.ones(len(reservoir), dtype=bool)
+            kept[last_hit.index.to_numpy()] = False
+            reservoir = concat_datasets([
+                reservoir.iloc[kept],
+                rest.iloc[last_hit.to_numpy()]
+            ])
+    n_seen += len(rest)
+
+    return reservoir, n_seen
@@ -0,0 +1,233 @@
+"""
+# data_processing/validation.py
+
+Validation of source files before they are ingested.
+Every file is read once, in chunks, and every chunk is checked with
+vectorized column operations:
+- column set: the header must have exactly the columns of the dataset schema
+  (checked before any data is read),
+- dtypes: integer columns must hold integers (no strings, no fractions),
+- ranges: minimum and maximum per column,
+- label domain: the label must be 0 or 1,
+- nulls: rows with missing values are rejected; the null rate of every
+  column over the file must not exceed max_null_rate.
+
+Files are read with integer dtypes first (fast path; int64, so values outside
+the schema dtypes are range-checked before they are cast). If the parser fails
+(e.g. a string in an integer column), the file is read again with inferred
+numeric dtypes and the values of the affected columns are checked one by one.
+Invalid rows are rejected and returned with the reason; a file with a wrong
+column set, too many nulls or too many rejected rows is rejected as a whole.
+Rejected rows and files are moved aside with quarantine().
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_processing.schema import DATASET_SCHEMA
+
+
+# Rules per column: kind (integer, category or label), range, allowed values
+VALIDATION_RULES = {
+    "corporation": {"kind": "category"},
+    "lastmonth_activity": {"kind": "integer", "min": 0, "max": np.iinfo(np.int32).max},
+    "lastyear_activity": {"kind": "integer", "min": 0, "max": np.iinfo(np.int32).max},
+    "number_of_employees": {"kind": "integer", "min": 0, "max": np.iinfo(np.int32).max},
+    "exited": {"kind": "label", "values": [0, 1]}
+}
+
+# Default limits of a file
+MAX_NULL_RATE = 0.05
+MAX_REJECTED_RATE = 0.05
+
+REASON_COLUMN = "rejection_reason"
+
+
+def _add_reason(reasons: np.ndarray, mask: np.ndarray, reason: str) -> None:
+    """
+    Append a reason to the rows selected by mask.
+    """
+    if mask.any():
+        reasons[mask] = np.where(reasons[mask] == "", reason, reasons[mask] + "; " + reason)
+
+
+def validate_chunk(chunk: pd.DataFrame, rules: dict = None) -> tuple:
+    """
+    Check a chunk of a source file.
+    Inputs:
+    - chunk: DataFrame with the schema columns, read with int64 integer
+      columns or with inferred dtypes
+    - rules: Validation rules per column (default VALIDATION_RULES)
+    Outputs:
+    - valid: DataFrame of the valid rows with the schema dtypes
+    - rejected: DataFrame of the invalid rows (as read) with a rejection_reason column
+    - null_counts: Dictionary of column -> number of missing values
+    """
+    rules = VALIDATION_RULES if rules is None else rules
+    n_rows = len(chunk)
+    reasons = np.full(n_rows, "", dtype=object)
+    null_counts = {}
+    converted = {}
+
+    for column, rule in rules.items():
+        values = chunk[column]
+        is_null = values.isna().to_numpy()
+        null_counts[column] = int(is_null.sum())
+        _add_reason(reasons, is_null, f"{column} is missing")
+
+        if rule["kind"] == "category":
+            converted[column] = values
+            continue
+
+        if pd.api.types.is_integer_dtype(values.dtype):
+            # Read with an integer dtype: no missing values, text or fractions
+            numbers = values.to_numpy()
+            checked = np.ones(n_rows, dtype=bool)
+        else:
+            # Text that is not a number becomes NaN
+            numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            checked = ~np.isnan(numbers)
+            _add_reason(reasons, ~checked & ~is_null, f"{column} is not a number")
+            _add_reason(reasons, checked & (numbers != np.floor(numbers)), f"{column} is not an integer")
+
+        if rule["kind"] == "label":
+            outside = checked & ~np.isin(numbers, rule["values"])
+            _add_reason(reasons, outside, f"{column} is not one of {rule['values']}")
+        else:
+            if "min" in rule:
+                _add_reason(reasons, checked & (numbers < rule["min"]), f"{column} is below {rule['min']}")
+            if "max" in rule:
+                _add_reason(reasons, checked & (numbers > rule["max"]), f"{column} is above {rule['max']}")
+        converted[column] = pd.Series(numbers, index=chunk.index)
+
+    invalid = reasons != ""
+    valid = pd.DataFrame(converted)
+    if invalid.any():
+        rejected = chunk[invalid].assign(**{REASON_COLUMN: reasons[invalid]})
+        valid = valid[~invalid]
+    else:
+        rejected = chunk.iloc[:0]
+    valid = valid.astype({column: DATASET_SCHEMA[column] for column in valid.columns if column in DATASET_SCHEMA})
+    return valid, rejected, null_counts
+
+
+def _iter_chunks(file_path: str, chunksize: int, typed: bool):
+    """
+    Chunked reader with the category dtypes and int64 for the integer columns,
+    or with the category dtypes only (numeric columns are inferred, columns
+    with text are read as objects).
+    The integer columns are not read with their (narrower) schema dtypes,
+    because the parser wraps values that do not fit around instead of failing;
+    validate_chunk casts them after the range check.
+    """
+    dtype = {column: kind for column, kind in DATASET_SCHEMA.items() if kind == "category"}
+    if typed:
+        dtype.update({column: "int64" for column, kind in DATASET_SCHEMA.items() if kind != "category"})
+    return pd.read_csv(file_path, dtype=dtype, chunksize=chunksize)
+
+
+def read_validated_csv(file_path: str, chunksize: int = 100000, rules: dict = None,
+                       max_null_rate: float = MAX_NULL_RATE, max_rejected_rate: float = MAX_REJECTED_RATE) -> tuple:
+    """
+    Read and validate a source file in one pass.
+    Inputs:
+    - file_path: Path of the CSV file
+    - chunksize: Number of rows per chunk
+    - rules: Validation rules per column (default VALIDATION_RULES)
+    - max_null_rate: Maximum share of missing values per column
+    - max_rejected_rate: Maximum share of rejected rows
+    Outputs:
+    - df: DataFrame of the valid rows with the schema dtypes (None if the
+      file is rejected as a whole)
+    - rejected: DataFrame of the rejected rows with their reasons
+    - report: Dictionary with file, status (valid, rows_rejected or
+      file_rejected), row counts, null rates and errors
+    """
+    rules = VALIDATION_RULES if rules is None else rules
+    report = {"file": os.path.basename(file_path), "status": "valid", "rows": 0,
+              "rejected_rows": 0, "null_rates": {}, "errors": []}
+
+    # Column set, from the header only
+    columns = list(pd.read_csv(file_path, nrows=0).columns)
+    missing = [column for column in rules if column not in columns]
+    unexpected = [column for column in columns if column not in rules]
+    if missing or unexpected:
+        report["status"] = "file_rejected"
+        report["errors"].append(f"Columns do not match the schema: missing {missing}, unexpected {unexpected}")
+        return None, pd.DataFrame(), report
+
+    # Typed fast path; on a parser error the file is read again as text
+    for typed in (True, False):
+        valid_chunks, rejected_chunks = [], []
+        null_counts = dict.fromkeys(rules, 0)
+        try:
+            with _iter_chunks(file_path, chunksize, typed) as reader:
+                for chunk in reader:
+                    valid, rejected, chunk_null_counts = validate_chunk(chunk[list(rules)], rules)
+                    valid_chunks.append(valid)
+                    if len(rejected):
+                        rejected_chunks.append(rejected)
+                    for column, count in chunk_null_counts.items():
+                        null_counts[column] += count
+            break
+        except (ValueError, OverflowError):
+            if not typed:
+                raise
+
+    n_valid = sum(len(chunk) for chunk in valid_chunks)
+    n_rejected = sum(len(chunk) for chunk in rejected_chunks)
+    n_rows = n_valid + n_rejected
+    report["rows"] = n_rows
+    report["rejected_rows"] = n_rejected
+    report["null_rates"] = {column: count / n_rows if n_rows else 0.0 for column, count in null_counts.items()}
+    rejected = pd.concat(rejected_chunks, ignore_index=True) if rejected_chunks else pd.DataFrame()
+
+    for column, rate in report["null_rates"].items():
+        if rate > max_null_rate:
+            report["errors"].append(f"Null rate of {column} is {rate:.1%} (maximum {max_null_rate:.1%})")
+    if n_rows and n_rejected / n_rows > max_rejected_rate:
+        report["errors"].append(f"{n_rejected} of {n_rows} rows rejected (maximum {max_rejected_rate:.1%})")
+    if n_rows == 0:
+        report["errors"].append("File has no rows")
+    if report["errors"]:
+        report["status"] = "file_rejected"
+        return None, rejected, report
+
+    if n_rejected:
+        report["status"] = "rows_rejected"
+    df = pd.concat(valid_chunks, ignore_index=True) if len(valid_chunks) > 1 else valid_chunks[0]
+    if len(valid_chunks) > 1:
+        df = df.astype({column: "category" for column, rule in rules.items() if rule["kind"] == "category"})
+    return df, rejected, report
+
+
+def quarantine(quarantine_dir: str, file_path: str, rejected: pd.DataFrame, report: dict) -> list:
+    """
+    Move rejected data into the quarantine folder.
+    A file rejected as a whole is moved there (so it is not ingested again);
+    rejected rows are written to <file>.rejected.csv with their reasons.
+    The report is written to <file>.validation.json.
+    Inputs:
+    - quarantine_dir: Quarantine folder
+    - file_path: Path of the validated file
+    - rejected: DataFrame of the rejected rows
+    - report: Validation report of the file
+    Outputs:
+    - paths: Paths of the written files
+    """
+    os.makedirs(quarantine_dir, exist_ok=True)
+    filename = os.path.basename(file_path)
+    paths = []
+    if report["status"] == "file_rejected":
+        paths.append(shutil.move(file_path, os.path.join(quarantine_dir, filename)))
+    if len(rejected):
+        paths.append(os.path.join(quarantine_dir, f"{filename}.rejected.csv"))
+        rejected.to_csv(paths[-1], index=False)
+    paths.append(os.path.join(quarantine_dir, f"{filename}.validation.json"))
+    with open(paths[-1], "w") as f:
+        json.dump(report, f, indent=2)
+    return paths
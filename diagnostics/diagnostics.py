@@ -7,6 +7,8 @@ This script performs diagnostics on the trained model:
 - checks for missing values
 - measures execution time of training and ingestion scripts
 - checks for outdated packages
+- saves all results to diagnostics.json in the model output folder, so the
+  monitoring report is built from them without running the checks again
 """
 
 
@@ -21,62 +23,100 @@ import logging
 import subprocess
 
 from data_processing.model_data_prep import process_data
+from serving.profiling import span
+from utils.artifact_store\
+    import ArtifactStore,\
+           artifact_store_path
+from utils.score_history\
+    import ScoreHistory,\
+           model_version,\
+           score_history_path
 from utils.common_utilities\
     import get_project_root,\
            load_config,\
            load_dataset,\
-           load_model
+           load_model,\
+           load_model_info
 
 from sklearn.metrics\
     import fbeta_score,\
            precision_score,\
            recall_score,\
            roc_auc_score
+from utils.logging_utils\
+    import setup_logging,\
+           debug_sampled,\
+           LazyPreview
 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
+logger = setup_logging()
+
+# Name of the diagnostics results file in the model output folder
+DIAGNOSTICS_FILE = "diagnostics.json"
 
 
 
 ##################Function to get model predictions
-def model_predictions(df: pd.DataFrame, model_file_path: str) -> list:
+def model_predictions(
+    df: pd.DataFrame, model_file_path: str, return_scores: bool = False, return_arrays: bool = False,
+    row_cache=None, model_info: dict = None
+) -> list:
     """
     Load the model and make predictions on the provided DataFrame.
+    A model that is already loaded (e.g. by the model cache of the API) can
+    be passed as model_info; the model file is not read then.
+    The positive class probabilities are computed once with predict_proba and
+    the hard predictions are derived from them (threshold 0.5), so callers that
+    need both do not have to score the data twice.
     Inputs:
     - df: DataFrame containing the data to score
     - model_file_path: Path to the trained model file
+    - return_scores: If True, also return the positive class probabilities
+    - return_arrays: If True, return numpy arrays instead of lists (e.g. for
+      response encoders that serialize arrays directly)
+    - row_cache: Optional row-level score cache with a score_rows(X, predict_scores)
+      method (serving.prediction_cache.PredictionCache); only uncached rows are scored
+    - model_info: Optional model information dictionary of the loaded model
     Outputs:
     - y_pred: List of predictions made by the model
     - y_test: List of true labels (if available)
+    - y_score: List of positive class probabilities (only if return_scores is True)
     """
     
     # Load the model and encoder
-    model_name,\
-    model_created_at,\
-    model,\
-    encoder,\
-    label,\
-    categorical_features = load_model(model_file_path, logger)
-    logger.info(f"Model load complete: {model_name} created at: {model_created_at} ")
+    if model_info is not None:
+        model = model_info["model"]
+        encoder = model_info["encoder"]
+        label = model_info["label_column"]
+        categorical_features = model_info["categorical_features"]
+    else:
+        with span("model_load"):
+            model_name,\
+            model_created_at,\
+            model,\
+            encoder,\
+            label,\
+            categorical_features = load_model(model_file_path, logger)
+        logger.info("Model load complete: %s created at: %s", model_name, model_created_at)
     
 
     # Process the data
     # --------------------------------------
     logger.info("Processing data")    
-    logger.info(f"Splitting dataset into features and target variable: {label}.\
-                One-Hot Encoding categorical features: {categorical_features}")    
-    X_test,y_test,_ = process_data(
-        df=df,
-        label=label,
-        categorical_features=categorical_features,
-        training=False,
-        encoder=encoder
-    )
-
-    logger.info(f"Processed data shapes: X: {X_test.shape}")  
-    logger.info(f"X_test preview: {X_test[:5]}")
-    logger.info(f"y_test preview: {y_test[:5]}")
+    logger.debug("Splitting dataset into features and target variable: %s.\
+                One-Hot Encoding categorical features: %s", label, categorical_features)    
+    with span("process_data"):
+        X_test,y_test,_ = process_data(
+            df=df,
+            label=label,
+            categorical_features=categorical_features,
+            training=False,
+            encoder=encoder
+        )
+
+    logger.debug("Processed data shapes: X: %s", X_test.shape)  
+    debug_sampled(logger, "X_test preview: %s", LazyPreview(X_test))
+    debug_sampled(logger, "y_test preview: %s", LazyPreview(y_test))
     
 
 
@@ -84,16 +124,59 @@ def model_predictions(df: pd.DataFrame, model_file_path: str) -> list:
     # --------------------------------------
     logger.info("Scoring the model on the test data")
     
-    # Prediction using the model    
-    y_pred = model.predict(X_test)
-    logger.info(f"Predictions made on the test data: {y_pred[:5]}")
+    # Prediction using the model: probabilities are computed once and
+    # the class labels are derived from them
+    with span("predict"):
+        if row_cache is not None:
+            y_score = row_cache.score_rows(X_test, lambda X: model.predict_proba(X)[:, 1])
+        else:
+            y_score = model.predict_proba(X_test)[:, 1]
+        y_pred = model.classes_[(y_score > 0.5).astype(int)]
+    debug_sampled(logger, "Predictions made on the test data: %s", LazyPreview(y_pred))
 
     # Check that length of predictions matches length of test data
     if len(y_pred) != len(X_test):
         logger.error("Length of predictions does not match length of test data.")
         return []
 
-    return y_pred.tolist(), y_test.tolist()  # Convert to list for consistency
+    if return_arrays:
+        if return_scores:
+            return y_pred, y_test, y_score
+        return y_pred, y_test
+
+    with span("to_list"):
+        if return_scores:
+            return y_pred.tolist(), y_test.tolist(), y_score.tolist()
+        return y_pred.tolist(), y_test.tolist()  # Convert to list for consistency
+
+
+def iter_model_predictions(chunks, model_info: dict):
+    """
+    Score a dataset chunk by chunk with an already loaded model.
+    Only one chunk is held in memory at a time. Chunks without the label
+    column are scored as unlabeled data (empty true labels).
+    Inputs:
+    - chunks: Iterable of DataFrames (e.g. data_processing.streaming.iter_csv_chunks)
+    - model_info: Model information dictionary stored by the training step
+    Outputs:
+    - Generator of (y_pred, y_test, y_score) numpy arrays per chunk
+    """
+    model = model_info["model"]
+    encoder = model_info["encoder"]
+    label = model_info["label_column"]
+    categorical_features = model_info["categorical_features"]
+
+    for chunk in chunks:
+        X_chunk, y_chunk, _ = process_data(
+            df=chunk,
+            label=label if label in chunk.columns else None,
+            categorical_features=categorical_features,
+            training=False,
+            encoder=encoder
+        )
+        y_score = model.predict_proba(X_chunk)[:, 1]
+        y_pred = model.classes_[(y_score > 0.5).astype(int)]
+        yield y_pred, y_chunk, y_score
 
 ##################Function to get summary statistics
 def dataframe_summary(df: pd.DataFrame) -> list:
@@ -122,7 +205,7 @@ def dataframe_summary(df: pd.DataFrame) -> list:
                 "std_dev": std_dev
             })
         else:
-            logger.warning(f"Column {column} is not numeric. Skipping summary statistics.")
+            logger.warning("Column %s is not numeric. Skipping summary statistics.", column)
 
     return summary_stats #return value should be a list containing all summary statistics
 
@@ -145,7 +228,7 @@ def missing_values_percent(df: pd.DataFrame) -> list:
             percent_missing = df[column].isna().sum() / total_rows * 100
             missing_values.append(percent_missing)
         else:
-            logger.warning(f"DataFrame is empty. Cannot calculate missing values for column {column}.")
+            logger.warning("DataFrame is empty. Cannot calculate missing values for column %s.", column)
 
     return missing_values #return value should be a list containing all summary statistics
 
@@ -242,7 +325,23 @@ def check_outdated_packages() -> pd.DataFrame:
 
 
 
-def compute_model_metrics(y: np.ndarray, preds: np.ndarray) -> tuple:
+def save_diagnostics(results: dict, output_filepath: str) -> None:
+    """
+    Save the diagnostics results to a JSON file (written atomically).
+    Inputs:
+    - results: Dictionary of the diagnostics results
+    - output_filepath: Path to the JSON file
+    Outputs:
+    - None
+    """
+    tmp_filepath = f"{output_filepath}.tmp"
+    with open(tmp_filepath, 'w') as f:
+        # numpy scalars are stored as Python numbers
+        json.dump(results, f, indent=2, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+    os.replace(tmp_filepath, output_filepath)
+
+
+def compute_model_metrics(y: np.ndarray, preds: np.ndarray, scores: np.ndarray = None) -> tuple:
     """
     Validates the trained machine learning model using precision, recall, and F1.
 
@@ -252,19 +351,155 @@ def compute_model_metrics(y: np.ndarray, preds: np.ndarray) -> tuple:
         Known labels, binarized.
     preds : np.array
         Predicted labels, binarized.
+    scores : np.array
+        Predicted probabilities of the positive class. If provided, the ROC AUC
+        is computed from the scores instead of the hard predictions (default=None).
     Returns
     -------
     precision : float
     recall : float
     fbeta : float
+    roc_auc : float
+        None if only one class is present in the labels.
     """
     fbeta = fbeta_score(y, preds, beta=1, zero_division=1)
     precision = precision_score(y, preds, zero_division=1)
     recall = recall_score(y, preds, zero_division=1)
-    roc_auc = roc_auc_score(y, preds)
+    if np.unique(y).size < 2:
+        logger.warning("Only one class present in the labels. ROC AUC is undefined.")
+        roc_auc = None
+    else:
+        roc_auc = roc_auc_score(y, preds if scores is None else scores)
     return precision, recall, fbeta, roc_auc
 
 
+def confusion_counts(y: np.ndarray, preds: np.ndarray, labels: list = None) -> dict:
+    """
+    Confusion matrix counts from a single bincount over the label pairs, so
+    reports can be rendered later without re-scoring the data.
+    Inputs:
+    - y: Known labels
+    - preds: Predicted labels
+    - labels: Sorted class labels (default: labels present in y or preds)
+    Outputs:
+    - confusion: Dictionary with labels and counts (rows: actual, columns: predicted)
+    """
+    y = np.asarray(y)
+    preds = np.asarray(preds)
+    labels = np.union1d(y, preds) if labels is None else np.asarray(labels)
+    n_labels = len(labels)
+    pairs = np.searchsorted(labels, y) * n_labels + np.searchsorted(labels, preds)
+    counts = np.bincount(pairs, minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+    return {"labels": labels.tolist(), "counts": counts.tolist()}
+
+
+def threshold_sweep(y: np.ndarray, scores: np.ndarray, n_thresholds: int = None) -> dict:
+    """
+    Compute ROC AUC, PR AUC (average precision) and precision, recall and F1
+    at many decision thresholds from a single sort of the scores.
+
+    The scores are sorted once in descending order; the cumulative sums of the
+    sorted labels then give the true and false positive counts for every
+    threshold, so the whole sweep is O(n log n).
+
+    Inputs
+    ------
+    y : np.array
+        Known labels, binarized.
+    scores : np.array
+        Predicted probabilities of the positive class.
+    n_thresholds : int
+        If provided, evaluate precision, recall and F1 on an evenly spaced grid
+        of this many thresholds in [0, 1] instead of at every distinct score
+        (default=None).
+    Returns
+    -------
+    sweep : dict
+        roc_auc, pr_auc, best_threshold, best_f1 and the lists thresholds,
+        precision, recall and f1 (one entry per threshold, descending).
+        Undefined values (AUCs of single-class labels, best threshold of
+        empty input) are None, so the sweep serializes to standard JSON;
+        empty input gives empty lists.
+    """
+    y = np.asarray(y).ravel()
+    scores = np.asarray(scores, dtype=float).ravel()
+
+    # Single sort of the scores (stable, so ties keep their order)
+    order = np.argsort(-scores, kind="mergesort")
+    sorted_scores = scores[order]
+    sorted_y = (y[order] == 1).astype(np.int64)
+
+    if sorted_y.size == 0:
+        logger.warning("No scores to sweep. All metrics of the threshold sweep are undefined.")
+        return {
+            "roc_auc": None,
+            "pr_auc": None,
+            "best_threshold": None,
+            "best_f1": None,
+            "thresholds": [],
+            "precision": [],
+            "recall": [],
+            "f1": []
+        }
+
+    # Last position of every distinct score value
+    distinct_idx = np.where(np.diff(sorted_scores))[0]
+    threshold_idx = np.r_[distinct_idx, sorted_y.size - 1]
+
+    cum_tps = np.cumsum(sorted_y)
+    tps = cum_tps[threshold_idx]
+    fps = threshold_idx + 1 - tps
+    n_pos = cum_tps[-1] if cum_tps.size else 0
+    n_neg = sorted_y.size - n_pos
+
+    # ROC AUC with the trapezoidal rule over the (fpr, tpr) curve
+    if n_pos == 0 or n_neg == 0:
+        logger.warning("Only one class present in the labels. ROC AUC and PR AUC are undefined.")
+        roc_auc = None
+        pr_auc = None
+    else:
+        tpr = np.r_[0.0, tps / n_pos]
+        fpr = np.r_[0.0, fps / n_neg]
+        roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+
+        # PR AUC as average precision: sum of precision weighted by recall steps
+        precision_curve = tps / (tps + fps)
+        recall_curve = tps / n_pos
+        pr_auc = float(np.sum(np.diff(np.r_[0.0, recall_curve]) * precision_curve))
+
+    # Precision, recall and F1 at the requested thresholds
+    if n_thresholds is None:
+        thresholds = sorted_scores[threshold_idx]
+        tp_at = tps
+        predicted_pos = threshold_idx + 1
+    else:
+        thresholds = np.linspace(1.0, 0.0, n_thresholds)
+        # Number of scores >= threshold, found by binary search on the sorted scores
+        predicted_pos = np.searchsorted(-sorted_scores, -thresholds, side="right")
+        tp_at = np.where(predicted_pos > 0, cum_tps[np.maximum(predicted_pos - 1, 0)], 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted_pos > 0, tp_at / predicted_pos, 1.0)
+        recall = tp_at / n_pos if n_pos > 0 else np.ones_like(thresholds, dtype=float)
+        f1 = np.where(
+            precision + recall > 0,
+            2 * precision * recall / (precision + recall),
+            0.0
+        )
+
+    best = int(np.argmax(f1)) if f1.size else 0
+    return {
+        "roc_auc": roc_auc,
+        "pr_auc": pr_auc,
+        "best_threshold": float(thresholds[best]) if f1.size else None,
+        "best_f1": float(f1[best]) if f1.size else None,
+        "thresholds": thresholds.tolist(),
+        "precision": precision.tolist(),
+        "recall": recall.tolist(),
+        "f1": f1.tolist()
+    }
+
+
 
 
 def go(args):
@@ -281,7 +516,7 @@ def go(args):
     # Load configuration
     config_filepath = os.path.join(project_root, args.config_file)
     config = load_config(config_filepath, logger)
-    logger.info(f"Configuration loaded: {config}")
+    logger.debug("Configuration loaded: %s", config)
     
     # Get the deployment path
     prod_deployment_path = os.path.join(
@@ -330,6 +565,49 @@ def go(args):
     outdated_packages = check_outdated_packages()
     logger.info(f"Outdated packages check: {outdated_packages}")
 
+    # Score history
+    # --------------------------------------
+    # Timings and data statistics of the deployed model are appended to the
+    # score history, so their trends can be queried later
+    model_info = load_model_info(model_filepath, logger)
+    deployed_version = model_version(model_info["name"], model_info["created_at"])
+    history_path = score_history_path(project_root, config)
+    history = ScoreHistory(history_path)
+    history.append(
+        "timing",
+        {"ingestion_seconds": timings[0], "training_seconds": timings[1]},
+        model_version=deployed_version,
+        source=args.target_data
+    )
+    data_statistics = {}
+    for stats in summary_stats:
+        data_statistics[f"mean_{stats['column']}"] = stats["mean"]
+        data_statistics[f"median_{stats['column']}"] = stats["median"]
+        data_statistics[f"std_{stats['column']}"] = stats["std_dev"]
+    for column, percent in zip(df.columns, missing_values):
+        data_statistics[f"missing_percent_{column}"] = percent
+    history.append("drift", data_statistics, model_version=deployed_version, source=args.target_data)
+    logger.info(f"Timings and data statistics appended to the score history {history_path}")
+
+
+    # Save the results for the monitoring report
+    # --------------------------------------
+    diagnostics_filepath = os.path.join(
+        project_root,
+        '02_training',
+        config['output_model_path'],
+        DIAGNOSTICS_FILE
+    )
+    save_diagnostics({
+        "model_version": deployed_version,
+        "target_data": args.target_data,
+        "summary_statistics": summary_stats,
+        "missing_values_percent": dict(zip(df.columns, missing_values)),
+        "timings": {"ingestion_seconds": timings[0], "training_seconds": timings[1]},
+        "outdated_packages": outdated_packages.to_dict(orient="records")
+    }, diagnostics_filepath)
+    ArtifactStore(artifact_store_path(project_root)).publish(diagnostics_filepath)
+    logger.info(f"Diagnostics results saved to {diagnostics_filepath}")
 
     # Report message
     # --------------------------------------
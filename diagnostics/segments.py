@@ -0,0 +1,147 @@
+"""
+# diagnostics/segments.py
+
+Segmented evaluation: precision, recall and F1 per segment of the data,
+e.g. per corporation or per activity bucket.
+All segments of a segmentation are counted in one vectorized pass:
+- the rows are mapped to integer segment codes (categorical codes,
+  pd.factorize or the bucket of np.searchsorted),
+- code * 4 + 2 * actual + predicted is counted with a single np.bincount,
+  which gives the confusion counts (tn, fp, fn, tp) of every segment,
+- the metrics of all segments are computed from the count arrays.
+The cost is O(n + segments) instead of O(segments * n) for a loop over groups.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Segmentations: a column, optionally cut into buckets at the given edges
+SEGMENTATIONS = {
+    "corporation": {"column": "corporation"},
+    "lastmonth_activity": {"column": "lastmonth_activity", "edges": [0, 10, 100, 1000, 10000]},
+    "lastyear_activity": {"column": "lastyear_activity", "edges": [0, 10, 100, 1000, 10000]}
+}
+
+# Metric used to rank the worst segments
+RANK_METRIC = "f1_score"
+
+
+def _bucket_names(edges: list) -> list:
+    names = [f"<{edges[0]}"]
+    names += [f"{low}-{high - 1}" for low, high in zip(edges[:-1], edges[1:])]
+    names.append(f">={edges[-1]}")
+    return names
+
+
+def segment_codes(df: pd.DataFrame, column: str, edges: list = None) -> tuple:
+    """
+    Integer segment code of every row.
+    Inputs:
+    - df: DataFrame
+    - column: Column that defines the segments
+    - edges: Optional sorted bucket edges for a numeric column
+    Outputs:
+    - codes: numpy array of segment codes (-1 for missing values)
+    - names: Segment names by code
+    """
+    values = df[column]
+    if edges is not None:
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        codes = np.searchsorted(np.asarray(edges, dtype=float), numbers, side="right")
+        codes[np.isnan(numbers)] = -1
+        return codes, _bucket_names(edges)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), [str(name) for name in values.cat.categories]
+    codes, uniques = pd.factorize(values)
+    return codes, [str(name) for name in uniques]
+
+
+def segment_confusion_counts(codes: np.ndarray, n_segments: int, y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    """
+    Confusion counts of binary labels (positive class 1) per segment.
+    Rows with a negative code are not counted.
+    Outputs:
+    - counts: Array of shape (n_segments, 4) with tn, fp, fn, tp per segment
+    """
+    valid = codes >= 0
+    pairs = codes[valid] * 4 + (np.asarray(y_true)[valid] == 1) * 2 + (np.asarray(y_pred)[valid] == 1)
+    return np.bincount(pairs, minlength=n_segments * 4).reshape(n_segments, 4)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """
+    Element-wise ratio; 1.0 where the denominator is 0 (like zero_division=1
+    in compute_model_metrics).
+    """
+    return np.divide(numerator, denominator, out=np.ones(len(numerator)), where=denominator > 0)
+
+
+def segment_metrics(counts: np.ndarray) -> dict:
+    """
+    Precision, recall and F1 of all segments from their confusion counts.
+    Outputs:
+    - metrics: Dictionary of metric name to numpy array (one value per segment)
+    """
+    tn, fp, fn, tp = counts.T
+    return {
+        "precision": _ratio(tp, tp + fp),
+        "recall": _ratio(tp, tp + fn),
+        "f1_score": _ratio(2 * tp, 2 * tp + fp + fn),
+        "accuracy": _ratio(tp + tn, counts.sum(axis=1))
+    }
+
+
+def evaluate_segmentation(df: pd.DataFrame, y_true: np.ndarray, y_pred: np.ndarray, column: str,
+                          edges: list = None, top_k: int = 10, min_rows: int = 5, include_all: bool = True) -> dict:
+    """
+    Metrics per segment of one segmentation.
+    Inputs:
+    - df: DataFrame of the scored rows (aligned with y_true and y_pred)
+    - y_true, y_pred: Known and predicted labels
+    - column, edges: Segmentation (see segment_codes)
+    - top_k: Number of worst segments returned
+    - min_rows: Minimum number of rows of a segment to be ranked
+    - include_all: Also return all segments
+    Outputs:
+    - result: Dictionary with the number of segments, the worst segments
+      (lowest F1 first, larger segments first on ties) and optionally all segments
+    """
+    codes, names = segment_codes(df, column, edges)
+    counts = segment_confusion_counts(codes, len(names), y_true, y_pred)
+    metrics = segment_metrics(counts)
+    rows = counts.sum(axis=1)
+
+    present = np.flatnonzero(rows > 0)
+    ranked = present[rows[present] >= min_rows]
+    ranked = ranked[np.lexsort((-rows[ranked], metrics[RANK_METRIC][ranked]))][:top_k]
+
+    def segment(i):
+        tn, fp, fn, tp = (int(count) for count in counts[i])
+        return dict(
+            segment=names[i], rows=int(rows[i]), tp=tp, fp=fp, fn=fn, tn=tn,
+            **{name: float(values[i]) for name, values in metrics.items()}
+        )
+
+    result = {"n_segments": int(len(present)), "worst": [segment(i) for i in ranked]}
+    if include_all:
+        result["segments"] = [segment(i) for i in present]
+    return result
+
+
+def segmented_evaluation(df: pd.DataFrame, y_true: np.ndarray, y_pred: np.ndarray, segmentations: dict = None,
+                         top_k: int = 10, min_rows: int = 5, include_all: bool = True) -> dict:
+    """
+    Metrics per segment of several segmentations (default SEGMENTATIONS;
+    segmentations whose column is missing are skipped).
+    Outputs:
+    - results: Dictionary of segmentation name to the result of evaluate_segmentation
+    """
+    segmentations = SEGMENTATIONS if segmentations is None else segmentations
+    return {
+        name: evaluate_segmentation(
+            df, y_true, y_pred, spec["column"], spec.get("edges"), top_k, min_rows, include_all
+        )
+        for name, spec in segmentations.items()
+        if spec["column"] in df.columns
+    }
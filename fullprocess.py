@@ -5,21 +5,23 @@ import subprocess
 import logging
 import os
 
+from utils.score_history\
+    import ScoreHistory,\
+           score_history_path
 from utils.common_utilities\
     import get_project_root,\
            load_config
+from utils.logging_utils import setup_logging
            
 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)-15s %(message)s")
-logger = logging.getLogger()
+logger = setup_logging()
 
 # Define variables
 # --------------------------------------
 config_file = 'config.json'
 ingested_files = 'ingested_files.txt'
 score_filename = 'latestscore.txt'
-deployed_score_filename = 'deployedscore.txt'
 
 # Define paths
 # --------------------------------------    
@@ -81,53 +83,67 @@ else:
 if new_data_detected:
     print("New data detected, proceeding with the pipeline.")
     
-    # Run the data ingestion step
-    logging.info("Running data ingestion step on the new data.")
-    subprocess.run([
+    # Run the data ingestion step: only the new files are loaded, deduped
+    # against the saved row digests and appended to the ingested data
+    logging.info("Running incremental data ingestion step on the new data.")
+    ingestion_run = subprocess.run([
         "mlflow", "run", ".", 
-        "-P", "steps=data_ingestion"
+        "-P", "steps=data_ingestion",
+        "-P", "hydra_options=data_ingestion.incremental=true"
     ])
+    # Source files rejected by the validation fail the ingestion: do not train on partial data
+    if ingestion_run.returncode != 0:
+        logging.error("Data ingestion failed (see the quarantine folder in 01_data). Stopping the process.")
+        exit(1)
     
-    # Run the model training step
-    logging.info("Running model training step on the ingested data.")
-    subprocess.run([
+    # Run the model training step: the deployed model is warm-started
+    # and retrained on the new files only
+    logging.info("Running warm-start model training step on the new data.")
+    training_run = subprocess.run([
         "mlflow", "run", ".", 
-        "-P", "steps=model_training"
+        "-P", "steps=model_training",
+        "-P", "hydra_options=model_training.training_mode=warm_start"
     ])
+    # Without a new model the stale one would be scored and deployed
+    if training_run.returncode != 0:
+        logging.error("Warm-start model training failed. Stopping the process.")
+        exit(1)
 
 
 ##################Checking for model drift
 #check whether the score from the deployed model is different from the score from the model that uses the newest ingested data
 logging.info("\n\n##### Check 2: Check for model drift #####")
 
-# retrieve path to the latest score file
+# retrieve path to the latest score file and the score history
 score_filepath = os.path.join(
     project_root,
     '02_training',
     config['output_model_path'],
     score_filename
 )
+score_history = ScoreHistory(score_history_path(project_root, config))
+
+
+def read_fbeta(score_filepath: str) -> float:
+    """
+    Read the fbeta score from a score text file (fallback if the score
+    history has no records yet).
+    """
+    with open(score_filepath, 'r') as file:
+        for line in file:
+            if line.startswith("fbeta:"):
+                return float(line.split(":")[1].strip())
+    raise ValueError(f"No 'fbeta:' line found in {score_filepath}")
 
-deployed_score_filepath = os.path.join(
-    project_root,
-    '02_training',
-    config['output_model_path'],
-    deployed_score_filename
-)
-
-# make a safety copy of the original score file
-logging.info(f"Copying original score file to {deployed_score_filepath}")
-os.system(f"cp {score_filepath} {deployed_score_filepath}")
 
 # read the score of the deployed model
-fbeta_value_deployed = None
-with open(deployed_score_filepath, 'r') as file:    
-    for line in file:
-        if line.startswith("fbeta:"):
-            fbeta_value_deployed = float(line.split(":")[1].strip())
-            break
-if fbeta_value_deployed is None:
-    raise ValueError(f"No 'fbeta:' line found in {deployed_score_filepath}")
+deployed_record = score_history.latest("fbeta")
+if deployed_record is not None:
+    fbeta_value_deployed = deployed_record["value"]
+    deployed_version = deployed_record["model_version"]
+else:
+    fbeta_value_deployed = read_fbeta(score_filepath)
+    deployed_version = None
 
 
 # update score file with the newly trained model
@@ -137,16 +153,13 @@ subprocess.run([
         "-P", "steps=model_scoring",
     ])
 # read the score of the new model
-fbeta_value_new = None
-with open(score_filepath, 'r') as file:    
-    for line in file:
-        if line.startswith("fbeta:"):
-            fbeta_value_new = float(line.split(":")[1].strip())
-            break
-if fbeta_value_new is None:
-    raise ValueError(f"No 'fbeta:' line found in {score_filepath}")
-if line.startswith("fbeta:"):
-    fbeta_value_new = float(line.split(":")[1].strip())
+new_record = score_history.latest("fbeta")
+if new_record is not None and (deployed_record is None or new_record["run_id"] != deployed_record["run_id"]):
+    fbeta_value_new = new_record["value"]
+    new_version = new_record["model_version"]
+else:
+    fbeta_value_new = read_fbeta(score_filepath)
+    new_version = None
 
 
 # read the scores from new score file
@@ -155,11 +168,24 @@ logging.info("-----------------------------------")
 logging.info("\nResult...")
 logging.info(f"Deployed model fbeta: {fbeta_value_deployed}")
 logging.info(f"New model fbeta: {fbeta_value_new}")
-if fbeta_value_new != fbeta_value_deployed:
-    model_drift_detected = True
+model_drift_detected = fbeta_value_new != fbeta_value_deployed
+
+# record the drift check in the score history
+score_history.append(
+    "drift",
+    {
+        "fbeta_deployed": fbeta_value_deployed,
+        "fbeta_new": fbeta_value_new,
+        "fbeta_delta": fbeta_value_new - fbeta_value_deployed,
+        "drift_detected": int(model_drift_detected)
+    },
+    model_version=new_version,
+    source=f"fullprocess (deployed: {deployed_version})"
+)
+
+if model_drift_detected:
     logging.info("---Model drift detected.")
 else:
-    model_drift_detected = False
     logging.info("---No model drift detected.")
     exit(0)  # Exit the script if no drift is detected
 
@@ -49,7 +49,9 @@ def go(config: DictConfig):
                 parameters={
                     "config_file": config["main"]["config_file"],                    
                     "output_filename": config["data_ingestion"]["output_filename"],
-                    "ingest_files_record": config["data_ingestion"]["ingest_files_record"]
+                    "ingest_files_record": config["data_ingestion"]["ingest_files_record"],
+                    "incremental": config["data_ingestion"]["incremental"],
+                    "skip_exact_check": config["data_ingestion"]["skip_exact_check"]
                 }
             )
 
@@ -63,7 +65,16 @@ def go(config: DictConfig):
                 env_manager="conda",
                 parameters={
                     "config_file": config["main"]["config_file"],
-                    "output_modelname": config["model_training"]["output_modelname"]
+                    "output_modelname": config["model_training"]["output_modelname"],
+                    "training_mode": config["model_training"]["training_mode"],
+                    "chunksize": config["model_training"]["chunksize"],
+                    "reservoir_size": config["model_training"]["reservoir_size"],
+                    "search_C": config["model_training"]["search_C"],
+                    "search_penalties": config["model_training"]["search_penalties"],
+                    "search_solvers": config["model_training"]["search_solvers"],
+                    "cv_folds": config["model_training"]["cv_folds"],
+                    "n_jobs": config["model_training"]["n_jobs"],
+                    "ingest_files_record": config["data_ingestion"]["ingest_files_record"]
                 }
             )
 
@@ -79,7 +90,8 @@ def go(config: DictConfig):
                     "config_file": config["main"]["config_file"],
                     "input_data": config["model_scoring"]["input_data"],
                     "input_modelinfo": config["model_training"]["output_modelname"],
-                    "output_score_filename": config["model_scoring"]["output_score_filename"]
+                    "output_score_filename": config["model_scoring"]["output_score_filename"],
+                    "n_thresholds": config["model_scoring"]["n_thresholds"]
                 }
             )           
 
@@ -95,7 +107,8 @@ def go(config: DictConfig):
                     "config_file": config["main"]["config_file"],
                     "ingest_files_record": config["data_ingestion"]["ingest_files_record"],
                     "output_modelname": config["model_training"]["output_modelname"],
-                    "output_score_filename": config["model_scoring"]["output_score_filename"]
+                    "output_score_filename": config["model_scoring"]["output_score_filename"],
+                    "gc_keep_history": config["model_deployment"]["gc_keep_history"]
                 }
             )
 
@@ -115,7 +128,7 @@ def go(config: DictConfig):
             )
 
         if "reporting" in active_steps:
-            # Generate a confusion matrix using the test data and the deployed model
+            # Render the confusion matrix of the deployed model and compare all models
             _ = mlflow.run(
                 os.path.join(hydra.utils.get_original_cwd(), "06_reporting"),
                 entry_point="main",
@@ -124,7 +137,8 @@ def go(config: DictConfig):
                 parameters={
                     "config_file": config["main"]["config_file"],
                     "input_data": config["model_scoring"]["input_data"],
-                    "input_modelinfo": config["model_training"]["output_modelname"]
+                    "input_modelinfo": config["model_training"]["output_modelname"],
+                    "output_format": config["reporting"]["output_format"]
                 }
             )                
 
@@ -0,0 +1,439 @@
+"""
+# serving/batch_jobs.py
+
+Asynchronous batch scoring of whole datasets.
+- Jobs are persisted in a SQLite database (JobStore), so queued and running
+  jobs survive a restart of the API and are resumed.
+- Jobs are scored by a pool of local worker processes; every worker keeps
+  the deployed model resident in memory (reloaded if the model file changes).
+- The input CSV is read and scored chunk by chunk; results (prediction,
+  score and true_label if the input is labeled) are written as CSV or Parquet
+  next to the input file. The file is written under a temporary name and
+  renamed when the job is done.
+- Progress (rows done / rows total) and throughput are updated after every
+  chunk and can be polled.
+- Every job is owned by the BatchScorer that dispatched it. Owners renew a
+  heartbeat of their unfinished jobs; jobs whose owner stopped renewing it
+  (e.g. the process died) are taken over by another BatchScorer and run again.
+  A job only starts if it is still queued under the owner that dispatched it,
+  so several API processes sharing the database never run a job twice.
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+from data_processing.streaming import iter_csv_chunks
+from diagnostics.diagnostics import iter_model_predictions
+from serving.resident_model import ResidentModel
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+logger = logging.getLogger()
+
+OUTPUT_FORMATS = ("csv", "parquet")
+
+JOB_COLUMNS = (
+    "job_id", "status", "input_path", "output_path", "output_format", "chunksize",
+    "rows_total", "rows_done", "created_at", "started_at", "finished_at", "error"
+)
+
+# Columns added after the first version of the schema, migrated on open
+OWNER_COLUMNS = {"owner": "TEXT", "heartbeat": "REAL"}
+
+# Interval of the owner heartbeat and age after which an owner counts as dead
+HEARTBEAT_SECONDS = 10.0
+LEASE_SECONDS = 60.0
+
+
+class JobStore:
+    """
+    SQLite store of the batch-scoring jobs.
+    Every call opens and closes its own connection, so the store can be used
+    from the API threads and from the worker processes.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    output_path TEXT NOT NULL,
+                    output_format TEXT NOT NULL,
+                    chunksize INTEGER NOT NULL,
+                    rows_total INTEGER,
+                    rows_done INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    error TEXT
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for name, column_type in OWNER_COLUMNS.items():
+                if name not in existing:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+
+    @contextmanager
+    def _connect(self):
+        """
+        Connection in a transaction (committed on success), closed afterwards.
+        """
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def create(self, job_id: str, input_path: str, output_path: str, output_format: str,
+               chunksize: int, owner: str) -> None:
+        """
+        Insert a queued job owned by a BatchScorer.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, status, input_path, output_path, output_format,"
+                " chunksize, created_at, owner, heartbeat) VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, input_path, output_path, output_format, chunksize, now, owner, now)
+            )
+
+    def update(self, job_id: str, owner: str = None, **fields) -> bool:
+        """
+        Update columns of a job, only while it is owned by owner if given.
+        Outputs:
+        - updated: False if the job does not exist (or has another owner)
+        """
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        query = f"UPDATE jobs SET {assignments} WHERE job_id = ?"
+        params = (*fields.values(), job_id)
+        if owner is not None:
+            query += " AND owner = ?"
+            params += (owner,)
+        with self._connect() as connection:
+            return connection.execute(query, params).rowcount > 0
+
+    def start(self, job_id: str, owner: str, rows_total: int) -> bool:
+        """
+        Mark a queued job as running, if it is still queued under owner.
+        Outputs:
+        - started: False if the job was started, finished or taken over meanwhile
+        """
+        with self._connect() as connection:
+            return connection.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, rows_total = ?, rows_done = 0"
+                " WHERE job_id = ? AND owner = ? AND status = 'queued'",
+                (time.time(), rows_total, job_id, owner)
+            ).rowcount > 0
+
+    def get(self, job_id: str) -> dict:
+        """
+        Job with its progress and throughput (None if the job does not exist).
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return None if row is None else _job_dict(row)
+
+    def list(self, status: str = None, limit: int = 100) -> list:
+        """
+        Most recent jobs, optionally filtered by status.
+        """
+        query = f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._connect() as connection:
+            rows = connection.execute(query, (*params, limit)).fetchall()
+        return [_job_dict(row) for row in rows]
+
+    def heartbeat(self, owner: str) -> None:
+        """
+        Renew the heartbeat of the unfinished jobs of an owner.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                (time.time(), owner)
+            )
+
+    def requeue_orphaned(self, owner: str, lease_seconds: float = LEASE_SECONDS) -> list:
+        """
+        Take over the unfinished jobs whose owner did not renew its heartbeat
+        within lease_seconds (or that have no owner) and reset them to queued.
+        Jobs of live owners are left alone.
+        Inputs:
+        - owner: New owner of the orphaned jobs
+        - lease_seconds: Heartbeat age after which an owner counts as dead
+        Outputs:
+        - job_ids: Ids of the jobs taken over, oldest first
+        """
+        now = time.time()
+        with self._connect() as connection:
+            # Write lock first, so concurrent owners cannot take over the same jobs
+            connection.execute("BEGIN IMMEDIATE")
+            job_ids = [row[0] for row in connection.execute(
+                "SELECT job_id FROM jobs WHERE status IN ('queued', 'running')"
+                " AND (owner IS NULL OR heartbeat IS NULL OR heartbeat < ?) ORDER BY created_at",
+                (now - lease_seconds,)
+            )]
+            connection.executemany(
+                "UPDATE jobs SET status = 'queued', rows_done = 0, started_at = NULL, owner = ?, heartbeat = ?"
+                " WHERE job_id = ?",
+                [(owner, now, job_id) for job_id in job_ids]
+            )
+        return job_ids
+
+
+def _job_dict(row: tuple) -> dict:
+    """
+    Job dictionary of a database row, with progress and throughput.
+    """
+    job = dict(zip(JOB_COLUMNS, row))
+    job["progress"] = (
+        job["rows_done"] / job["rows_total"] if job["rows_total"] else None
+    )
+    if job["started_at"] is not None:
+        elapsed = (job["finished_at"] or time.time()) - job["started_at"]
+        job["rows_per_second"] = job["rows_done"] / elapsed if elapsed > 0 else None
+    else:
+        job["rows_per_second"] = None
+    return job
+
+
+def count_rows(input_path: str) -> int:
+    """
+    Number of data rows of a CSV file (lines without the header),
+    counted in binary blocks without parsing the file.
+    """
+    n_lines = 0
+    last_byte = b"\n"
+    with open(input_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            n_lines += block.count(b"\n")
+            last_byte = block[-1:]
+    if last_byte != b"\n":
+        n_lines += 1
+    return max(n_lines - 1, 0)
+
+
+# Resident model of a worker process, set by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_file_path: str) -> None:
+    """
+    Initializer of the worker processes: preload the model.
+    """
+    global _worker_model
+    _worker_model = ResidentModel(model_file_path)
+    _worker_model.get()
+
+
+def _write_chunk(writer, output_path: str, output_format: str, df: pd.DataFrame, first: bool):
+    """
+    Append a chunk of results to the output file.
+    Outputs:
+    - writer: Parquet writer (None for CSV)
+    """
+    if output_format == "parquet":
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table)
+        return writer
+    df.to_csv(output_path, mode="w" if first else "a", header=first, index=False)
+    return None
+
+
+class JobTakenOver(Exception):
+    """
+    The job was taken over by another owner while it was running.
+    """
+
+
+def run_job(job_id: str, db_path: str, owner: str) -> int:
+    """
+    Score the input of a job chunk by chunk in a worker process.
+    The job is skipped if it is no longer queued under owner, and stopped
+    if another owner takes it over.
+    Inputs:
+    - job_id: Id of the job
+    - db_path: Path of the job database
+    - owner: Owner that dispatched the job
+    Outputs:
+    - rows_done: Number of scored rows (None if the job was skipped)
+    """
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    # The temporary file is per owner, so a stale runner never shares it
+    tmp_path = f"{job['output_path']}.{owner.rsplit(':', 1)[-1]}.tmp"
+    writer = None
+    rows_done = 0
+    try:
+        model_info = _worker_model.get()
+        if model_info is None:
+            raise FileNotFoundError(f"Model file {_worker_model.model_file_path} does not exist.")
+        if not store.start(job_id, owner, count_rows(job["input_path"])):
+            logger.info("Batch-scoring job %s is not queued under %s, skipped", job_id, owner)
+            return None
+
+        chunks = iter_csv_chunks(job["input_path"], job["chunksize"])
+        for y_pred, y_true, y_score in iter_model_predictions(chunks, model_info):
+            results = {"prediction": y_pred, "score": y_score}
+            if len(y_true) == len(y_pred):
+                results["true_label"] = y_true
+            writer = _write_chunk(
+                writer, tmp_path, job["output_format"], pd.DataFrame(results), first=rows_done == 0
+            )
+            rows_done += len(y_pred)
+            if not store.update(job_id, owner=owner, rows_done=rows_done):
+                raise JobTakenOver(job_id)
+
+        if writer is not None:
+            writer.close()
+            writer = None
+        if rows_done == 0 and job["output_format"] == "csv":
+            pd.DataFrame(columns=["prediction", "score"]).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, job["output_path"])
+        if not store.update(job_id, owner=owner, status="done", finished_at=time.time()):
+            logger.warning("Batch-scoring job %s was taken over by another owner after it finished", job_id)
+    except Exception as e:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if isinstance(e, JobTakenOver):
+            logger.warning("Batch-scoring job %s was taken over by another owner, stopped", job_id)
+            return None
+        store.update(job_id, owner=owner, status="failed", finished_at=time.time(), error=repr(e))
+        raise
+    return rows_done
+
+
+class BatchScorer:
+    """
+    Batch-scoring subsystem: job store and pool of worker processes.
+    When the pool is started, a heartbeat thread renews the jobs of this
+    scorer and takes over the jobs of dead owners (e.g. interrupted by a restart).
+    """
+
+    def __init__(self, db_path: str, model_file_path: str, n_workers: int = 2, chunksize: int = 100000,
+                 heartbeat_seconds: float = HEARTBEAT_SECONDS, lease_seconds: float = LEASE_SECONDS):
+        self.store = JobStore(db_path)
+        self.db_path = db_path
+        self.model_file_path = model_file_path
+        self.n_workers = n_workers
+        self.chunksize = chunksize
+        self.heartbeat_seconds = heartbeat_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat_thread = None
+
+    def start(self) -> None:
+        """
+        Start the worker pool and the heartbeat thread and resume orphaned jobs.
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_worker,
+                initargs=(self.model_file_path,)
+            )
+            self._stopped.clear()
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat, name="batch-heartbeat", daemon=True
+            )
+            self._heartbeat_thread.start()
+        self._resume_orphaned()
+
+    def _resume_orphaned(self) -> None:
+        for job_id in self.store.requeue_orphaned(self.owner, self.lease_seconds):
+            logger.info("Resuming batch-scoring job %s", job_id)
+            self._dispatch(job_id)
+
+    def _heartbeat(self) -> None:
+        while not self._stopped.wait(self.heartbeat_seconds):
+            try:
+                self.store.heartbeat(self.owner)
+                self._resume_orphaned()
+            except Exception as e:
+                logger.error("Batch-scoring heartbeat failed: %r", e)
+
+    def _dispatch(self, job_id: str) -> None:
+        future = self._executor.submit(run_job, job_id, self.db_path, self.owner)
+
+        def _on_done(future):
+            error = future.exception()
+            if error is not None:
+                logger.error("Batch-scoring job %s failed: %r", job_id, error)
+                job = self.store.get(job_id)
+                # A crashed worker cannot record the failure itself
+                if job is not None and job["status"] != "failed":
+                    self.store.update(
+                        job_id, owner=self.owner, status="failed", finished_at=time.time(), error=repr(error)
+                    )
+            elif future.result() is not None:
+                logger.info("Batch-scoring job %s done: %s rows", job_id, future.result())
+
+        future.add_done_callback(_on_done)
+
+    def submit(self, input_path: str, output_format: str = "csv", chunksize: int = None) -> str:
+        """
+        Queue a dataset for scoring.
+        Inputs:
+        - input_path: Path of the input CSV file
+        - output_format: csv or parquet
+        - chunksize: Number of rows scored at a time (default: self.chunksize)
+        Outputs:
+        - job_id: Id of the job
+        Raises ValueError for an unsupported format or a chunksize that is not a positive integer.
+        """
+        if chunksize is not None and (isinstance(chunksize, bool) or not isinstance(chunksize, int) or chunksize <= 0):
+            raise ValueError(f"chunksize must be a positive integer, got {chunksize!r}.")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format {output_format}, expected one of {OUTPUT_FORMATS}.")
+        if output_format == "parquet" and pq is None:
+            raise ValueError("Parquet output requires pyarrow, which is not installed.")
+        self.start()
+        job_id = uuid.uuid4().hex
+        output_path = f"{os.path.splitext(input_path)[0]}_scores_{job_id[:8]}.{output_format}"
+        self.store.create(job_id, input_path, output_path, output_format, chunksize or self.chunksize, self.owner)
+        self._dispatch(job_id)
+        return job_id
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -0,0 +1,256 @@
+"""
+# serving/encoding.py
+
+Response encoders for array-valued API responses (e.g. predictions).
+The arrays are serialized directly, without converting them element by
+element to Python lists. The format is chosen by content negotiation on the
+Accept header:
+- application/json (default): orjson with native NumPy support (declared in
+  the API environment), otherwise the standard json module on lists
+- application/octet-stream: raw little-endian arrays, concatenated in column
+  order; the layout is described in the X-Array-Layout header as
+  name:dtype:length entries, e.g. predictions:<i8:1000,true_labels:<i1:1000
+- application/vnd.apache.arrow.stream: Arrow IPC stream (only if pyarrow is installed)
+- text/csv: streamed in chunks of rows, so the whole body is never built in memory
+
+Results that are produced chunk by chunk (streaming predictions) are
+streamed as CSV or as NDJSON (application/x-ndjson, one JSON object per row).
+"""
+
+import json
+import logging
+
+import numpy as np
+from flask import Response, stream_with_context
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+logger = logging.getLogger()
+
+if orjson is None:
+    # tolist() plus the json module is still the fastest path without orjson
+    # (formatting the arrays with NumPy is several times slower)
+    logger.warning("orjson is not installed (see environment.yml). JSON responses use the slower json module.")
+
+
+JSON_MIMETYPE = "application/json"
+CSV_MIMETYPE = "text/csv"
+BINARY_MIMETYPE = "application/octet-stream"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Formats of chunk-by-chunk streamed responses, NDJSON first (default)
+STREAM_MIMETYPES = [NDJSON_MIMETYPE, CSV_MIMETYPE]
+
+# Rows per chunk of streamed CSV responses
+CSV_CHUNKSIZE = 65536
+
+
+def available_mimetypes() -> list:
+    """
+    Response formats supported in this environment, JSON first (default).
+    """
+    mimetypes = [JSON_MIMETYPE, CSV_MIMETYPE, NDJSON_MIMETYPE, BINARY_MIMETYPE]
+    if pa is not None:
+        mimetypes.append(ARROW_MIMETYPE)
+    return mimetypes
+
+
+def negotiate_mimetype(accept_mimetypes, supported: list = None) -> str:
+    """
+    Choose the response format from the Accept header.
+    Inputs:
+    - accept_mimetypes: Accept header of the request (request.accept_mimetypes)
+    - supported: Supported formats, default first (default: available_mimetypes())
+    Outputs:
+    - mimetype: Best supported format (None if no supported format is acceptable)
+    """
+    supported = supported or available_mimetypes()
+    if not accept_mimetypes:
+        return supported[0]
+    return accept_mimetypes.best_match(supported)
+
+
+def _tabular_columns(columns: dict) -> dict:
+    """
+    Columns with the length of the first column. Tabular formats (CSV,
+    Arrow) need equal lengths, so e.g. empty labels of unlabeled data are left out.
+    """
+    n_rows = len(next(iter(columns.values())))
+    return {name: values for name, values in columns.items() if len(values) == n_rows}
+
+
+def _json_value(value):
+    """
+    Value of a JSON document: numeric arrays are passed to orjson as they are,
+    other arrays (e.g. object arrays of strings) are converted to lists.
+    """
+    if isinstance(value, np.ndarray):
+        if orjson is not None and value.dtype != object:
+            return np.ascontiguousarray(value)
+        return value.tolist()
+    if isinstance(value, dict):
+        return {name: _json_value(item) for name, item in value.items()}
+    return value
+
+
+def encode_json(columns: dict) -> bytes:
+    """
+    Serialize arrays as a JSON object of lists.
+    Inputs:
+    - columns: Dictionary of column name to numpy array (or to a JSON value,
+      e.g. a scalar, list or dictionary of arrays)
+    Outputs:
+    - body: JSON bytes
+    """
+    document = {name: _json_value(values) for name, values in columns.items()}
+    if orjson is not None:
+        return orjson.dumps(document, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(document).encode()
+
+
+def encode_binary(columns: dict) -> tuple:
+    """
+    Serialize arrays as raw little-endian bytes.
+    Inputs:
+    - columns: Dictionary of column name to numpy array
+    Outputs:
+    - body: Concatenated array bytes
+    - layout: name:dtype:length entries of the arrays, in the order of the body
+    """
+    parts = []
+    layout = []
+    for name, values in columns.items():
+        values = np.asarray(values)
+        values = values.astype(values.dtype.newbyteorder("<"), copy=False)
+        parts.append(values.tobytes())
+        layout.append(f"{name}:{values.dtype.str}:{len(values)}")
+    return b"".join(parts), ",".join(layout)
+
+
+def encode_arrow(columns: dict) -> bytes:
+    """
+    Serialize arrays as an Arrow IPC stream with a single record batch.
+    Inputs:
+    - columns: Dictionary of column name to numpy array
+    Outputs:
+    - body: Arrow IPC stream bytes
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed.")
+    columns = _tabular_columns(columns)
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(values) for values in columns.values()], names=list(columns)
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def iter_csv_chunks(columns: dict, chunksize: int = CSV_CHUNKSIZE):
+    """
+    Serialize arrays as CSV, one chunk of rows at a time.
+    Inputs:
+    - columns: Dictionary of column name to numpy array
+    - chunksize: Number of rows per chunk
+    Outputs:
+    - Generator of CSV text chunks, the first one starting with the header
+    """
+    columns = _tabular_columns(columns)
+    n_rows = len(next(iter(columns.values())))
+    yield ",".join(columns) + "\n"
+    for start in range(0, n_rows, chunksize):
+        yield _csv_rows({name: values[start:start + chunksize] for name, values in columns.items()})
+
+
+def _csv_rows(columns: dict) -> str:
+    """
+    CSV rows (without header) of equally long arrays.
+    """
+    if len(next(iter(columns.values()))) == 0:
+        return ""
+    fields = [map(str, values.tolist()) for values in columns.values()]
+    return "\n".join(map(",".join, zip(*fields))) + "\n"
+
+
+def _ndjson_rows(columns: dict) -> str:
+    """
+    NDJSON rows of equally long numeric arrays, one JSON object per row.
+    """
+    if len(next(iter(columns.values()))) == 0:
+        return ""
+    template = "{" + ",".join(f'"{name}":%s' for name in columns) + "}"
+    fields = [map(str, values.tolist()) for values in columns.values()]
+    return "\n".join(template % row for row in zip(*fields)) + "\n"
+
+
+def iter_stream_chunks(column_chunks, mimetype: str):
+    """
+    Serialize results that are produced chunk by chunk.
+    Inputs:
+    - column_chunks: Iterable of dictionaries of column name to numpy array, one per chunk
+    - mimetype: NDJSON_MIMETYPE or CSV_MIMETYPE
+    Outputs:
+    - Generator of text chunks (CSV: the first one starts with the header)
+    """
+    header_written = False
+    for columns in column_chunks:
+        columns = _tabular_columns(columns)
+        if mimetype == CSV_MIMETYPE:
+            if not header_written:
+                header_written = True
+                yield ",".join(columns) + "\n"
+            yield _csv_rows(columns)
+        else:
+            yield _ndjson_rows(columns)
+
+
+def build_response(columns: dict, mimetype: str, chunksize: int = CSV_CHUNKSIZE) -> Response:
+    """
+    Build the response of array-valued data in the requested format.
+    Inputs:
+    - columns: Dictionary of column name to numpy array
+    - mimetype: Response format (from negotiate_mimetype)
+    - chunksize: Number of rows per chunk of CSV responses
+    Outputs:
+    - response: Flask response
+    """
+    if mimetype == CSV_MIMETYPE:
+        return Response(
+            stream_with_context(iter_csv_chunks(columns, chunksize)), mimetype=CSV_MIMETYPE
+        )
+    if mimetype == NDJSON_MIMETYPE:
+        return build_stream_response([columns], NDJSON_MIMETYPE)
+    if mimetype == BINARY_MIMETYPE:
+        body, layout = encode_binary(columns)
+        response = Response(body, mimetype=BINARY_MIMETYPE)
+        response.headers["X-Array-Layout"] = layout
+        return response
+    if mimetype == ARROW_MIMETYPE:
+        return Response(encode_arrow(columns), mimetype=ARROW_MIMETYPE)
+    return Response(encode_json(columns), mimetype=JSON_MIMETYPE)
+
+
+def build_stream_response(column_chunks, mimetype: str) -> Response:
+    """
+    Build a streamed response of results produced chunk by chunk. Each chunk
+    is serialized and sent as soon as it is produced.
+    Inputs:
+    - column_chunks: Iterable of dictionaries of column name to numpy array, one per chunk
+    - mimetype: NDJSON_MIMETYPE or CSV_MIMETYPE
+    Outputs:
+    - response: Streamed Flask response
+    """
+    return Response(
+        stream_with_context(iter_stream_chunks(column_chunks, mimetype)), mimetype=mimetype
+    )
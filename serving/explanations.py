@@ -0,0 +1,122 @@
+"""
+# serving/explanations.py
+
+Per-prediction explanations of linear models (logistic regression, SGD with
+logistic loss). The log-odds of a row are intercept + sum(coef_ * x), so the
+contribution of every feature is coef_ * x; no sampling (as in SHAP) is needed.
+- Contributions of the continuous features of the whole batch are one
+  element-wise product with their coefficients.
+- A categorical feature is one-hot encoded, so only the column of the row's
+  category is 1 and the contribution of the feature is the coefficient of
+  that column. Categories are mapped to their columns through the categories
+  of the stored encoder with one index lookup per feature, without touching
+  the (wide) one-hot block; unknown categories contribute 0.
+- Results are numeric arrays (feature positions, values, contributions), so
+  responses are serialized without per-element conversion.
+- The top features per row are selected with argpartition/argsort over the
+  absolute contributions.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processing.model_data_prep import process_data
+
+
+def _feature_layout(df: pd.DataFrame, model_info: dict) -> tuple:
+    """
+    Names of the features of the encoded matrix (as built by process_data)
+    and the column offsets of every feature.
+    Outputs:
+    - features: Feature names (continuous features, then categorical features)
+    - offsets: Start column of every feature in the encoded matrix, plus the end
+    """
+    label = model_info["label_column"]
+    categorical_features = list(model_info["categorical_features"])
+    continuous_features = [
+        column for column in df.columns
+        if column != label and column not in categorical_features
+    ]
+    sizes = [1] * len(continuous_features) + [len(categories) for categories in model_info["encoder"].categories_]
+    return continuous_features + categorical_features, np.concatenate([[0], np.cumsum(sizes)])
+
+
+def explain_predictions(df: pd.DataFrame, model_info: dict, top_k: int = 3) -> dict:
+    """
+    Score a DataFrame and explain every prediction by its top contributing features.
+    Inputs:
+    - df: DataFrame with the features (the label column is optional)
+    - model_info: Model information dictionary of a linear model
+    - top_k: Number of features per row
+    Outputs:
+    - explanation: Dictionary with
+      - y_pred, y_true, y_score: numpy arrays as in model_predictions
+      - features: Feature names
+      - top_features: Positions in features of the top_k features per row,
+        largest absolute contribution first (shape (rows, top_k))
+      - top_values: Encoded values x of these features (1 for a known
+        category, 0 for an unknown one)
+      - top_contributions: Their contributions coef_ * x to the log-odds of
+        the positive class
+      - categories: Category of every row per categorical feature (None if
+        unknown to the encoder)
+      - intercept: Intercept of the model
+      - feature_importance: Mean absolute contribution per feature over the batch
+    Raises ValueError for models without linear coefficients.
+    """
+    model = model_info["model"]
+    if not hasattr(model, "coef_"):
+        raise ValueError(f"Model {type(model).__name__} has no linear coefficients to explain.")
+    label = model_info["label_column"]
+
+    X, y_true, _ = process_data(
+        df=df,
+        label=label if label in df.columns else None,
+        categorical_features=model_info["categorical_features"],
+        training=False,
+        encoder=model_info["encoder"]
+    )
+    y_score = model.predict_proba(X)[:, 1]
+    y_pred = model.classes_[(y_score > 0.5).astype(int)]
+
+    # Contributions of the continuous features: coef_ * x
+    coef = model.coef_[0]
+    features, offsets = _feature_layout(df, model_info)
+    n_continuous = len(features) - len(model_info["categorical_features"])
+    contributions = np.empty((len(df), len(features)))
+    contributions[:, :n_continuous] = X[:, :n_continuous] * coef[:n_continuous]
+    values = np.empty((len(df), len(features)))
+    values[:, :n_continuous] = X[:, :n_continuous]
+
+    # Categorical features: only the one-hot column of the row's category is 1,
+    # so its contribution is the coefficient of that column (0 for unknown categories)
+    categories = {}
+    for i, feature_categories in enumerate(model_info["encoder"].categories_):
+        column = n_continuous + i
+        positions = pd.Index(feature_categories).get_indexer(df[features[column]].to_numpy())
+        known = positions >= 0
+        contributions[:, column] = np.where(known, coef[offsets[column] + positions], 0.0)
+        values[:, column] = known
+        categories[features[column]] = np.where(known, feature_categories[positions], None)
+
+    # Top features per row by absolute contribution
+    top_k = min(top_k, len(features))
+    magnitude = np.abs(contributions)
+    if top_k < len(features):
+        top = np.argpartition(-magnitude, top_k - 1, axis=1)[:, :top_k]
+    else:
+        top = np.tile(np.arange(len(features)), (len(df), 1))
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1), axis=1)
+
+    return {
+        "y_pred": y_pred,
+        "y_true": y_true,
+        "y_score": y_score,
+        "features": features,
+        "top_features": top.astype(np.int16),
+        "top_values": np.take_along_axis(values, top, axis=1),
+        "top_contributions": np.take_along_axis(contributions, top, axis=1),
+        "categories": categories,
+        "intercept": float(model.intercept_[0]),
+        "feature_importance": dict(zip(features, magnitude.mean(axis=0).tolist() if len(df) else [0.0] * len(features)))
+    }
@@ -0,0 +1,270 @@
+"""
+# serving/metrics.py
+
+In-process metrics registry for the API.
+Counters, gauges and histograms are kept in memory and rendered in the
+Prometheus text exposition format (version 0.0.4) by the /metrics endpoint,
+so hot-path performance can be watched without scraping logs.
+
+The default registry REGISTRY records:
+- api_requests_total: request counts per endpoint, method and status
+- api_request_duration_seconds: latency histogram per endpoint
+- api_rows_scored_total: rows scored per endpoint
+- model_load_events_total: model loads and reloads per model file
+- cache_requests_total / cache_hit_ratio: cache hits and misses per cache
+"""
+
+import math
+import os
+import threading
+import time
+
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: tuple, labelvalues: tuple, extra: dict = None) -> str:
+    """
+    Format a label set as {name="value",...}.
+    Inputs:
+    - labelnames: Names of the labels
+    - labelvalues: Values of the labels
+    - extra: Additional labels (e.g. le of histogram buckets)
+    Outputs:
+    - Formatted label string (empty if there are no labels)
+    """
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    escaped = [
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    ]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    """
+    Format a sample value for the exposition format.
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """
+    Monotonically increasing counter with optional labels.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """
+        Increase the counter of a label set.
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        """
+        Current value of a label set.
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self) -> list:
+        """
+        List of (sample name, label string, value) tuples.
+        """
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down, with optional labels.
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Set the gauge of a label set.
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram:
+    """
+    Histogram with cumulative buckets, sum and count per label set.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record an observation for a label set.
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> list:
+        """
+        List of (sample name, label string, value) tuples with cumulative buckets.
+        """
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                samples.append((
+                    self.name + "_bucket",
+                    _format_labels(self.labelnames, key, {"le": le}),
+                    cumulative
+                ))
+            samples.append((self.name + "_sum", _format_labels(self.labelnames, key), total))
+            samples.append((self.name + "_count", _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics, rendered together in the text exposition format.
+    Metrics are created on first use and returned on later calls with the same name.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: tuple, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        Outputs:
+        - text: Exposition text
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Default registry of the process
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter(
+    "api_requests_total", "Number of API requests.", ("endpoint", "method", "status")
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "api_request_duration_seconds", "API request latency in seconds.", ("endpoint",)
+)
+ROWS_SCORED = REGISTRY.counter(
+    "api_rows_scored_total", "Number of rows scored by the API.", ("endpoint",)
+)
+MODEL_LOADS = REGISTRY.counter(
+    "model_load_events_total", "Number of model loads and reloads.", ("model", "event")
+)
+MODEL_LAST_LOAD = REGISTRY.gauge(
+    "model_last_load_timestamp_seconds", "Unix time of the last model load.", ("model",)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total", "Number of cache lookups.", ("cache", "result")
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "cache_hit_ratio", "Ratio of cache hits to cache lookups.", ("cache",)
+)
+SHADOW_TASKS = REGISTRY.counter(
+    "shadow_tasks_total", "Number of shadow scoring tasks by outcome (scored, dropped, error).", ("outcome",)
+)
+
+# Modification time of every model file at its last load, to tell loads from reloads
+_model_mtimes = {}
+_model_mtimes_lock = threading.Lock()
+
+
+def record_model_load(model_file_path: str) -> None:
+    """
+    Record a model load. A load of a model file that changed on disk since
+    its previous load is recorded as a reload.
+    Inputs:
+    - model_file_path: Path of the loaded model file
+    """
+    model = os.path.basename(os.path.dirname(model_file_path)) + "/" + os.path.basename(model_file_path)
+    mtime = os.path.getmtime(model_file_path) if os.path.exists(model_file_path) else None
+    with _model_mtimes_lock:
+        previous = _model_mtimes.get(model_file_path)
+        _model_mtimes[model_file_path] = mtime
+    event = "reload" if previous is not None and previous != mtime else "load"
+    MODEL_LOADS.inc(model=model, event=event)
+    MODEL_LAST_LOAD.set(time.time(), model=model)
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    """
+    Record cache lookups and update the hit ratio of the cache.
+    Inputs:
+    - cache: Name of the cache
+    - hit: True for hits, False for misses
+    - count: Number of lookups with the same result (e.g. rows of a batch)
+    """
+    if count <= 0:
+        return
+    CACHE_REQUESTS.inc(count, cache=cache, result="hit" if hit else "miss")
+    hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+    misses = CACHE_REQUESTS.get(cache=cache, result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses), cache=cache)
@@ -0,0 +1,163 @@
+"""
+# serving/model_cache.py
+
+Bounded LRU cache of the models served by the API.
+Models are addressed by name, "<source>/<file>" (e.g. models/trainedmodel,
+practicemodels/trainedmodel.pkl) or just "<source>" for the default model
+file of a source folder. Sources are named model folders, e.g. production
+(04_deployment/production_deployment) and the model folders of 02_training.
+
+- Models are loaded lazily on their first request and reloaded if their file
+  changes on disk.
+- The cache is bounded by the number of models and by their total size
+  (estimated by the size of the model file); the least recently used models
+  are evicted, so cold models do not stay in memory.
+- Usage statistics (requests, loads, evictions, load time, last use) are
+  kept per model, including models that are not loaded any more.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from serving.metrics import record_cache_lookup, record_model_load
+from utils.common_utilities import load_model_info
+
+
+logger = logging.getLogger()
+
+MODEL_EXTENSION = ".pkl"
+
+# Model names: a source and optionally a file name, without path traversal
+_MODEL_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+(/[A-Za-z0-9_\-.]+)?$")
+
+
+class ModelCache:
+    """
+    Memory-bounded LRU cache of model information dictionaries.
+    """
+
+    def __init__(self, sources: dict, default_file: str = "trainedmodel.pkl",
+                 max_models: int = 4, max_bytes: int = 512 * 1024 ** 2):
+        """
+        Inputs:
+        - sources: Dictionary of source name to model folder
+        - default_file: Model file used if a name has no file part
+        - max_models: Maximum number of loaded models
+        - max_bytes: Maximum total size of the loaded model files
+        """
+        self.sources = sources
+        self.default_file = default_file
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._bytes = 0
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, name: str) -> tuple:
+        """
+        Canonical name and file path of a model name.
+        Inputs:
+        - name: Model name ("<source>" or "<source>/<file>")
+        Outputs:
+        - name: Canonical name "<source>/<file stem>"
+        - path: Path of the model file
+        Raises KeyError for unknown sources, invalid names and missing files.
+        """
+        if not name or not _MODEL_NAME_PATTERN.match(name):
+            raise KeyError(f"Invalid model name {name!r}.")
+        source, _, filename = name.partition("/")
+        if source not in self.sources:
+            raise KeyError(f"Unknown model source {source!r}, expected one of {sorted(self.sources)}.")
+        filename = filename or self.default_file
+        if not filename.endswith(MODEL_EXTENSION):
+            filename += MODEL_EXTENSION
+        path = os.path.join(self.sources[source], filename)
+        if not os.path.isfile(path):
+            raise KeyError(f"Model {name!r} not found.")
+        return f"{source}/{filename[:-len(MODEL_EXTENSION)]}", path
+
+    def available(self) -> list:
+        """
+        Names of all model files in the sources.
+        """
+        names = []
+        for source, folder in sorted(self.sources.items()):
+            if os.path.isdir(folder):
+                names.extend(
+                    f"{source}/{filename[:-len(MODEL_EXTENSION)]}"
+                    for filename in sorted(os.listdir(folder))
+                    if filename.endswith(MODEL_EXTENSION)
+                )
+        return names
+
+    def get(self, name: str) -> tuple:
+        """
+        Model information of a model, loaded on first use.
+        Inputs:
+        - name: Model name
+        Outputs:
+        - name: Canonical model name
+        - model_info: Model information dictionary
+        """
+        name, path = self.resolve(name)
+        stat = os.stat(path)
+        file_key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            usage = self._usage.setdefault(name, {
+                "requests": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0, "last_used": None
+            })
+            usage["requests"] += 1
+            usage["last_used"] = time.time()
+            entry = self._models.get(name)
+            if entry is not None and entry[0] == file_key:
+                self._models.move_to_end(name)
+                record_cache_lookup("models", True)
+                return name, entry[2]
+        record_cache_lookup("models", False)
+
+        # Load outside the lock, so other models are served meanwhile
+        start_time = time.perf_counter()
+        logger.info("Loading model %s from %s", name, path)
+        model_info = load_model_info(path, logger)
+        if model_info is None:
+            raise KeyError(f"Model {name!r} not found.")
+        load_seconds = time.perf_counter() - start_time
+        record_model_load(path)
+
+        with self._lock:
+            usage["loads"] += 1
+            usage["load_seconds"] += load_seconds
+            previous = self._models.pop(name, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._models[name] = (file_key, stat.st_size, model_info)
+            self._bytes += stat.st_size
+            # Evict the least recently used models, but keep the one just loaded
+            while len(self._models) > 1 and (
+                len(self._models) > self.max_models or self._bytes > self.max_bytes
+            ):
+                evicted, (_, size, _) = self._models.popitem(last=False)
+                self._bytes -= size
+                self._usage[evicted]["evictions"] += 1
+                logger.info("Evicted model %s from the model cache", evicted)
+        return name, model_info
+
+    def stats(self) -> dict:
+        """
+        Loaded models, their total size and the usage statistics per model.
+        """
+        with self._lock:
+            return {
+                "loaded": list(self._models),
+                "loaded_bytes": self._bytes,
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "models": {name: dict(usage, loaded=name in self._models)
+                           for name, usage in self._usage.items()}
+            }
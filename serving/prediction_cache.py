@@ -0,0 +1,223 @@
+"""
+# serving/prediction_cache.py
+
+Two-level cache of model predictions for repeated files and rows.
+- File level: the result arrays (predictions, true labels, scores) of a file,
+  keyed by path, modification time and size of the file. Bounded by the
+  number of files and the total size of the stored arrays (LRU eviction).
+- Row level: the positive class score of a row, keyed by a 64-bit hash of its
+  encoded feature vector, so repeated rows are not scored again even if they
+  come in a different file. The hashes are kept in a sorted uint64 array with
+  the aligned scores and looked up with one np.searchsorted per batch (as in
+  data_processing.dedup.DigestIndex). Bounded by max_rows; when full, the rows
+  used least recently (by batch) are evicted. Hashing a row costs about as
+  much as scoring it with a linear model, so the row level only pays off for
+  expensive models and is off unless max_rows > 0.
+
+Both levels belong to one model version (modification time and size of the
+model file) and are cleared automatically when the model is redeployed.
+Hits and misses are recorded in the metrics registry (caches prediction_file
+and prediction_rows) and returned by stats().
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from serving.metrics import record_cache_lookup
+
+
+# Constants of the row hash (splitmix64)
+_HASH_SEED = np.uint64(0x9E3779B97F4A7C15)
+_HASH_MULTIPLIER = np.uint64(0xBF58476D1CE4E5B9)
+_HASH_SHIFT = np.uint64(31)
+
+
+def _file_key(path: str) -> tuple:
+    """
+    Cache key of a file: path, modification time and size.
+    """
+    stat = os.stat(path)
+    return (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def hash_rows(X: np.ndarray) -> np.ndarray:
+    """
+    64-bit hash of every row of an encoded feature matrix: the 64-bit words
+    of a row are folded column by column with a multiply-xorshift mix, so a
+    batch is hashed with a few vectorized operations per column.
+    Inputs:
+    - X: 2D numpy array of encoded features
+    Outputs:
+    - keys: numpy array of uint64 row hashes
+    """
+    words = np.ascontiguousarray(X, dtype=np.float64).view(np.uint64)
+    keys = np.full(len(words), _HASH_SEED, dtype=np.uint64)
+    for column in range(words.shape[1]):
+        keys ^= words[:, column]
+        keys *= _HASH_MULTIPLIER
+        keys ^= keys >> _HASH_SHIFT
+    return keys
+
+
+class PredictionCache:
+    """
+    File-level and row-level prediction cache of one model file.
+    """
+
+    def __init__(self, model_file_path: str, max_files: int = 32,
+                 max_file_bytes: int = 256 * 1024 ** 2, max_rows: int = 0):
+        self.model_file_path = model_file_path
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        self.max_rows = max_rows
+        self._files = OrderedDict()
+        self._file_bytes = 0
+        self._clear_rows()
+        self._model_version = None
+        self._counts = {"file_hits": 0, "file_misses": 0, "row_hits": 0, "row_misses": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def _clear_rows(self) -> None:
+        # Sorted row hashes, their scores and the batch that used them last
+        self._row_keys = np.empty(0, dtype=np.uint64)
+        self._row_scores = np.empty(0, dtype=np.float64)
+        self._row_used = np.empty(0, dtype=np.int64)
+        self._batch = 0
+
+    def _current_model_version(self) -> tuple:
+        if not os.path.exists(self.model_file_path):
+            return None
+        stat = os.stat(self.model_file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _check_model_version(self) -> None:
+        """
+        Clear both levels if the model file changed since they were filled.
+        Must be called with the lock held.
+        """
+        version = self._current_model_version()
+        if version != self._model_version:
+            if self._files or len(self._row_keys):
+                self._counts["invalidations"] += 1
+            self._files.clear()
+            self._clear_rows()
+            self._file_bytes = 0
+            self._model_version = version
+
+    def get_file(self, path: str) -> tuple:
+        """
+        Stored result arrays of a file.
+        Inputs:
+        - path: Path of the scored file
+        Outputs:
+        - result: Tuple of numpy arrays (None on a miss)
+        """
+        key = _file_key(path)
+        with self._lock:
+            self._check_model_version()
+            result = self._files.get(key)
+            if result is not None:
+                self._files.move_to_end(key)
+                self._counts["file_hits"] += 1
+            else:
+                self._counts["file_misses"] += 1
+        record_cache_lookup("prediction_file", result is not None)
+        return result
+
+    def put_file(self, path: str, result: tuple) -> None:
+        """
+        Store the result arrays of a file.
+        Inputs:
+        - path: Path of the scored file
+        - result: Tuple of numpy arrays
+        """
+        key = _file_key(path)
+        size = sum(values.nbytes for values in result)
+        if size > self.max_file_bytes:
+            return
+        with self._lock:
+            self._check_model_version()
+            if key in self._files:
+                self._file_bytes -= sum(values.nbytes for values in self._files.pop(key))
+            self._files[key] = result
+            self._file_bytes += size
+            while len(self._files) > self.max_files or self._file_bytes > self.max_file_bytes:
+                _, evicted = self._files.popitem(last=False)
+                self._file_bytes -= sum(values.nbytes for values in evicted)
+
+    def score_rows(self, X: np.ndarray, predict_scores) -> np.ndarray:
+        """
+        Scores of the rows of an encoded feature matrix. Cached rows are
+        looked up, only the missing rows are scored.
+        Inputs:
+        - X: 2D numpy array of encoded features
+        - predict_scores: Function returning the scores of a feature matrix
+        Outputs:
+        - y_score: numpy array of scores
+        """
+        if self.max_rows <= 0:
+            return predict_scores(X)
+
+        keys = hash_rows(X)
+        with self._lock:
+            self._check_model_version()
+            self._batch += 1
+            positions = np.searchsorted(self._row_keys, keys)
+            found = positions < len(self._row_keys)
+            found[found] = self._row_keys[positions[found]] == keys[found]
+            y_score = np.empty(len(keys), dtype=np.float64)
+            y_score[found] = self._row_scores[positions[found]]
+            self._row_used[positions[found]] = self._batch
+            batch = self._batch
+            n_hits = int(found.sum())
+            self._counts["row_hits"] += n_hits
+            self._counts["row_misses"] += len(keys) - n_hits
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            y_score[missing] = predict_scores(X[missing])
+            new_keys, first = np.unique(keys[missing], return_index=True)
+            with self._lock:
+                self._add_rows(new_keys, y_score[missing[first]], batch)
+
+        record_cache_lookup("prediction_rows", True, n_hits)
+        record_cache_lookup("prediction_rows", False, len(keys) - n_hits)
+        return y_score
+
+    def _add_rows(self, keys: np.ndarray, scores: np.ndarray, batch: int) -> None:
+        """
+        Merge sorted, unique row hashes and their scores into the row level
+        and evict the least recently used rows beyond max_rows.
+        Must be called with the lock held.
+        """
+        # Rows added meanwhile by another request are not added twice
+        positions = np.searchsorted(self._row_keys, keys)
+        known = positions < len(self._row_keys)
+        known[known] = self._row_keys[positions[known]] == keys[known]
+        keys, scores, positions = keys[~known], scores[~known], positions[~known]
+
+        self._row_keys = np.insert(self._row_keys, positions, keys)
+        self._row_scores = np.insert(self._row_scores, positions, scores)
+        self._row_used = np.insert(self._row_used, positions, batch)
+        if len(self._row_keys) > self.max_rows:
+            # Keep the max_rows most recently used rows, in key order
+            keep = np.zeros(len(self._row_keys), dtype=bool)
+            keep[np.argpartition(-self._row_used, self.max_rows - 1)[:self.max_rows]] = True
+            self._row_keys = self._row_keys[keep]
+            self._row_scores = self._row_scores[keep]
+            self._row_used = self._row_used[keep]
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counters and current sizes of both levels.
+        """
+        with self._lock:
+            return {
+                **self._counts,
+                "files": len(self._files),
+                "file_bytes": self._file_bytes,
+                "rows": len(self._row_keys)
+            }
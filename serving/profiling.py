@@ -0,0 +1,149 @@
+"""
+# serving/profiling.py
+
+Request-level profiling for the API.
+A profile is started per request when profiling is requested (header or
+configuration). Code on the request path records per-phase spans with
+`span(name)`, e.g. csv_read, model_load, process_data, predict and json;
+outside of a profiled request a span only costs a context variable lookup.
+
+At the end of the request the spans are returned as a Server-Timing header
+(durations in milliseconds, readable in the browser developer tools) and a
+sample of the profiled requests can additionally be run under cProfile, with
+the statistics dumped to disk for inspection with pstats or snakeviz.
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import os
+import re
+import time
+import uuid
+
+
+# Request header that switches profiling on for a single request
+PROFILE_HEADER = "X-Profile"
+
+_current_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """
+    Per-phase spans of a single request, optionally with a cProfile profiler.
+    """
+
+    def __init__(self, name: str, cprofile: bool = False):
+        self.name = name
+        self.spans = {}
+        self.start_time = time.perf_counter()
+        self.total = None
+        self.profiler = cProfile.Profile() if cprofile else None
+        self._token = None
+
+    def add_span(self, name: str, duration: float) -> None:
+        """
+        Add the duration of a phase in seconds. Repeated phases are summed.
+        """
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def timings_ms(self) -> dict:
+        """
+        Durations of the phases and of the whole request in milliseconds.
+        """
+        timings = {name: round(duration * 1000, 3) for name, duration in self.spans.items()}
+        if self.total is not None:
+            timings["total"] = round(self.total * 1000, 3)
+        return timings
+
+    def server_timing(self) -> str:
+        """
+        Value of the Server-Timing response header.
+        """
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.timings_ms().items())
+
+
+def profiling_requested(header_value: str, enabled: bool = False) -> bool:
+    """
+    Check whether a request is profiled.
+    Inputs:
+    - header_value: Value of the X-Profile request header (None if missing)
+    - enabled: Profiling switched on for all requests by configuration
+    Outputs:
+    - True if the request is profiled
+    """
+    if enabled:
+        return True
+    return header_value is not None and header_value.lower() in ("1", "true", "yes")
+
+
+def start_profile(name: str, cprofile: bool = False) -> RequestProfile:
+    """
+    Start the profile of the current request.
+    Inputs:
+    - name: Name of the request (e.g. the endpoint)
+    - cprofile: Run the request under cProfile
+    Outputs:
+    - profile: RequestProfile, active until finish_profile is called
+    """
+    profile = RequestProfile(name, cprofile=cprofile)
+    profile._token = _current_profile.set(profile)
+    if profile.profiler is not None:
+        profile.profiler.enable()
+    return profile
+
+
+def finish_profile(profile: RequestProfile, dump_dir: str = None) -> str:
+    """
+    Stop the profile of the current request.
+    Inputs:
+    - profile: RequestProfile returned by start_profile
+    - dump_dir: Directory of the cProfile statistics files
+    Outputs:
+    - dump_path: Path of the cProfile statistics file (None if not captured)
+    """
+    if profile.total is not None:
+        return None
+    if profile.profiler is not None:
+        profile.profiler.disable()
+    profile.total = time.perf_counter() - profile.start_time
+    if profile._token is not None:
+        _current_profile.reset(profile._token)
+        profile._token = None
+
+    if profile.profiler is None or dump_dir is None:
+        return None
+    os.makedirs(dump_dir, exist_ok=True)
+    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", profile.name).strip("_") or "request"
+    dump_path = os.path.join(
+        dump_dir,
+        f"{safe_name}_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}.prof"
+    )
+    profile.profiler.dump_stats(dump_path)
+    return dump_path
+
+
+def current_profile() -> RequestProfile:
+    """
+    Profile of the current request (None outside of a profiled request).
+    """
+    return _current_profile.get()
+
+
+@contextlib.contextmanager
+def span(name: str):
+    """
+    Record the duration of a phase in the profile of the current request.
+    Does nothing outside of a profiled request.
+    Inputs:
+    - name: Name of the phase (e.g. csv_read, model_load, predict)
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, time.perf_counter() - start_time)
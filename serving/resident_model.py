@@ -0,0 +1,48 @@
+"""
+# serving/resident_model.py
+
+Model kept resident in memory by the API process.
+The model information dictionary is loaded once and reused by every request;
+it is reloaded when the model file changes on disk (e.g. after a redeployment).
+"""
+
+import logging
+import os
+import threading
+
+from serving.metrics import record_model_load
+from utils.common_utilities import load_model_info
+
+
+logger = logging.getLogger()
+
+
+class ResidentModel:
+    """
+    Model information of a model file, loaded on first use and kept in memory.
+    """
+
+    def __init__(self, model_file_path: str):
+        self.model_file_path = model_file_path
+        self._model_info = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        """
+        Model information dictionary (model, encoder, label, features, ...).
+        Reloaded if the model file was modified since the last load.
+        Outputs:
+        - model_info: Model information dictionary (None if the file does not exist)
+        """
+        mtime = os.path.getmtime(self.model_file_path) if os.path.exists(self.model_file_path) else None
+        if self._model_info is not None and mtime == self._mtime:
+            return self._model_info
+        with self._lock:
+            if self._model_info is None or mtime != self._mtime:
+                logger.info("Loading resident model from %s", self.model_file_path)
+                self._model_info = load_model_info(self.model_file_path, logger)
+                self._mtime = mtime
+                if self._model_info is not None:
+                    record_model_load(self.model_file_path)
+        return self._model_info
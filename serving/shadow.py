@@ -0,0 +1,183 @@
+"""
+# serving/shadow.py
+
+Shadow scoring of a candidate model alongside the production model.
+- Requests are answered with the production predictions as usual; the same
+  data is handed to a background thread pool and scored there by the
+  candidate model (e.g. the newly trained model in 02_training/models), so the
+  candidate never adds latency to the response.
+- The queue of shadow tasks is bounded (max_pending); when it is full new
+  tasks are dropped instead of slowing the API down.
+- Agreement of the predictions, score differences and (on labeled data)
+  confusion counts of both models are accumulated in memory per candidate
+  version and returned by stats(), with the metric deltas candidate minus
+  production. The accumulators are reset when the candidate file changes.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from data_processing.schema import read_dataset_csv
+from diagnostics.diagnostics import iter_model_predictions
+from serving.metrics import SHADOW_TASKS
+from serving.resident_model import ResidentModel
+
+
+logger = logging.getLogger()
+
+
+def _confusion_counts(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    """
+    Confusion counts (tp, fp, fn, tn) of binary labels with positive class 1.
+    """
+    positive_true = y_true == 1
+    positive_pred = y_pred == 1
+    tp = np.count_nonzero(positive_true & positive_pred)
+    fp = np.count_nonzero(~positive_true & positive_pred)
+    fn = np.count_nonzero(positive_true & ~positive_pred)
+    return np.array([tp, fp, fn, len(y_true) - tp - fp - fn], dtype=np.int64)
+
+
+def _metrics(counts: np.ndarray) -> dict:
+    """
+    Precision, recall, F1 and accuracy from confusion counts (tp, fp, fn, tn).
+    """
+    tp, fp, fn, tn = (int(count) for count in counts)
+    precision = tp / (tp + fp) if tp + fp > 0 else 1.0
+    recall = tp / (tp + fn) if tp + fn > 0 else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    total = tp + fp + fn + tn
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1_score": f1,
+        "accuracy": (tp + tn) / total if total > 0 else None
+    }
+
+
+class ShadowScorer:
+    """
+    Scores requests with a candidate model on a background pool and
+    accumulates the comparison with the production results.
+    """
+
+    def __init__(self, candidate_model_path: str, n_workers: int = 1, max_pending: int = 8):
+        self.candidate = ResidentModel(candidate_model_path)
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="shadow")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, candidate_version: str) -> None:
+        self._candidate_version = candidate_version
+        self._stats = {
+            "tasks": 0, "rows": 0, "agreements": 0, "labeled_rows": 0,
+            "score_abs_delta_sum": 0.0, "score_abs_delta_max": 0.0, "candidate_seconds": 0.0
+        }
+        self._counts = {"production": np.zeros(4, dtype=np.int64), "candidate": np.zeros(4, dtype=np.int64)}
+
+    def submit(self, y_pred, y_score, y_true, data_file_path: str = None, df=None) -> bool:
+        """
+        Queue the shadow scoring of data already scored by the production model.
+        Returns immediately; the task is dropped if the queue is full.
+        Inputs:
+        - y_pred, y_score, y_true: Production predictions, scores and true
+          labels (empty if the data is unlabeled)
+        - data_file_path: Path of the scored file (read by the shadow worker)
+        - df: Scored data if already in memory (instead of data_file_path)
+        Outputs:
+        - submitted: False if the task was dropped
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                SHADOW_TASKS.inc(outcome="dropped")
+                return False
+            self._pending += 1
+        self._executor.submit(self._score, np.asarray(y_pred), np.asarray(y_score),
+                              np.asarray(y_true), data_file_path, df)
+        return True
+
+    def _score(self, y_pred, y_score, y_true, data_file_path, df) -> None:
+        try:
+            model_info = self.candidate.get()
+            if model_info is None:
+                raise FileNotFoundError(f"Candidate model {self.candidate.model_file_path} does not exist.")
+            start_time = time.perf_counter()
+            if df is None:
+                df = read_dataset_csv(data_file_path)
+            ((candidate_pred, _, candidate_score),) = iter_model_predictions([df], model_info)
+            elapsed = time.perf_counter() - start_time
+            if len(candidate_pred) != len(y_pred):
+                raise ValueError("Candidate and production predictions differ in length.")
+
+            score_abs_delta = np.abs(candidate_score - y_score)
+            labeled = len(y_true) == len(y_pred)
+            candidate_version = f"{model_info['name']}@{model_info['created_at']}"
+            with self._lock:
+                if candidate_version != self._candidate_version:
+                    self._reset(candidate_version)
+                stats = self._stats
+                stats["tasks"] += 1
+                stats["rows"] += len(y_pred)
+                stats["agreements"] += int(np.count_nonzero(candidate_pred == y_pred))
+                stats["score_abs_delta_sum"] += float(score_abs_delta.sum())
+                if len(score_abs_delta):
+                    stats["score_abs_delta_max"] = max(stats["score_abs_delta_max"], float(score_abs_delta.max()))
+                stats["candidate_seconds"] += elapsed
+                if labeled:
+                    stats["labeled_rows"] += len(y_true)
+                    self._counts["production"] += _confusion_counts(y_true, y_pred)
+                    self._counts["candidate"] += _confusion_counts(y_true, candidate_pred)
+            SHADOW_TASKS.inc(outcome="scored")
+        except Exception:
+            SHADOW_TASKS.inc(outcome="error")
+            logger.exception("Shadow scoring failed")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        """
+        Comparison of the candidate with the production model so far.
+        Outputs:
+        - stats: Dictionary with the candidate version, rows compared,
+          agreement rate, score differences, the metrics of both models on
+          labeled rows and their deltas (candidate minus production)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            counts = {name: values.copy() for name, values in self._counts.items()}
+            candidate_version = self._candidate_version
+            pending = self._pending
+
+        rows = stats["rows"]
+        result = {
+            "candidate_model": self.candidate.model_file_path,
+            "candidate_version": candidate_version,
+            "pending_tasks": pending,
+            "tasks": stats["tasks"],
+            "rows": rows,
+            "agreement_rate": stats["agreements"] / rows if rows else None,
+            "score_abs_delta_mean": stats["score_abs_delta_sum"] / rows if rows else None,
+            "score_abs_delta_max": stats["score_abs_delta_max"] if rows else None,
+            "candidate_rows_per_second": rows / stats["candidate_seconds"] if stats["candidate_seconds"] > 0 else None,
+            "labeled_rows": stats["labeled_rows"]
+        }
+        if stats["labeled_rows"]:
+            production = _metrics(counts["production"])
+            candidate = _metrics(counts["candidate"])
+            result["production"] = production
+            result["candidate"] = candidate
+            result["delta"] = {key: candidate[key] - production[key] for key in production}
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the background pool.
+        """
+        self._executor.shutdown(wait=wait)
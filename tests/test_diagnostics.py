@@ -0,0 +1,53 @@
+"""
+# tests/test_diagnostics.py
+
+Tests of the model metrics and the threshold sweep (diagnostics.diagnostics).
+
+Run from the project root:
+    python -m pytest -q tests
+"""
+
+import json
+
+import numpy as np
+
+from diagnostics.diagnostics import compute_model_metrics, threshold_sweep
+
+
+def test_threshold_sweep_of_empty_input_is_undefined():
+    sweep = threshold_sweep(np.array([]), np.array([]))
+
+    assert sweep["roc_auc"] is None and sweep["pr_auc"] is None
+    assert sweep["best_threshold"] is None and sweep["best_f1"] is None
+    assert sweep["thresholds"] == [] and sweep["f1"] == []
+    json.dumps(sweep, allow_nan=False)
+
+
+def test_threshold_sweep_of_empty_input_on_a_grid():
+    sweep = threshold_sweep(np.array([]), np.array([]), n_thresholds=11)
+
+    assert sweep["best_threshold"] is None
+    assert sweep["thresholds"] == []
+
+
+def test_threshold_sweep_of_single_class_has_no_auc():
+    sweep = threshold_sweep(np.array([1, 1, 1]), np.array([0.2, 0.6, 0.9]), n_thresholds=11)
+
+    assert sweep["roc_auc"] is None and sweep["pr_auc"] is None
+    assert sweep["best_f1"] == 1.0
+    json.dumps(sweep, allow_nan=False)
+
+
+def test_threshold_sweep_matches_a_perfect_ranking():
+    sweep = threshold_sweep(np.array([0, 0, 1, 1]), np.array([0.1, 0.4, 0.6, 0.9]))
+
+    assert sweep["roc_auc"] == 1.0 and sweep["pr_auc"] == 1.0
+    assert sweep["best_threshold"] == 0.6 and sweep["best_f1"] == 1.0
+
+
+def test_model_metrics_of_single_class_have_no_roc_auc():
+    y = np.array([1, 1, 1])
+    _, _, fbeta, roc_auc = compute_model_metrics(y, np.array([1, 0, 1]), np.array([0.9, 0.2, 0.7]))
+
+    assert roc_auc is None
+    assert 0 < fbeta < 1
@@ -0,0 +1,54 @@
+"""
+# tests/test_schema.py
+
+Tests of reading datasets with the dataset schema (data_processing.schema).
+
+Run from the project root:
+    python -m pytest -q tests
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processing.schema import read_dataset_csv
+
+
+HEADER = "corporation,lastmonth_activity,lastyear_activity,number_of_employees,exited\n"
+
+
+def write_csv(tmp_path, rows: list) -> str:
+    file_path = tmp_path / "dataset.csv"
+    file_path.write_text(HEADER + "".join(f"{row}\n" for row in rows))
+    return str(file_path)
+
+
+def test_dataset_is_read_with_schema_dtypes(tmp_path):
+    df = read_dataset_csv(write_csv(tmp_path, ["abc,1,2,3,0", "def,4,5,6,1"]))
+
+    assert isinstance(df["corporation"].dtype, pd.CategoricalDtype)
+    assert df["lastmonth_activity"].dtype == np.int32
+    assert df["exited"].dtype == np.int8
+
+
+def test_values_out_of_range_are_not_wrapped(tmp_path):
+    # Parsed as int32/int8, these load as 1215752191 and 0
+    df = read_dataset_csv(write_csv(tmp_path, ["abc,99999999999,1,2,256", "def,4,5,6,1"]))
+
+    assert df["lastmonth_activity"].tolist() == [99999999999, 4]
+    assert df["exited"].tolist() == [256, 1]
+    assert df["lastmonth_activity"].dtype == np.int64
+    assert df["lastyear_activity"].dtype == np.int32
+
+
+def test_values_out_of_range_are_not_wrapped_in_chunks(tmp_path):
+    chunks = list(read_dataset_csv(write_csv(tmp_path, ["abc,1,2,3,0", "def,99999999999,5,6,1"]), chunksize=1))
+
+    assert chunks[0]["lastmonth_activity"].dtype == np.int32
+    assert chunks[1]["lastmonth_activity"].tolist() == [99999999999]
+
+
+def test_missing_values_keep_the_parsed_dtype(tmp_path):
+    df = read_dataset_csv(write_csv(tmp_path, ["abc,,2,3,0", "def,4,5,6,1"]))
+
+    assert df["lastmonth_activity"].isna().tolist() == [True, False]
+    assert df["lastyear_activity"].dtype == np.int32
@@ -0,0 +1,70 @@
+"""
+# tests/test_validation.py
+
+Tests of the source file validation (data_processing.validation).
+
+Run from the project root:
+    python -m pytest -q tests
+"""
+
+import numpy as np
+
+from data_processing.validation import read_validated_csv
+
+
+HEADER = "corporation,lastmonth_activity,lastyear_activity,number_of_employees,exited\n"
+
+
+def write_csv(tmp_path, rows: list) -> str:
+    file_path = tmp_path / "source.csv"
+    file_path.write_text(HEADER + "".join(f"{row}\n" for row in rows))
+    return str(file_path)
+
+
+def test_valid_file_is_read_with_schema_dtypes(tmp_path):
+    file_path = write_csv(tmp_path, ["abcd,1,2,3,0", "efgh,4,5,6,1"])
+
+    df, rejected, report = read_validated_csv(file_path)
+
+    assert report["status"] == "valid"
+    assert len(df) == 2 and len(rejected) == 0
+    assert df["lastmonth_activity"].dtype == np.int32
+    assert df["exited"].dtype == np.int8
+
+
+def test_value_out_of_int32_range_is_rejected(tmp_path):
+    # Read with int32, 99999999999 wraps around to 1215752191 and passes
+    rows = ["abcd,1,2,3,0"] * 99 + ["efgh,99999999999,5,6,1"]
+    file_path = write_csv(tmp_path, rows)
+
+    df, rejected, report = read_validated_csv(file_path)
+
+    assert report["status"] == "rows_rejected"
+    assert report["rejected_rows"] == 1
+    assert rejected["lastmonth_activity"].tolist() == [99999999999]
+    assert "lastmonth_activity is above" in rejected["rejection_reason"].iloc[0]
+    assert len(df) == 99
+    assert df["lastmonth_activity"].max() == 1
+
+
+def test_label_out_of_int8_range_is_rejected(tmp_path):
+    # Read with int8, 256 wraps around to 0 and passes the label domain check
+    rows = ["abcd,1,2,3,0"] * 99 + ["efgh,4,5,6,256"]
+    file_path = write_csv(tmp_path, rows)
+
+    df, rejected, report = read_validated_csv(file_path)
+
+    assert report["rejected_rows"] == 1
+    assert "exited is not one of" in rejected["rejection_reason"].iloc[0]
+    assert len(df) == 99
+
+
+def test_value_out_of_int64_range_is_rejected_by_the_text_path(tmp_path):
+    rows = ["abcd,1,2,3,0"] * 99 + ["efgh,99999999999999999999,5,6,1"]
+    file_path = write_csv(tmp_path, rows)
+
+    df, rejected, report = read_validated_csv(file_path)
+
+    assert report["rejected_rows"] == 1
+    assert "lastmonth_activity is above" in rejected["rejection_reason"].iloc[0]
+    assert len(df) == 99
@@ -0,0 +1,294 @@
+"""
+# utils/artifact_store.py
+
+Local content-addressed store of the pipeline artifacts (datasets, ingest
+records, models, scores, plots).
+
+    <store>/objects/<aa>/<sha256>          (read-only content, one per hash)
+    <store>/refs/<artifact>/<ref>          (JSON: hash, size, time, source)
+    <store>/refs/<artifact>/<ref>.log      (JSON lines: previous targets)
+
+- Artifacts are keyed by the SHA-256 hash of their content; publishing the
+  same content twice stores it once.
+- Named refs (e.g. latest, production) per artifact point at hashes; every
+  change of a ref is appended to its log.
+- Checkouts are hardlinks to the stored object (a copy only if the store is
+  on another file system), placed atomically with os.replace.
+- Garbage collection removes the objects that are not the target of a ref
+  or of one of the last keep_history entries of a ref log.
+
+The store is located in <project root>/artifact_store or in ARTIFACT_STORE.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import time
+import uuid
+
+from utils.common_utilities import get_project_root
+
+
+logger = logging.getLogger()
+
+HASH_CHUNK_SIZE = 1024 ** 2
+
+
+def artifact_store_path(project_root: str) -> str:
+    """
+    Root directory of the artifact store.
+    """
+    return os.environ.get("ARTIFACT_STORE") or os.path.join(project_root, 'artifact_store')
+
+
+def hash_file(path: str) -> str:
+    """
+    SHA-256 hash of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src: str, dest: str) -> None:
+    """
+    Place a hardlink of src at dest (copy across file systems), atomically.
+    """
+    tmp_path = os.path.join(os.path.dirname(dest) or ".", f".{os.path.basename(dest)}.{uuid.uuid4().hex}")
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+class ArtifactStore:
+    """
+    Content-addressed store with named refs.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.refs_dir = os.path.join(root, "refs")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _ref_path(self, artifact: str, ref: str) -> str:
+        return os.path.join(self.refs_dir, artifact, ref)
+
+    def put(self, path: str) -> str:
+        """
+        Store the content of a file.
+        The file is copied into the store (with a kernel-side copy where
+        available) unless the same content is already stored.
+        Inputs:
+        - path: Path of the file
+        Outputs:
+        - digest: SHA-256 hash of the content
+        """
+        digest = hash_file(path)
+        object_path = self.object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{uuid.uuid4().hex}.tmp"
+            shutil.copyfile(path, tmp_path)
+            # Objects are shared by hardlinks and must not be modified in place
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_path, object_path)
+        return digest
+
+    def set_ref(self, artifact: str, ref: str, digest: str, source: str = None) -> None:
+        """
+        Point a ref of an artifact at a stored object.
+        """
+        if not os.path.exists(self.object_path(digest)):
+            raise KeyError(f"Object {digest} is not in the store.")
+        ref_path = self._ref_path(artifact, ref)
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        target = {
+            "hash": digest,
+            "size": os.path.getsize(self.object_path(digest)),
+            "updated_at": time.time(),
+            "source": source
+        }
+        tmp_path = f"{ref_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(target, f)
+        os.replace(tmp_path, ref_path)
+        with open(f"{ref_path}.log", "a") as f:
+            f.write(json.dumps(target) + "\n")
+
+    def get_ref(self, artifact: str, ref: str) -> dict:
+        """
+        Target of a ref (None if the ref does not exist).
+        """
+        try:
+            with open(self._ref_path(artifact, ref), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def resolve(self, artifact: str, ref: str) -> str:
+        """
+        Path of the object a ref points at.
+        Raises KeyError if the ref does not exist.
+        """
+        target = self.get_ref(artifact, ref)
+        if target is None:
+            raise KeyError(f"Ref {artifact}/{ref} does not exist.")
+        return self.object_path(target["hash"])
+
+    def publish(self, path: str, artifact: str = None, refs: tuple = ("latest",)) -> str:
+        """
+        Store a file and point refs of its artifact at it.
+        Inputs:
+        - path: Path of the file
+        - artifact: Name of the artifact (default: the file name)
+        - refs: Refs to update
+        Outputs:
+        - digest: SHA-256 hash of the content
+        """
+        artifact = artifact or os.path.basename(path)
+        digest = self.put(path)
+        for ref in refs:
+            self.set_ref(artifact, ref, digest, source=os.path.abspath(path))
+        logger.info("Published %s as %s (%s)", path, artifact, digest[:12])
+        return digest
+
+    def promote(self, artifact: str, from_ref: str, to_ref: str) -> str:
+        """
+        Point a ref at the target of another ref (e.g. latest -> production).
+        """
+        target = self.get_ref(artifact, from_ref)
+        if target is None:
+            raise KeyError(f"Ref {artifact}/{from_ref} does not exist.")
+        self.set_ref(artifact, to_ref, target["hash"], source=target.get("source"))
+        return target["hash"]
+
+    def checkout(self, artifact: str, ref: str, dest: str) -> str:
+        """
+        Place the object of a ref at a path (hardlink, atomic).
+        Inputs:
+        - artifact, ref: Ref to check out
+        - dest: Destination file path, or a directory (the artifact name is used)
+        Outputs:
+        - dest: Path of the checked-out file
+        """
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, artifact)
+        _link_or_copy(self.resolve(artifact, ref), dest)
+        return dest
+
+    def refs(self) -> dict:
+        """
+        All refs: dictionary of "<artifact>/<ref>" to target.
+        """
+        refs = {}
+        for artifact in sorted(os.listdir(self.refs_dir)):
+            artifact_dir = os.path.join(self.refs_dir, artifact)
+            for ref in sorted(os.listdir(artifact_dir)):
+                if not ref.endswith((".log", ".tmp")):
+                    refs[f"{artifact}/{ref}"] = self.get_ref(artifact, ref)
+        return refs
+
+    def gc(self, keep_history: int = 5, min_age_seconds: float = 3600.0, dry_run: bool = False) -> dict:
+        """
+        Remove unreferenced objects.
+        Inputs:
+        - keep_history: Number of previous targets of every ref that are kept
+        - min_age_seconds: Objects younger than this are kept (e.g. published
+          by a step that has not set its ref yet)
+        - dry_run: Only report what would be removed
+        Outputs:
+        - result: Dictionary with the number and size of the removed objects
+          and the number of kept objects
+        """
+        keep = set()
+        for artifact in os.listdir(self.refs_dir):
+            artifact_dir = os.path.join(self.refs_dir, artifact)
+            for name in os.listdir(artifact_dir):
+                path = os.path.join(artifact_dir, name)
+                if name.endswith(".log"):
+                    with open(path, "r") as f:
+                        entries = [json.loads(line) for line in f if line.strip()]
+                    keep.update(entry["hash"] for entry in entries[-keep_history:] if keep_history > 0)
+                elif not name.endswith(".tmp"):
+                    with open(path, "r") as f:
+                        keep.add(json.load(f)["hash"])
+
+        now = time.time()
+        removed, removed_bytes, kept = 0, 0, 0
+        for prefix in os.listdir(self.objects_dir):
+            for entry in os.scandir(os.path.join(self.objects_dir, prefix)):
+                if entry.name in keep or now - entry.stat().st_mtime < min_age_seconds:
+                    kept += 1
+                    continue
+                removed += 1
+                removed_bytes += entry.stat().st_size
+                if not dry_run:
+                    os.remove(entry.path)
+        logger.info("Artifact store gc: %s objects (%s bytes) removed, %s kept", removed, removed_bytes, kept)
+        return {"removed": removed, "removed_bytes": removed_bytes, "kept": kept}
+
+
+def go(args):
+
+    store = ArtifactStore(args.store or artifact_store_path(get_project_root(logger)))
+
+    if args.command == "refs":
+        for name, target in store.refs().items():
+            print(f"{name}\t{target['hash'][:12]}\t{target['size']}\t{target['source']}")
+    elif args.command == "gc":
+        print(json.dumps(store.gc(args.keep_history, args.min_age_seconds, args.dry_run)))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Inspect and clean up the artifact store.")
+
+    parser.add_argument(
+        "command",
+        choices=["refs", "gc"],
+        help="refs: list the refs, gc: remove unreferenced objects."
+    )
+
+    parser.add_argument(
+        "--store",
+        type=str,
+        help="Root directory of the store. Default: artifact_store in the project root.",
+        default=None
+    )
+
+    parser.add_argument(
+        "--keep_history",
+        type=int,
+        help="Number of previous targets of every ref kept by gc.",
+        default=5
+    )
+
+    parser.add_argument(
+        "--min_age_seconds",
+        type=float,
+        help="Objects younger than this are kept by gc.",
+        default=3600.0
+    )
+
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Only report what gc would remove."
+    )
+
+    args = parser.parse_args()
+
+    go(args)
@@ -13,6 +13,8 @@ import os
 import pandas as pd
 import pickle
 
+from data_processing.schema import read_dataset_csv
+
 def get_project_root(logger: logging.Logger) -> str:
     """
     Get the project root directory.
@@ -60,7 +62,8 @@ def load_config(config_file: str, logger: logging.Logger) -> dict:
 
 def load_dataset(input_file_path: str, logger: logging.Logger) -> pd.DataFrame:
     """
-    Load the dataset from a CSV file.
+    Load the dataset from a CSV file with the dataset schema
+    (downcast integer columns, categorical corporation column).
     Inputs:
     - input_file_path: Path to the input CSV file
     Outputs:
@@ -69,10 +72,27 @@ def load_dataset(input_file_path: str, logger: logging.Logger) -> pd.DataFrame:
     if not os.path.exists(input_file_path):
         logger.error(f"Dataset file {input_file_path} does not exist. Exiting.")
         return pd.DataFrame()        
-    df = pd.read_csv(input_file_path)        
+    df = read_dataset_csv(input_file_path)        
     return df
 
 
+def load_model_info(model_file_path: str, logger: logging.Logger) -> dict:
+    """
+    Load the full model information dictionary stored by the training step.
+    Inputs:
+    - model_file_path: Path to the model file
+    Outputs:
+    - model_info: Dictionary with the model, encoder and training information
+    """
+    if not os.path.exists(model_file_path):
+        logger.error(f"Model file {model_file_path} does not exist. Exiting.")
+        return None
+
+    with open(model_file_path, 'rb') as filehandler:
+        model_info = pickle.load(filehandler)
+    return model_info
+
+
 def load_model(model_file_path: str, logger: logging.Logger):
     """
     Load a trained model from a file.
@@ -84,12 +104,9 @@ def load_model(model_file_path: str, logger: logging.Logger):
     - label: Name of the label column
     - categorical_features: List of categorical features used in the model
     """
-    if not os.path.exists(model_file_path):
-        logger.error(f"Model file {model_file_path} does not exist. Exiting.")
+    model_info = load_model_info(model_file_path, logger)
+    if model_info is None:
         return None
-    
-    with open(model_file_path, 'rb') as filehandler:
-       model_info = pickle.load(filehandler)
     model_name = model_info["name"]
     model_created_at = model_info["created_at"]
     model = model_info["model"]
@@ -97,12 +114,12 @@ def load_model(model_file_path: str, logger: logging.Logger):
     label = model_info["label_column"]
     features = model_info["features"]
     categorical_features = model_info["categorical_features"]
-    logger.info(f"Model name: {model_name}")
-    logger.info(f"Model created at: {model_created_at}")
-    logger.info(f"Model loaded: {model}")
-    logger.info(f"Encoder loaded: {encoder}")
-    logger.info(f"Label column: {label}")
-    logger.info(f"Features used: {features}")
-    logger.info(f"Categorical features: {categorical_features}")
+    logger.info("Model loaded: %s created at: %s", model_name, model_created_at)
+    # Object reprs are only rendered if DEBUG is enabled
+    logger.debug("Model: %s", model)
+    logger.debug("Encoder: %s", encoder)
+    logger.debug("Label column: %s", label)
+    logger.debug("Features used: %s", features)
+    logger.debug("Categorical features: %s", categorical_features)
     
     return model_name, model_created_at, model, encoder, label, categorical_features
\ No newline at end of file
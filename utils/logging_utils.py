@@ -0,0 +1,164 @@
+"""
+# utils/logging_utils.py
+
+Structured logging layer for the pipeline and the API.
+- Messages use %-style arguments instead of f-strings, so they are only
+  formatted when the level is enabled; array previews are wrapped in lazy
+  objects that are only sliced and rendered when the record is emitted.
+- Debug payloads such as array previews are sampled (every n-th call per message).
+- Output is plain text (default) or JSON lines, optionally written
+  asynchronously through a queue handler and a background listener thread.
+
+Configuration through environment variables:
+- LOG_LEVEL: logging level (default INFO)
+- LOG_JSON: 1 to write JSON lines
+- LOG_ASYNC: 1 to write through a queue handler
+- LOG_DEBUG_SAMPLE_RATE: fraction of sampled debug payloads that are logged (default 0.01)
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+
+TEXT_FORMAT = "%(asctime)-15s %(message)s"
+
+_configured = False
+_configure_lock = threading.Lock()
+_listener = None
+_sample_counters = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as JSON lines.
+    Structured fields passed with extra={"fields": {...}} are added to the object.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Plain text format of the project. Structured fields passed with
+    extra={"fields": {...}} are appended as key=value pairs.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class LazyPreview:
+    """
+    Preview of the first rows of an array, rendered only when the log record
+    is actually emitted.
+    """
+
+    def __init__(self, values, n: int = 5):
+        self.values = values
+        self.n = n
+
+    def __str__(self) -> str:
+        return str(self.values[:self.n])
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def setup_logging(level: str = None, json_format: bool = None, async_queue: bool = None) -> logging.Logger:
+    """
+    Configure the root logger once per process and return it.
+    Later calls return the configured root logger unchanged.
+    Inputs:
+    - level: Logging level (default: LOG_LEVEL or INFO)
+    - json_format: Write JSON lines (default: LOG_JSON)
+    - async_queue: Write through a queue handler (default: LOG_ASYNC)
+    Outputs:
+    - logger: Root logger
+    """
+    global _configured, _listener
+    root = logging.getLogger()
+    with _configure_lock:
+        if _configured:
+            return root
+
+        level = level or os.environ.get("LOG_LEVEL", "INFO")
+        json_format = _env_flag("LOG_JSON") if json_format is None else json_format
+        async_queue = _env_flag("LOG_ASYNC") if async_queue is None else async_queue
+
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter() if json_format else TextFormatter(TEXT_FORMAT))
+
+        if async_queue:
+            # Records are put on a queue by the caller and written by a listener thread
+            log_queue = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+            handler = logging.handlers.QueueHandler(log_queue)
+
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+        _configured = True
+
+    return root
+
+
+def log_event(logger: logging.Logger, level: int, message: str, **fields) -> None:
+    """
+    Log a structured event. Nothing is built if the level is disabled.
+    With JSON output the fields become keys of the JSON object.
+    Inputs:
+    - logger: Logger
+    - level: Logging level (e.g. logging.INFO)
+    - message: Message text
+    - fields: Structured fields of the event
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields})
+
+
+def debug_sampled(logger: logging.Logger, message: str, *args, rate: float = None) -> None:
+    """
+    Log a debug payload for a sample of the calls with the same message.
+    Nothing is formatted if DEBUG is disabled or the call is not sampled.
+    Inputs:
+    - logger: Logger
+    - message: %-style message, also used as the sampling key
+    - args: Message arguments (e.g. LazyPreview objects)
+    - rate: Fraction of calls that are logged (default: LOG_DEBUG_SAMPLE_RATE or 0.01)
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if rate is None:
+        rate = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+    if rate <= 0:
+        return
+    every = max(int(round(1 / rate)), 1)
+    counter = _sample_counters.setdefault(message, itertools.count())
+    if next(counter) % every == 0:
+        logger.debug(message, *args)
@@ -0,0 +1,204 @@
+"""
+# utils/score_history.py
+
+Append-only history of monitoring records in a local SQLite database.
+Every record is one value of one metric:
+- kind: score (model metrics of a scoring run), drift (drift statistics of
+  fullprocess.py) or timing (execution times of the diagnostics)
+- metric: name of the metric, e.g. fbeta, roc_auc, ingestion_seconds
+- model_version: name and creation time of the model, e.g.
+  logistic_regression_model@2024-01-01 12:00:00
+- recorded_at: Unix time of the record
+- source: what was scored or measured (e.g. the test data file)
+
+Records are indexed by model version and time and by metric and time, so
+range queries and aggregates (per model version or per time bucket) are
+answered by SQLite without re-scoring anything.
+"""
+
+import numbers
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+
+RECORD_KINDS = ("score", "drift", "timing")
+
+RECORD_COLUMNS = ("recorded_at", "run_id", "kind", "metric", "value", "model_version", "source")
+
+# Name of the database file in the model output folder
+SCORE_HISTORY_FILE = "score_history.db"
+
+
+def model_version(model_name: str, created_at: str) -> str:
+    """
+    Version id of a model from its name and creation time.
+    """
+    return f"{model_name}@{created_at}"
+
+
+def score_history_path(project_root: str, config: dict) -> str:
+    """
+    Path of the score history database in the model output folder.
+    """
+    return os.path.join(project_root, '02_training', config['output_model_path'], SCORE_HISTORY_FILE)
+
+
+class ScoreHistory:
+    """
+    Append-only store of monitoring records.
+    Every call opens (and closes) its own connection, so the store can be
+    shared by threads and processes.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recorded_at REAL NOT NULL,
+                    run_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    value REAL,
+                    model_version TEXT,
+                    source TEXT
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS records_model_time ON records (model_version, recorded_at)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS records_metric_time ON records (metric, recorded_at)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """
+        Connection in a transaction (committed on success), closed afterwards.
+        """
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def append(self, kind: str, values: dict, model_version: str = None,
+               source: str = None, recorded_at: float = None) -> str:
+        """
+        Append the values of one run.
+        Inputs:
+        - kind: score, drift or timing
+        - values: Dictionary of metric name to numeric value (other values are skipped)
+        - model_version: Version of the model (see model_version)
+        - source: What was scored or measured
+        - recorded_at: Unix time (default: now)
+        Outputs:
+        - run_id: Id shared by the records of the run
+        """
+        if kind not in RECORD_KINDS:
+            raise ValueError(f"Unknown record kind {kind}, expected one of {RECORD_KINDS}.")
+        run_id = uuid.uuid4().hex
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        rows = [
+            (recorded_at, run_id, kind, metric, float(value), model_version, source)
+            for metric, value in values.items()
+            if isinstance(value, numbers.Real)
+        ]
+        with self._connect() as connection:
+            connection.executemany(
+                f"INSERT INTO records ({', '.join(RECORD_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return run_id
+
+    def _where(self, metric=None, kind=None, model_version=None, source=None, start=None, end=None) -> tuple:
+        conditions = []
+        params = []
+        for column, value in [("metric", metric), ("kind", kind),
+                              ("model_version", model_version), ("source", source)]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append("recorded_at >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("recorded_at < ?")
+            params.append(end)
+        clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return clause, params
+
+    def query(self, metric: str = None, kind: str = None, model_version: str = None, source: str = None,
+              start: float = None, end: float = None, limit: int = None) -> list:
+        """
+        Records in a time range, oldest first.
+        Inputs:
+        - metric, kind, model_version, source: Optional filters
+        - start, end: Optional time range [start, end) as Unix time
+        - limit: Maximum number of records (the most recent ones), not negative
+        Outputs:
+        - records: List of record dictionaries
+        """
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must not be negative, got {limit}.")
+        clause, params = self._where(metric, kind, model_version, source, start, end)
+        query = f"SELECT {', '.join(RECORD_COLUMNS)} FROM records{clause} ORDER BY recorded_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as connection:
+            rows = connection.execute(query, params).fetchall()
+        return [_record_dict(row) for row in reversed(rows)]
+
+    def aggregate(self, metric: str, kind: str = None, model_version: str = None, source: str = None,
+                  start: float = None, end: float = None, bucket_seconds: float = None) -> list:
+        """
+        Aggregates of a metric per model version, or per time bucket.
+        Inputs:
+        - metric: Name of the metric
+        - kind, model_version, source: Optional filters
+        - start, end: Optional time range [start, end) as Unix time
+        - bucket_seconds: Group by time buckets of this length instead of by model version
+        Outputs:
+        - aggregates: List of dictionaries with count, min, max, mean, first
+          and last time, oldest first
+        """
+        clause, params = self._where(metric, kind, model_version, source, start, end)
+        if bucket_seconds:
+            group = "CAST(recorded_at / ? AS INTEGER) * ?"
+            params = [bucket_seconds, bucket_seconds] + params
+        else:
+            group = "model_version"
+        query = (
+            f"SELECT {group} AS grp, COUNT(value), MIN(value), MAX(value), AVG(value),"
+            f" MIN(recorded_at), MAX(recorded_at) FROM records{clause}"
+            " GROUP BY grp ORDER BY MIN(recorded_at)"
+        )
+        with self._connect() as connection:
+            rows = connection.execute(query, params).fetchall()
+        key = "bucket_start" if bucket_seconds else "model_version"
+        return [
+            {
+                key: grp, "count": count, "min": minimum, "max": maximum, "mean": mean,
+                "first_recorded_at": first, "last_recorded_at": last
+            }
+            for grp, count, minimum, maximum, mean, first, last in rows
+        ]
+
+    def latest(self, metric: str, kind: str = "score", model_version: str = None, source: str = None) -> dict:
+        """
+        Most recent record of a metric (None if there is none).
+        """
+        records = self.query(metric=metric, kind=kind, model_version=model_version, source=source, limit=1)
+        return records[0] if records else None
+
+
+def _record_dict(row: tuple) -> dict:
+    record = dict(zip(RECORD_COLUMNS, row))
+    record["recorded_at_iso"] = datetime.fromtimestamp(record["recorded_at"]).isoformat(timespec="seconds")
+    return record